@@ -1,12 +1,20 @@
 '''Class for cartesian grids covering a defined area'''
 
 # Python modules
+import os
 import numpy as np
 import wradlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from netCDF4 import Dataset
 
 # MasterModule
+from .coord_cache import CoordCache
 from .grid_corners import GridCorners
 from .grid_coordinates import GridCoordinates
+from .index_matrix import IndexMatrix
+from .regrid_operator import RegridOperator
 
 
 class CartesianGrid(object):
@@ -27,6 +35,25 @@ class CartesianGrid(object):
     coordinates of the grid boxes as well as the coordinates of the 
     grid corners can be calculated.
     
+    Distance, mask and beam height fields are cached: They are 
+    calculated only once for each grid, site and elevation and then 
+    returned as read-only arrays. The cache is shared by all grid 
+    objects (e.g. all plot objects of the same grid) and keeps the 
+    field_cache_size fields used last.
+    
+    Interpolated reflectivity and the fields of the grid are floating 
+    point arrays of the data type grid_par['dtype'] (default 
+    'float64'). With 'float32', memory and memory bandwidth are halved.
+    Accuracy of the interpolated reflectivity with 'float32': Each grid
+    box value is a weighted mean of n input values, so its rounding 
+    error is at most about n*6e-8 times the largest absolute input 
+    value, e.g. 0.006 dBZ for 1000 input values of up to 100 dBZ. 
+    Distances and beam heights have a relative error of about 1e-7 
+    (1 cm at 100 km). Overlapping areas of weight tables are always 
+    calculated in double precision, but single precision coordinates of
+    the radar data (see :any:`Radar`) change them slightly, which 
+    changes interpolated values by about 0.001 dBZ.
+    
     Note:
         This class should only be used for a cartesian grid near the 
         equator, where the skewness of the longitudes is negligible, so
@@ -45,9 +72,17 @@ class CartesianGrid(object):
             corners as attributes.
         coords (:any:`GridCoordinates`): Object with coordinates of grid 
             boxes as attributes.
+        dtype (:any:`numpy.dtype`): Floating point data type of 
+            interpolated data and fields.
+        field_cache_size (:any:`int`): Maximum number of cached fields 
+            (class attribute).
             
     '''
     
+    # Cached fields of all grids, used last at the end
+    field_cache_size = 8
+    _fields = OrderedDict()
+    
     def __init__(self, grid_par):
         '''Initialization of object
         
@@ -66,70 +101,372 @@ class CartesianGrid(object):
         self.res_deg = self.meter2deg(grid_par['res'])
         self.lon_shape = grid_par['lon_shape']
         self.lat_shape = grid_par['lat_shape']
+        
+        # Floating point data type of interpolated data and fields
+        self.dtype = np.dtype(grid_par.get('dtype', 'float64'))
          
         # Get and save lon/lat coordinates of grid corners
         self.corners = self.get_grid_corners()
         
         # Get grid boxes coordinates
         self.coords = self.get_coordinates()
+        
+        # Key of the grid for cached fields
+        self._grid_key = CoordCache.get_key(self.get_geometry())
+    
+    def _get_field(self, params, function):
+        '''Get cached field, calculate it if not cached yet
+        
+        Args:
+            params (tuple): Name and parameters of the field.
+            function (function): Function without arguments, which 
+                calculates the field.
+        
+        Returns:
+            (numpy.ndarray): Read-only field.
+        
+        '''
+        # Fields are cached for each grid and data type
+        key = (self._grid_key, self.dtype.str) + tuple(
+            round(float(par), 9) if not isinstance(par, str) else par
+            for par in params
+            )
+        
+        # Cached field (marked as used last)
+        fields = CartesianGrid._fields
+        if key in fields:
+            fields.move_to_end(key)
+            return fields[key]
+        
+        # Calculate field and protect it from changes
+        field = np.asarray(function())
+        field.flags.writeable = False
+        
+        # Cache field, drop field used least recently
+        fields[key] = field
+        while len(fields) > self.field_cache_size:
+            fields.popitem(last=False)
+        
+        # Return field
+        return field
        
-    def create_index_matrix(self, index_file, lon, lat):
-        '''Create index file
+    def build_index_matrix(self, box_ids, bin_ids, bin_shape, weights=None):
+        '''Build index matrix out of grid box numbers
         
-        Creates and saves the 'index matrix', which is an array with 
-        exactly the shape of the cartesian grid. For each grid box, it
-        is calculated which of the input array elements fall into this
-        grid box. The location of these elements in the input array 
-        (in form of indices) is then saved to the index matrix.
+        Sorts input elements by the number of the grid box they belong 
+        to and saves them in an :any:`IndexMatrix`.
         
         Args:
-            index_file (str): Name of the output '.dat' file.
+            box_ids (numpy.ndarray): Flat number of the grid box for 
+                each entry.
+            bin_ids (numpy.ndarray): Flat index in the input data array
+                for each entry.
+            bin_shape (tuple): Shape of the input data array.
+            weights (numpy.ndarray): Weight of each entry, or None.
+        
+        Returns:
+            (IndexMatrix): Index matrix of this grid.
+        
+        '''
+        # Smallest integer type, that can hold all indices and offsets
+        largest = max(int(np.prod(bin_shape)), box_ids.size)
+        if largest < np.iinfo(np.int32).max:
+            int_type = np.int32
+        else:
+            int_type = np.int64
+        
+        # Entries sorted by their grid box number
+        order = np.argsort(box_ids, kind='stable')
+        
+        # Number of entries per grid box and start of each box
+        counts = np.bincount(
+            box_ids, minlength=self.lat_shape*self.lon_shape
+            )
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        
+        # Create IndexMatrix object
+        index_matrix = IndexMatrix()
+        index_matrix.box_shape = (self.lat_shape, self.lon_shape)
+        index_matrix.bin_shape = tuple(bin_shape)
+        index_matrix.indices = np.asarray(bin_ids)[order].astype(int_type)
+        index_matrix.offsets = offsets.astype(int_type)
+        if weights is not None:
+            index_matrix.weights = np.asarray(weights)[order]
+        
+        # Return index matrix
+        return index_matrix
+    
+    def clip_polygons(self, polygons, axis, bound, keep_above):
+        '''Clip polygons at a straight line
+        
+        One step of the Sutherland-Hodgman algorithm, vectorized over 
+        many polygons: Clips each polygon at the line, where the 
+        coordinate 'axis' is equal to 'bound'. The clipped polygons are
+        padded by repeating their last corner, so that all have the same
+        number of corners. Completely removed polygons are set to zero.
+        
+        Args:
+            polygons (numpy.ndarray): Corners of polygons, with shape 
+                (polygons, corners, 2).
+            axis (int): 0 for a line of constant x, 1 for constant y.
+            bound (numpy.ndarray): Position of the line for each 
+                polygon.
+            keep_above (bool): If True, the part of the polygon with 
+                coordinates larger than 'bound' is kept, otherwise the 
+                part with smaller coordinates.
+        
+        Returns:
+            (numpy.ndarray): Corners of clipped polygons.
+            
+        '''
+        # Number of polygons and corners
+        poly_nr, corner_nr = polygons.shape[:2]
+        
+        # Corners on the kept side of the line
+        coord = polygons[:, :, axis]
+        bound = np.reshape(bound, (-1, 1))
+        if keep_above:
+            inside = coord >= bound
+        else:
+            inside = coord <= bound
+        
+        # Previous corner of each corner (start of edge)
+        prev = np.roll(polygons, 1, axis=1)
+        prev_inside = np.roll(inside, 1, axis=1)
+        
+        # Intersection of each edge with the line
+        prev_coord = prev[:, :, axis]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (bound - prev_coord)/(coord - prev_coord)
+            cross = prev + t[:, :, np.newaxis]*(polygons - prev)
+        
+        # Each edge adds its intersection (if crossing) and its end point 
+        # (if inside) to the clipped polygon
+        points = np.stack((cross, polygons), axis=2).reshape(
+            poly_nr, 2*corner_nr, 2
+            )
+        valid = np.stack(
+            (inside != prev_inside, inside), axis=2
+            ).reshape(poly_nr, 2*corner_nr)
+        
+        # Move valid points to the front, keeping their order
+        order = np.argsort(~valid, axis=1, kind='stable')
+        points = np.take_along_axis(points, order[:, :, np.newaxis], 1)
+        valid = np.take_along_axis(valid, order, 1)
+        
+        # Remove columns without any valid points
+        point_nr = valid.sum(axis=1)
+        points = points[:, :max(point_nr.max(initial=0), 1)]
+        valid = valid[:, :points.shape[1]]
+        
+        # Pad with last valid point, completely removed polygons are zero
+        last = points[np.arange(poly_nr), np.maximum(point_nr - 1, 0)]
+        points = np.where(valid[:, :, np.newaxis], points, last[:, np.newaxis])
+        points[point_nr == 0] = 0
+        
+        # Return clipped polygons
+        return points
+    
+    def create_index_matrix(self, index_dir, lon, lat, meta=None):
+        '''Create index matrix
+        
+        Creates and saves the 'index matrix' (see :any:`IndexMatrix`). 
+        For each grid box of the cartesian grid, it is calculated which 
+        of the input array elements fall into this grid box. The 
+        location of these elements in the input array (in form of flat 
+        indices) is then saved to the index matrix.
+        
+        All input elements are binned in a single pass: The number of
+        the grid box is calculated for each element, then the elements
+        are sorted by their box number. Thus, the run time scales 
+        linearly with the number of input elements instead of with the
+        product of grid boxes and input elements.
+        
+        Args:
+            index_dir (str): Name of the output index matrix directory.
             lon (numpy.ndarray): Longitudes of input data.
             lat (numpy.ndarray): Latitudes of input data.
+            meta (dict): Parameters, the index matrix is created for. 
+                Saved together with the index matrix (see 
+                :any:`IndexMatrix.save`).
         
         '''
-        # This can take a while (depending on resolution and grid size)
+        # Tell user, that a new index matrix will be created
         print('No Index-Matrix present yet. Calculating the matrix...')
        
-        # Calculate to input coords corresponding indices of grid boxes
-        lon_index = np.floor(
-            (lon - self.corners.lon_start)/self.res_deg
-            )
-        lat_index = np.floor(
-            (lat - self.corners.lat_start)/self.res_deg
+        # Grid box of each input element
+        box_ids = self.get_box_ids(lon, lat)
+        
+        # Only elements inside of the grid are saved
+        inside = np.flatnonzero(box_ids >= 0)
+        
+        # Create index matrix and save it to disk
+        index_matrix = self.build_index_matrix(
+            box_ids[inside], inside, tuple(lon.shape)
             )
+        index_matrix.save(index_dir, meta)
+    
+    def create_index_matrix_parallel(
+            self, index_dir, lon, lat, method='index', processes=None, 
+            meta=None
+            ):
+        '''Create index matrix or weight table using several processes
+        
+        Creates the same index matrix as 
+        :any:`CartesianGrid.create_index_matrix` (or, for method 
+        'overlap', the same weight table as 
+        :any:`CartesianGrid.create_weight_table`), but splits the input 
+        data into bands of azimuth lines. The pieces of all bands are 
+        calculated in parallel by a pool of processes and then merged 
+        into a single index matrix.
+        
+        Args:
+            index_dir (str): Name of the output index matrix directory.
+            lon (numpy.ndarray): Longitudes of input data (or of the 
+                corners of the polar grid boxes for method 'overlap').
+            lat (numpy.ndarray): Latitudes of input data (or of the 
+                corners of the polar grid boxes for method 'overlap').
+            method (str): 'index' for an index matrix, 'overlap' for a 
+                weight table.
+            processes (int): Number of processes. Defaults to the number
+                of CPUs.
+            meta (dict): Parameters, the index matrix is created for. 
+                Saved together with the index matrix (see 
+                :any:`IndexMatrix.save`).
+        
+        Raises:
+            ValueError: If the method is unknown.
         
-        # Create an array with shape of the cart grid (to save locations)
-        a_index = np.empty(
-            (self.lat_shape, self.lon_shape), dtype=np.object_
+        '''
+        # Check method
+        if method not in ('index', 'overlap'):
+            raise ValueError('unknown interpolation method ' + str(method))
+        
+        # Tell user, that a new index matrix will be created
+        if method == 'overlap':
+            print('No Weight-Table present yet. Calculating the table...')
+        else:
+            print('No Index-Matrix present yet. Calculating the matrix...')
+        
+        # Shape of input data (corners have one element more)
+        corner = 1 if method == 'overlap' else 0
+        bin_shape = (lon.shape[0] - corner, lon.shape[1] - corner)
+        
+        # Split azimuth lines into bands, several bands per process
+        processes = processes or os.cpu_count() or 1
+        band_nr = min(4*processes, bin_shape[0])
+        bounds = np.linspace(0, bin_shape[0], band_nr + 1).astype(int)
+        
+        # Calculate pieces of index matrix in parallel
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = []
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                band_lon = np.array(lon[start:end + corner])
+                band_lat = np.array(lat[start:end + corner])
+                if method == 'overlap':
+                    futures.append(executor.submit(
+                        self.get_overlaps, band_lon, band_lat
+                        ))
+                else:
+                    futures.append(executor.submit(
+                        self.get_box_ids, band_lon, band_lat
+                        ))
+            
+            # Collect pieces, with indices referring to the whole input
+            l_box = []
+            l_bin = []
+            l_area = []
+            for start, future in zip(bounds[:-1], futures):
+                offset = start*bin_shape[1]
+                if method == 'overlap':
+                    box_ids, bin_ids, areas = future.result()
+                    l_area.append(areas)
+                else:
+                    box_ids = future.result()
+                    bin_ids = np.flatnonzero(box_ids >= 0)
+                    box_ids = box_ids[bin_ids]
+                l_box.append(box_ids)
+                l_bin.append(bin_ids + offset)
+        
+        # Merge pieces and save index matrix to disk
+        index_matrix = self.build_index_matrix(
+            np.concatenate(l_box), np.concatenate(l_bin), bin_shape, 
+            np.concatenate(l_area) if l_area else None
             )
-       
-        # Save indices of input array elements, falling into the boxes  
-        for line_nr in range(self.lat_shape):
-             for row_nr in range(self.lon_shape):
-                
-                # Get indices of input array elements, lying in this box
-                indices = np.where(np.logical_and(
-                    lon_index == row_nr, lat_index == line_nr)
-                    )
-                
-                # Save indices to index matrix
-                a_index[line_nr][row_nr] = indices
+        index_matrix.save(index_dir, meta)
     
-        # Save index matrix to .dat-file
-        a_index.dump(index_file)
+    def create_weight_table(self, index_dir, lon, lat, meta=None):
+        '''Create weight table of exact overlap areas
+        
+        Creates and saves an index matrix with weights (see 
+        :any:`IndexMatrix`), the 'weight table'. For each polar grid box
+        of the input data and each grid box of the cartesian grid, the 
+        area of their overlap is calculated. Interpolating data with 
+        the weight table (see :any:`CartesianGrid.data2grid`) averages 
+        all polar grid boxes overlapping a cartesian grid box, weighted 
+        by the overlapping area. In contrast to the index matrix, no 
+        artificially increased azimuth resolution is needed to avoid 
+        empty grid boxes.
+        
+        The polar grid boxes are approximated as quadrilaterals through
+        their 4 corners, i.e. the arcs of constant range are taken as 
+        straight lines. Each quadrilateral is clipped against each 
+        cartesian grid box, it could overlap with (Sutherland-Hodgman 
+        algorithm, vectorized over all polar grid boxes), and the area 
+        of the clipped polygon is calculated with the shoelace formula.
+        
+        Args:
+            index_dir (str): Name of the output weight table directory.
+            lon (numpy.ndarray): Longitudes of the corners of the polar 
+                grid boxes (see :any:`Radar.get_corner_coords`), with 
+                one element more than there are grid boxes in each 
+                dimension.
+            lat (numpy.ndarray): Latitudes of the corners of the polar 
+                grid boxes.
+            meta (dict): Parameters, the weight table is created for. 
+                Saved together with the weight table (see 
+                :any:`IndexMatrix.save`).
+        
+        '''
+        # Tell user, that a new weight table will be created
+        print('No Weight-Table present yet. Calculating the table...')
+        
+        # Overlapping areas of polar and cartesian grid boxes
+        box_ids, bin_ids, areas = self.get_overlaps(lon, lat)
+        bin_shape = (lon.shape[0] - 1, lon.shape[1] - 1)
+        
+        # Create weight table and save it to disk
+        index_matrix = self.build_index_matrix(
+            box_ids, bin_ids, bin_shape, areas
+            )
+        index_matrix.save(index_dir, meta)
    
-    def data2grid(self, index_file, refl_data):
+    def data2grid(
+            self, index_dir, refl_data, res_fac=1, gain=1.0, offset=0.0
+            ):
         '''Interpolate radar data to cartesian grid
         
         Interpolates radar data to the cartesian grid, by averaging all
-        data points falling into the same grid box.
+        data points falling into the same grid box. All grid box means 
+        are calculated at once with a weighted :any:`numpy.bincount`. 
+        Grid boxes without any data points are set to NaN. If a weight 
+        table (see :any:`CartesianGrid.create_weight_table`) is given 
+        instead of an index matrix, the data points are weighted by 
+        their overlapping area. Raw counts can be interpolated directly, 
+        gain and offset are applied to the averages then (see 
+        :any:`RadarData.get_refl_raw`).
         
         Args:
-            index_file (str): Name of the index file. For each grid box,
-                this file contains the indices in the input data array
-                of the data points falling into this grid box. 
+            index_dir (str): Name of the index matrix (or weight 
+                table) directory. For each grid box, the index matrix 
+                contains the indices in the input data array of the 
+                data points falling into this grid box. 
             refl_data (numpy.ndarray): Input reflectivity data.
+            res_fac (int): Factor, by which the azimuth resolution was 
+                increased, when creating the index matrix. The input 
+                data is expected in original resolution.
+            gain (float): Factor, the averaged data is multiplied with.
+            offset (float): Offset, which is added to the averaged data.
             
         Returns:
             (numpy.ndarray): To cartesian grid interpolated reflectivity
@@ -137,20 +474,47 @@ class CartesianGrid(object):
                 
         '''
         # Load index matrix
-        a_index = np.load(index_file)
-
-        # Array with shape of cart. grid for saving interpolated data
-        refl = np.empty((self.lat_shape, self.lon_shape))
-
-        # Loop through index matrix to interpolate data
-        for line_nr in range(self.lat_shape):
-            for row_nr in range(self.lon_shape):
-                
-                # Get values of radar data array
-                values = refl_data[a_index[line_nr][row_nr]]
-                
-                # Save mean reflectivity to refl-array
-                refl[line_nr][row_nr] = np.mean(values)
+        index_matrix = self.load_index_matrix(
+            index_dir, refl_data.shape, res_fac
+            )
+        
+        # Number of grid boxes
+        box_nr = self.lat_shape*self.lon_shape
+        
+        # Values of all input elements, which fall into a grid box
+        values = np.ravel(refl_data)[index_matrix.indices]
+        
+        # Grid box of each of these values
+        box_ids = index_matrix.get_box_ids()
+        
+        # Masked values are not taken into account
+        if np.ma.isMaskedArray(values):
+            valid = ~np.ma.getmaskarray(values)
+            values = np.ma.filled(values, 0)
+        else:
+            valid = None
+        
+        # Weighted index matrix: Each value has its own weight
+        if index_matrix.weights is not None:
+            weights = np.asarray(index_matrix.weights)
+            values = values*weights
+            valid = weights if valid is None else valid*weights
+        
+        # Sum and number of values per grid box (in one single pass)
+        sums = np.bincount(box_ids, weights=values, minlength=box_nr)
+        counts = np.bincount(box_ids, weights=valid, minlength=box_nr)
+        
+        # Mean reflectivity per grid box, empty grid boxes are NaN
+        refl = np.full(box_nr, np.nan, dtype=self.dtype)
+        filled = counts > 0
+        refl[filled] = sums[filled]/counts[filled]
+        
+        # Decode averaged raw counts
+        if gain != 1.0 or offset != 0.0:
+            refl = refl*self.dtype.type(gain) + self.dtype.type(offset)
+        
+        # Reshape to shape of cartesian grid
+        refl = refl.reshape(self.lat_shape, self.lon_shape)
 
         # Return interpolated reflectivity
         return refl
@@ -180,7 +544,8 @@ class CartesianGrid(object):
         '''Calculate height of a radar beam 
         
         Calculates for each grid box the beam height above the ground 
-        for a radar at a given location. 
+        for a radar at a given location. The heights are cached (see 
+        :any:`CartesianGrid`).
 
         Args:
             lon_site (float): Longitude coordinate of the radar site.
@@ -189,18 +554,61 @@ class CartesianGrid(object):
         
         Returns:
             (numpy.ndarray): Heights of radar beam above ground in 
-            meters.
+            meters (read-only).
                 
         '''
-        # Get distance of grid box to radar site 
-        a_dist = self.get_distance(lon_site, lat_site)
+        # Elevation as a single number
+        elevation = float(np.mean(elevation))
+        
+        # Height of radar beam at each grid box
+        def beam_heights():
+            a_dist = self.get_distance(lon_site, lat_site)
+            return wradlib.georef.beam_height_n(
+                a_dist, elevation
+                ).astype(self.dtype)
+        
+        # Return (cached) beam heights array
+        return self._get_field(
+            ('beam_height', lon_site, lat_site, elevation), beam_heights
+            )
+
+    def get_box_ids(self, lon, lat):
+        '''Calculate grid box of input elements
         
-        # Get height of radar beam at each grid box
-        beam_heights = wradlib.georef.beam_height_n(a_dist, elevation)
+        Args:
+            lon (numpy.ndarray): Longitudes of input data.
+            lat (numpy.ndarray): Latitudes of input data.
         
-        # Return the beam heights array
-        return beam_heights
-
+        Returns:
+            (numpy.ndarray): Flat number of the grid box, each input 
+            element falls into (flattened like the input), -1 for 
+            elements outside of the grid.
+        
+        '''
+        # Calculate to input coords corresponding indices of grid boxes
+        # (in double precision, so that box numbers of large grids are 
+        # exact for single precision input)
+        lon_index = np.floor(
+            (lon - self.corners.lon_start)/self.res_deg
+            ).astype(np.float64)
+        lat_index = np.floor(
+            (lat - self.corners.lat_start)/self.res_deg
+            ).astype(np.float64)
+        
+        # Flattened number of the grid box, each input element falls into
+        box_ids = lat_index*self.lon_shape + lon_index
+        
+        # Elements outside of the cartesian grid don't belong to any box
+        outside = np.logical_or.reduce((
+            np.isnan(box_ids), lon_index < 0, lat_index < 0,
+            lon_index >= self.lon_shape, lat_index >= self.lat_shape
+            ))
+        box_ids[outside] = -1
+        box_ids = box_ids.astype(np.int64).ravel()
+        
+        # Return grid box numbers
+        return box_ids
+    
     def get_coordinates(self):
         '''Get array of coordinates for all grid boxes
         
@@ -230,7 +638,8 @@ class CartesianGrid(object):
         '''Get distance of each grid box to input location 
         
         Calculates the distance (in meters) between each grid box of the 
-        cartesian grid and the input location.
+        cartesian grid and the input location. The distances are cached
+        (see :any:`CartesianGrid`).
             
         Args:
             lon_site (float): Longitude coordinate of location, to which
@@ -240,26 +649,54 @@ class CartesianGrid(object):
                  
         Returns:
             (numpy.ndarray): Distance of each grid box to the input 
-            location.
+            location (read-only).
 
         '''
-        # Get numpy meshgrid
-        lon, lat = np.meshgrid(self.coords.lon, self.coords.lat)
-        
-        # Get difference in degrees for lon and lat direction
-        lon_dist = lon - lon_site
-        lat_dist = lat - lat_site
-        
-        # Convert difference in degrees to distance in m
-        lon_dist_m = self.deg2meter(lon_dist)
-        lat_dist_m = self.deg2meter(lat_dist)
-
-        # Calculate distance to radar site using pythagoras
-        a_dist = np.sqrt(lon_dist_m**2 + lat_dist_m**2)
+        # Distance of each grid box
+        def distance():
+            
+            # Distance in m in lon direction (row vector) and in lat 
+            # direction (column vector), no meshgrid needed
+            lon_dist_m = self.deg2meter(
+                self.coords.lon - lon_site
+                ).astype(self.dtype)
+            lat_dist_m = self.deg2meter(
+                self.coords.lat - lat_site
+                ).astype(self.dtype)
+            
+            # Calculate distance using pythagoras (broadcasted to the 
+            # shape of the grid)
+            return np.sqrt(
+                lon_dist_m[np.newaxis, :]**2 + lat_dist_m[:, np.newaxis]**2
+                )
        
-        # Return distance array
-        return a_dist
+        # Return (cached) distance array
+        return self._get_field(('distance', lon_site, lat_site), distance)
 
+    def get_geometry(self):
+        '''Get parameters, which define the cartesian grid
+        
+        Returns:
+            (dict): Location of the grid middle and of the grid corners,
+            resolution and shape of the grid.
+        
+        '''
+        # Collect grid parameters
+        geometry = {
+            'lon_site': float(self.lon_site),
+            'lat_site': float(self.lat_site),
+            'lon_start': float(self.corners.lon_start),
+            'lon_end': float(self.corners.lon_end),
+            'lat_start': float(self.corners.lat_start),
+            'lat_end': float(self.corners.lat_end),
+            'res_m': float(self.res_m),
+            'lon_shape': int(self.lon_shape),
+            'lat_shape': int(self.lat_shape),
+            }
+        
+        # Return grid parameters
+        return geometry
+    
     def get_grid_corners(self):
         '''Calculate coordinates of grid corners
         
@@ -292,7 +729,8 @@ class CartesianGrid(object):
         
         Creates a mask array with the same shape as the cartesian grid,
         for all grid boxes exceeding a specific (input) range to the 
-        middle of the grid.
+        middle of the grid. The mask is cached (see 
+        :any:`CartesianGrid`).
         
         Args:
             max_range (float): Maximum range, all grid boxes exceeding
@@ -301,24 +739,240 @@ class CartesianGrid(object):
         Returns:
             (numpy.ndarray): Boolean array with the same shape as 
             the cartesian grid, where "True" means masked, and 
-            "False" means not masked.
+            "False" means not masked (read-only).
                  
         '''
-        # Create empty array with shape of cartesian grid. 
-        a_mask = np.empty(
-            (self.lat_shape, self.lon_shape), dtype = bool
-            )
+        # Mask grid boxes exceeding the range to the middle of the grid
+        def mask():
+            dist = self.get_distance(self.lon_site, self.lat_site)
+            return dist > max_range
 
-        # Calculate the distance of grid boxes to middle of grid
-        dist = self.get_distance(self.lon_site, self.lat_site)
-        
-        # Create mask array
-        a_mask[dist <= max_range] = False
-        a_mask[dist > max_range] = True
+        # Return (cached) mask array
+        return self._get_field(('mask', max_range), mask)
 
-        # Return mask array
-        return a_mask
+    def get_overlaps(self, lon, lat):
+        '''Calculate overlapping areas of polar and cartesian grid boxes
+        
+        The polar grid boxes are given by their corners and approximated
+        as quadrilaterals (see :any:`CartesianGrid.create_weight_table`).
+        
+        Args:
+            lon (numpy.ndarray): Longitudes of the corners of the polar 
+                grid boxes, with one element more than there are grid 
+                boxes in each dimension.
+            lat (numpy.ndarray): Latitudes of the corners of the polar 
+                grid boxes.
+        
+        Returns:
+            (tuple): Flat number of the cartesian grid box, flat index 
+            of the polar grid box and area of the overlap (in units of 
+            cartesian grid box areas) for each overlapping pair.
+        
+        '''
+        # Corner coordinates in units of cartesian grid boxes (always in
+        # double precision, since areas are differences of products)
+        x = (np.asarray(lon, dtype=np.float64) - self.corners.lon_start)
+        x = x/self.res_deg
+        y = (np.asarray(lat, dtype=np.float64) - self.corners.lat_start)
+        y = y/self.res_deg
+        
+        # Polygon of each polar grid box, shape (boxes, 4 corners, x/y)
+        polygons = np.stack((
+            np.stack((x[:-1, :-1], y[:-1, :-1]), axis=-1),
+            np.stack((x[:-1, 1:], y[:-1, 1:]), axis=-1),
+            np.stack((x[1:, 1:], y[1:, 1:]), axis=-1),
+            np.stack((x[1:, :-1], y[1:, :-1]), axis=-1),
+            ), axis=-2).reshape(-1, 4, 2)
+        
+        # Bounding boxes of polygons
+        p_min = polygons.min(axis=1)
+        p_max = polygons.max(axis=1)
+        
+        # Only polygons (partially) inside of the grid are needed
+        inside = np.flatnonzero(
+            np.isfinite(p_min).all(axis=1) 
+            & (p_max[:, 0] > 0) & (p_min[:, 0] < self.lon_shape)
+            & (p_max[:, 1] > 0) & (p_min[:, 1] < self.lat_shape)
+            )
+        polygons = polygons[inside]
+        
+        # First and last cartesian grid box, each polygon may overlap
+        first = np.floor(np.maximum(p_min[inside], 0)).astype(np.int64)
+        last = np.floor(np.minimum(
+            p_max[inside], (self.lon_shape - 1, self.lat_shape - 1)
+            )).astype(np.int64)
+        span = last - first + 1
+        
+        # Lists of grid boxes, polar grid boxes and overlapping areas
+        l_box = []
+        l_bin = []
+        l_area = []
+        
+        # Loop through relative positions of cartesian grid boxes
+        for dy in range(span[:, 1].max(initial=0)):
+            for dx in range(span[:, 0].max(initial=0)):
+                
+                # Polygons, which may overlap with the box at this position
+                sel = np.flatnonzero((span[:, 0] > dx) & (span[:, 1] > dy))
+                col = first[sel, 0] + dx
+                line = first[sel, 1] + dy
+                
+                # Clip polygons against all 4 borders of the grid boxes
+                clipped = polygons[sel]
+                clipped = self.clip_polygons(clipped, 0, col, True)
+                clipped = self.clip_polygons(clipped, 0, col + 1, False)
+                clipped = self.clip_polygons(clipped, 1, line, True)
+                clipped = self.clip_polygons(clipped, 1, line + 1, False)
+                
+                # Area of clipped polygons (shoelace formula)
+                px = clipped[:, :, 0]
+                py = clipped[:, :, 1]
+                area = 0.5*np.abs(np.sum(
+                    px*np.roll(py, -1, axis=1) - np.roll(px, -1, axis=1)*py,
+                    axis=1
+                    ))
+                
+                # Save overlaps
+                overlap = area > 0
+                l_box.append(line[overlap]*self.lon_shape + col[overlap])
+                l_bin.append(inside[sel[overlap]])
+                l_area.append(area[overlap])
+        
+        # Return overlaps
+        return (
+            np.concatenate(l_box or [np.zeros(0, np.int64)]), 
+            np.concatenate(l_bin or [np.zeros(0, np.int64)]), 
+            np.concatenate(l_area or [np.zeros(0)])
+            )
+    
+    def get_regrid_operator(self, index_dir, bin_shape, res_fac=1):
+        '''Get sparse regridding operator
+        
+        Builds a :any:`RegridOperator` out of an index matrix. The 
+        operator can be reused for all scans of the same radar geometry 
+        and can regrid a whole stack of scans at once. It works in the 
+        data type of the grid.
+        
+        Args:
+            index_dir (str): Name of the index matrix directory.
+            bin_shape (tuple): Shape of a single input data array.
+            res_fac (int): Factor, by which the azimuth resolution was 
+                increased, when creating the index matrix. The input 
+                data is expected in original resolution.
+        
+        Returns:
+            (RegridOperator): Regridding operator of this grid.
+        
+        '''
+        # Load index matrix
+        index_matrix = self.load_index_matrix(index_dir, bin_shape, res_fac)
+        
+        # Return regridding operator
+        return RegridOperator(index_matrix, self.dtype)
+    
+    def load_index_matrix(self, index_dir, bin_shape, res_fac=1):
+        '''Load index matrix of this grid
+        
+        Memory-maps an index matrix, created by 
+        :any:`CartesianGrid.create_index_matrix`, and checks whether it
+        belongs to this grid and to input data of the given shape. If 
+        the index matrix was created for an artificially increased 
+        azimuth resolution, it is folded back to the original resolution
+        (see :any:`IndexMatrix.fold_azi_res`).
+        
+        Args:
+            index_dir (str): Name of the index matrix directory.
+            bin_shape (tuple): Shape of the input data array.
+            res_fac (int): Factor, by which the azimuth resolution was 
+                increased, when creating the index matrix.
+        
+        Returns:
+            (IndexMatrix): Loaded index matrix.
+        
+        Raises:
+            ValueError: If the index matrix was created for another grid
+                or for input data of another shape.
+        
+        '''
+        # Load (memory-mapped) index matrix
+        index_matrix = IndexMatrix()
+        index_matrix.load(index_dir)
+        
+        # Check, if the index matrix matches grid and input data
+        if index_matrix.box_shape != (self.lat_shape, self.lon_shape):
+            raise ValueError(
+                'index matrix ' + str(index_dir) + ' has grid shape '
+                + str(index_matrix.box_shape) + ', expected '
+                + str((self.lat_shape, self.lon_shape))
+                )
+        inc_shape = (bin_shape[0]*res_fac,) + tuple(bin_shape[1:])
+        if index_matrix.bin_shape != inc_shape:
+            raise ValueError(
+                'index matrix ' + str(index_dir) + ' has input shape '
+                + str(index_matrix.bin_shape) + ', expected '
+                + str(inc_shape)
+                )
+        
+        # Map indices to original azimuth resolution
+        if res_fac != 1:
+            index_matrix = index_matrix.fold_azi_res(res_fac)
+        
+        # Return index matrix
+        return index_matrix
 
+    def save_cube(self, out_file, refl_cube, times_start, times_end):
+        '''Save regridded time steps to a netCDF file
+        
+        Writes a cube of to this grid interpolated reflectivity data 
+        (time, lat, lon) together with the grid coordinates and the 
+        starting and ending times of the scans to a single 
+        `netCDF <https://www.unidata.ucar.edu/software/netcdf/>`_-file.
+        
+        Args:
+            out_file (str): Name of the output file.
+            refl_cube (numpy.ndarray): Interpolated reflectivity data of
+                shape (time, lat_shape, lon_shape).
+            times_start (list): Starting times (datetime) of the scans.
+            times_end (list): Ending times (datetime) of the scans.
+        
+        '''
+        # Times are saved as seconds since 1970
+        epoch = datetime(1970, 1, 1)
+        units = 'seconds since 1970-01-01 00:00:00'
+        
+        # Create file
+        with Dataset(out_file, mode='w') as nc:
+            
+            # Dimensions
+            nc.createDimension('time', refl_cube.shape[0])
+            nc.createDimension('lat', self.lat_shape)
+            nc.createDimension('lon', self.lon_shape)
+            
+            # Rotated pole coordinates of grid boxes
+            lat = nc.createVariable('lat', 'f8', ('lat',))
+            lat[:] = self.coords.lat
+            lon = nc.createVariable('lon', 'f8', ('lon',))
+            lon[:] = self.coords.lon
+            
+            # Starting and ending times of scans
+            for name, times in (
+                    ('time_start', times_start), ('time_end', times_end)
+                    ):
+                var = nc.createVariable(name, 'f8', ('time',))
+                var.units = units
+                var[:] = [(t - epoch).total_seconds() for t in times]
+            
+            # Interpolated reflectivity
+            refl = nc.createVariable(
+                'refl', 'f4', ('time', 'lat', 'lon'), zlib=True, 
+                fill_value=np.nan
+                )
+            refl.units = 'dBZ'
+            refl[:] = refl_cube
+            
+            # Grid resolution
+            nc.res_m = self.res_m
+    
     def meter2deg(self, distance):
         '''Convert distance to difference in lon/lat coordinates
         
@@ -0,0 +1,143 @@
+'''Class for caching coordinates of radar data on disk'''
+
+# Python modules
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+
+
+class CoordCache(object):
+    '''On-disk cache for lon/lat coordinates of radar data
+
+    Transforming the polar coordinates of radar data to lon/lat
+    coordinates (see :any:`Radar.polar_to_cartesian`) and further to
+    rotated pole coordinates is expensive, but depends only on the
+    geometry of the radar data (see :any:`Radar.get_geometry`). This
+    class saves the resulting coordinate arrays once and returns them
+    for all further scans of equal geometry.
+
+    Each entry is a directory, named after a hash of the parameters it
+    was created with (see :any:`CoordCache.get_key`), containing the
+    files 'lon.npy' and 'lat.npy' and, for information only, the
+    parameters in 'meta.json'. The arrays are memory-mapped on loading.
+
+    Attributes:
+        cache_dir (:any:`str`): Directory of the cache.
+
+    '''
+
+    def __init__(self, cache_dir):
+        '''Initialization of object
+
+        Args:
+            cache_dir (str): Directory of the cache. Is created, when
+                the first entry is saved.
+
+        '''
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def get_key(params):
+        '''Get hash key of parameters
+
+        Calculates a hash out of a canonical representation of the
+        parameters: Keys are sorted, numpy scalars are converted to
+        python numbers and floats are rounded to 9 decimal places, so
+        that tiny floating point differences don't change the key.
+
+        Args:
+            params (dict): Parameters, e.g. the geometry of the radar
+                data. Values must be numbers, strings, None or lists,
+                tuples and dicts of these.
+
+        Returns:
+            (str): Hexadecimal hash key.
+
+        '''
+        # Canonical representation of a single value
+        def canonical(value):
+            if isinstance(value, dict):
+                return {str(k): canonical(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple, np.ndarray)):
+                return [canonical(v) for v in value]
+            if isinstance(value, (bool, np.bool_)):
+                return bool(value)
+            if isinstance(value, (int, np.integer)):
+                return int(value)
+            if isinstance(value, (float, np.floating)):
+                return round(float(value), 9) + 0.0
+            return value
+
+        # Serialize parameters, with sorted keys
+        text = json.dumps(
+            canonical(params), sort_keys=True, separators=(',', ':')
+            )
+
+        # Return hash of serialized parameters
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def load(self, key, mmap=True):
+        '''Load coordinates from the cache
+
+        Args:
+            key (str): Hash key of the entry.
+            mmap (bool): If True, the arrays are memory-mapped instead
+                of being read into memory.
+
+        Returns:
+            (tuple): Longitude and latitude arrays, or None, if there
+            is no entry for this key.
+
+        '''
+        # Directory of the entry
+        entry_dir = os.path.join(self.cache_dir, key)
+        if not os.path.isdir(entry_dir):
+            return None
+
+        # Memory-map arrays, if wished
+        mmap_mode = 'r' if mmap else None
+
+        # Load coordinates
+        lon = np.load(os.path.join(entry_dir, 'lon.npy'), mmap_mode=mmap_mode)
+        lat = np.load(os.path.join(entry_dir, 'lat.npy'), mmap_mode=mmap_mode)
+
+        # Return coordinates
+        return lon, lat
+
+    def save(self, key, lon, lat, params=None):
+        '''Save coordinates to the cache
+
+        The arrays are written to a temporary directory first, which is
+        then renamed. Thus, an incomplete entry is never seen under its
+        final name.
+
+        Args:
+            key (str): Hash key of the entry.
+            lon (numpy.ndarray): Longitude coordinates.
+            lat (numpy.ndarray): Latitude coordinates.
+            params (dict): Parameters, the key was calculated from.
+                Saved for information only.
+
+        '''
+        # Create cache directory, if not present yet
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Temporary directory
+        entry_dir = os.path.join(self.cache_dir, key)
+        tmp_dir = entry_dir + '.tmp' + str(os.getpid())
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        # Save arrays and parameters
+        np.save(os.path.join(tmp_dir, 'lon.npy'), np.asarray(lon))
+        np.save(os.path.join(tmp_dir, 'lat.npy'), np.asarray(lat))
+        if params is not None:
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as meta:
+                json.dump(params, meta, indent=4, sort_keys=True)
+
+        # Move to final name (another process may have been faster)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir)
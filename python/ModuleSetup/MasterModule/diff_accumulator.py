@@ -0,0 +1,217 @@
+'''Class for long-term statistics of reflectivity differences'''
+
+# Python modules
+import numpy as np
+
+
+class DiffAccumulator(object):
+    '''Running statistics of reflectivity differences per grid box
+
+    Consumes difference fields on a cartesian grid (e.g. refl_diff of
+    difference_batch.py) one at a time or as a stack, without keeping
+    them. For each grid box, the number of valid (not NaN) differences,
+    their mean and the sum of squared deviations from the mean are
+    updated with Welford's algorithm, which is numerically stable for
+    millions of fields. Additionally, a histogram of the differences is
+    counted for each grid box. Memory only depends on the size of the
+    grid and the number of histogram bins.
+
+    Accumulators of parallel workers are combined with
+    :any:`DiffAccumulator.merge` (Chan's parallel algorithm), the state
+    is saved to and loaded from an '.npz'-file (see
+    :any:`DiffAccumulator.save`, :any:`DiffAccumulator.load`), so long
+    periods can be processed incrementally.
+
+    Attributes:
+        shape (:any:`tuple`): Shape of the cartesian grid.
+        bins (:any:`numpy.ndarray`): Edges of the histogram bins in dBZ.
+            Differences outside of the edges are counted in the first
+            or last bin.
+        count (:any:`numpy.ndarray`): Number of valid differences of
+            each grid box.
+        mean (:any:`numpy.ndarray`): Mean difference of each grid box
+            (NaN without valid differences).
+        m2 (:any:`numpy.ndarray`): Sum of squared deviations from the
+            mean of each grid box.
+        hist (:any:`numpy.ndarray`): Histogram of each grid box, with
+            shape shape + (number of bins,).
+
+    '''
+
+    def __init__(self, shape, bins=None):
+        '''Initialization of object
+
+        Args:
+            shape (tuple): Shape of the cartesian grid.
+            bins (numpy.ndarray): Edges of the histogram bins in dBZ.
+                Defaults to 5 dBZ bins from -70 to 70 dBZ.
+
+        '''
+        self.shape = tuple(shape)
+        if bins is None:
+            bins = np.linspace(-70, 70, 29)
+        self.bins = np.asarray(bins, dtype=np.float64)
+
+        # Empty statistics
+        self.count = np.zeros(self.shape, dtype=np.int64)
+        self.mean = np.full(self.shape, np.nan)
+        self.m2 = np.zeros(self.shape)
+        self.hist = np.zeros(
+            self.shape + (self.bins.size - 1,), dtype=np.int64
+            )
+
+    def add(self, refl_diff):
+        '''Add difference fields
+
+        NaN values (e.g. masked or empty grid boxes) are not counted.
+
+        Args:
+            refl_diff (numpy.ndarray): Reflectivity differences, either
+                one field with the shape of the grid or a stack of
+                fields with time as first dimension.
+
+        Raises:
+            ValueError: If the shape of the fields doesn't fit.
+
+        '''
+        # Stack of fields
+        refl_diff = np.asarray(refl_diff, dtype=np.float64)
+        if refl_diff.shape == self.shape:
+            refl_diff = refl_diff[np.newaxis]
+        if refl_diff.shape[1:] != self.shape:
+            raise ValueError(
+                'shape ' + str(refl_diff.shape) + ' does not fit grid '
+                + str(self.shape)
+                )
+
+        # Count, mean and squared deviations of the stack
+        valid = np.isfinite(refl_diff)
+        count = valid.sum(axis=0)
+        values = np.where(valid, refl_diff, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = values.sum(axis=0)/count
+        m2 = np.sum(
+            np.where(valid, (refl_diff - mean)**2, 0), axis=0
+            )
+
+        # Histogram of the stack (bin of each value, counted for all
+        # grid boxes at once)
+        bin_nr = self.bins.size - 1
+        bin_ids = np.clip(
+            np.searchsorted(self.bins, refl_diff[valid], side='right') - 1,
+            0, bin_nr - 1
+            )
+        box_ids = np.broadcast_to(
+            np.arange(count.size).reshape(self.shape), refl_diff.shape
+            )[valid]
+        hist = np.bincount(
+            box_ids*bin_nr + bin_ids, minlength=count.size*bin_nr
+            ).reshape(self.hist.shape)
+
+        # Combine with previous statistics
+        self.combine(count, mean, m2, hist)
+
+    def combine(self, count, mean, m2, hist):
+        '''Combine statistics with the accumulated statistics
+
+        Uses Chan's parallel algorithm for mean and squared deviations.
+
+        Args:
+            count (numpy.ndarray): Number of values of each grid box.
+            mean (numpy.ndarray): Mean of each grid box.
+            m2 (numpy.ndarray): Sum of squared deviations of each grid
+                box.
+            hist (numpy.ndarray): Histogram of each grid box.
+
+        '''
+        # Total number of values, grid boxes with new values
+        total = self.count + count
+        new = count > 0
+
+        # Mean and squared deviations of grid boxes with new values
+        delta = np.where(new, mean - np.nan_to_num(self.mean), 0)
+        ratio = np.zeros(self.shape)
+        ratio[new] = count[new]/total[new]
+        self.mean = np.where(
+            new, np.nan_to_num(self.mean) + delta*ratio, self.mean
+            )
+        self.m2 = np.where(
+            new, self.m2 + m2 + delta**2*self.count*ratio, self.m2
+            )
+
+        # Number of values and histogram
+        self.count = total
+        self.hist += hist
+
+    @classmethod
+    def load(cls, file_name):
+        '''Load accumulated statistics
+
+        Args:
+            file_name (str): Name of the '.npz'-file (see
+                :any:`DiffAccumulator.save`).
+
+        Returns:
+            (DiffAccumulator): Accumulator with the loaded statistics.
+
+        '''
+        with np.load(file_name) as state:
+            accumulator = cls(state['count'].shape, state['bins'])
+            accumulator.count = state['count']
+            accumulator.mean = state['mean']
+            accumulator.m2 = state['m2']
+            accumulator.hist = state['hist']
+        return accumulator
+
+    def merge(self, other):
+        '''Merge statistics of another accumulator into this one
+
+        Args:
+            other (DiffAccumulator): Accumulator, e.g. of another
+                worker process.
+
+        Raises:
+            ValueError: If grid or histogram bins are different.
+
+        '''
+        # Check, if statistics are comparable
+        if (
+                other.shape != self.shape
+                or not np.array_equal(other.bins, self.bins)
+                ):
+            raise ValueError('grid or histogram bins are different')
+
+        # Combine statistics
+        self.combine(other.count, other.mean, other.m2, other.hist)
+
+    def save(self, file_name):
+        '''Save accumulated statistics to an '.npz'-file
+
+        Besides the state of the accumulator, the variance is saved for
+        convenience.
+
+        Args:
+            file_name (str): Name of the '.npz'-file.
+
+        '''
+        np.savez_compressed(
+            file_name, count=self.count, mean=self.mean, m2=self.m2,
+            hist=self.hist, bins=self.bins, variance=self.variance
+            )
+
+    @property
+    def std(self):
+        '''Standard deviation of the differences of each grid box'''
+        return np.sqrt(self.variance)
+
+    @property
+    def variance(self):
+        '''Variance of the differences of each grid box
+
+        Sample variance, NaN for grid boxes with less than 2 values.
+
+        '''
+        variance = np.full(self.shape, np.nan)
+        many = self.count > 1
+        variance[many] = self.m2[many]/(self.count[many] - 1)
+        return variance
@@ -3,11 +3,13 @@
 
 '''
 # Python modules
+import re
 import h5py
 import numpy as np
 from datetime import datetime
 
 # MasterModule
+from .lazy_field import LazyField
 from .main_radar import Radar
 from .radar_data import RadarData
 
@@ -29,6 +31,12 @@ class DwdRadar(Radar):
             DWD radar.
         data (:any:`RadarData`): Used to save all kind of general radar 
             data and meta data.
+        sweeps (:any:`list`): :any:`RadarData` of all sweeps 
+            (elevations) of a volume file, ordered like the datasets in
+            the file (see :any:`DwdRadar.read_volume`). Only a single 
+            sweep after :any:`DwdRadar.read_file`.
+        h5py_file (:any:`h5py.File`): Volume file, kept open for lazy 
+            reading of the sweeps, or None (see :any:`DwdRadar.close`).
             
     '''
     
@@ -52,90 +60,204 @@ class DwdRadar(Radar):
         self.name = 'DWD'
         self.offset = 0 # dwd radar has no offset         
         
-    def read_file(self, radar_par):
+        # No volume file open yet
+        self.sweeps = []
+        self.h5py_file = None
+        
+    def close(self):
+        '''Close volume file
+        
+        Closes the file kept open for lazy reading of a volume (see 
+        :any:`DwdRadar.read_volume`). Sweeps, which were not read in 
+        before, can't be accessed anymore afterwards.
+        
+        '''
+        if self.h5py_file is not None:
+            self.h5py_file.close()
+            self.h5py_file = None
+        
+    def read_file(self, radar_par, lazy=False):
         '''Read in data
         
         Reads dwd radar data and saves data to object. Only attributes 
         needed for my calculations are read in. If more information 
         about the file and the attributes is wished, check out the 
         `hdf5 <https://support.hdfgroup.org/HDF5/>`_-file with hdfview 
-        or hd5dump -H.
+        or hd5dump -H. Only the first sweep ('dataset1') is read in, 
+        use :any:`DwdRadar.read_volume` for all sweeps of a volume.
        
         Args:
             radar_par (dict): Radar parameters, e.g. name of file, 
                 minute to be plotted, processing step, factor to 
                 increase azimuth resolution, offset of radars azimuth 
                 angle.
+            lazy (bool): If True, the reflectivity is not read in 
+                before it is accessed (see :any:`LazyField`).
             
         '''
         # Open file
         with h5py.File(radar_par['file'], 'r') as h5py_file:
             
-            # Create RadarData-Object to save generalized radar data 
-            radar_data = RadarData()
+            # Read first sweep, lazily from the file name (file is 
+            # closed afterwards), times of the whole file
+            lazy_file = radar_par['file'] if lazy else None
+            radar_data = self.read_sweep(
+                h5py_file, 'dataset1', lazy_file, 'how'
+                )
             
-            # lon/lat coordinates of radar site
-            radar_data.lon_site = h5py_file.get('where').attrs['lon']                           
-            radar_data.lat_site = h5py_file.get('where').attrs['lat']
+            # Save RadarData-Object to DwdRadar-Object
+            self.data = radar_data
+            self.sweeps = [radar_data]
+
+    def read_sweep(self, h5py_file, dataset, lazy_file=None, how=None):
+        '''Read in one sweep of an open file
+        
+        Args:
+            h5py_file (h5py.File): Open data file.
+            dataset (str): Name of the dataset of the sweep, e.g. 
+                'dataset1'.
+            lazy_file (str or h5py.File): If given, the reflectivity is
+                not read in before it is accessed, but read from this 
+                file name or open file (see :any:`LazyField`). 
+                Otherwise, the raw counts are read in now.
+            how (str): Group with the start and end times of the sweep.
+                Defaults to the 'how' group of the dataset, if it has 
+                times, otherwise of the whole file.
+        
+        Returns:
+            (RadarData): Data of the sweep.
+        
+        '''
+        # Create RadarData-Object to save generalized radar data 
+        radar_data = RadarData()
+        
+        # Attributes of the sweep
+        where = h5py_file.get(dataset + '/where').attrs
+        what = h5py_file.get(dataset + '/data1/what').attrs
+        if how is None:
+            how = dataset + '/how'
+            if 'startepochs' not in h5py_file.get(how).attrs:
+                how = 'how'
+        
+        # lon/lat coordinates of radar site
+        radar_data.lon_site = h5py_file.get('where').attrs['lon']
+        radar_data.lat_site = h5py_file.get('where').attrs['lat']
+        
+        # Elevation of radar beam
+        radar_data.ele = where['elangle']
+        
+        # Number of azimuth rays(360 --> 1° steps)
+        radar_data.azi_rays = where['nrays']
             
-            # Elevation of radar beam
-            radar_data.ele = (
-                h5py_file.get('dataset1/where').attrs['elangle']
-                )
+        # Number of radius bins (600 --> 250m steps up to 150000m)
+        radar_data.r_bins = where['nbins']
             
-            # Number of azimuth rays(360 --> 1° steps)
-            radar_data.azi_rays = (
-                h5py_file.get('dataset1/where').attrs['nrays'] 
-                )
-                
-            # Number of radius bins (600 --> 250m steps up to 150000m)                           
-            radar_data.r_bins = (
-                h5py_file.get('dataset1/where').attrs['nbins']
-                )
-                
-            # Azimuth angle of first measurement
-            radar_data.azi_start = (
-                h5py_file.get('dataset1/where').attrs['startaz']
-                )
-                
-           # Range of first measurement                    
-            radar_data.r_start = (
-                h5py_file.get('dataset1/where').attrs['rstart']
-                )
-                
-            # Angle step between 2 measurements
-            radar_data.azi_steps = (
-                h5py_file.get('dataset1/how').attrs['angle_step']
-                )
-                
-            # Distance between 2 measurements on radius-axis (250m)                    
-            radar_data.r_steps = (
-                h5py_file.get('dataset1/where').attrs['rscale']                 
+        # Azimuth angle of first measurement
+        radar_data.azi_start = where['startaz']
+            
+        # Range of first measurement
+        radar_data.r_start = where['rstart']
+            
+        # Angle step between 2 measurements
+        radar_data.azi_steps = (
+            h5py_file.get(dataset + '/how').attrs['angle_step']
+            )
+            
+        # Distance between 2 measurements on radius-axis (250m)
+        radar_data.r_steps = where['rscale']
+            
+        # Factor and offset to correct the dwd refl to ordinary dbz 
+        # values
+        gain = what['gain']
+        offset = what['offset']
+            
+        # Uncorrected data 
+        var_name = dataset + '/data1/data'
+        refl = h5py_file.get(var_name)
+        
+        # Corrected data is not read in before accessed, if lazy. 
+        # Otherwise, the raw counts are kept and decoded on demand 
+        # (see RadarData.refl_raw). Decoded in data type of radar.
+        if lazy_file is not None:
+            radar_data.refl = LazyField(
+                lazy_file, var_name, 'hdf5', refl.shape, gain=gain, 
+                offset=offset, dtype=self.dtype
                 )
-                
-            # Factor to correct the dwd refl to ordinary dbz values      
-            gain = h5py_file.get('dataset1/data1/what').attrs['gain']
+        else:
+            radar_data.refl_raw = refl[()]
+            radar_data.gain = self.dtype.type(gain)
+            radar_data.offset = self.dtype.type(offset)
 
-            # Offset, to correct the dwd refl to ordinary dbz values 
-            offset = (
-                h5py_file.get('dataset1/data1/what').attrs['offset']   
-                )
-                
-            # Uncorrected data 
-            refl = h5py_file.get('dataset1/data1/data')
-            
-            # Corrected data
-            radar_data.refl = refl*gain + offset    
+        # Time at which scan started and ended
+        radar_data.time_start = datetime.utcfromtimestamp(
+            h5py_file.get(how).attrs['startepochs']
+            )
+        radar_data.time_end = datetime.utcfromtimestamp(
+            h5py_file.get(how).attrs['endepochs']
+            )
+        
+        # Return data of sweep
+        return radar_data
 
-            # Time at which scan started                         
-            time_start = h5py_file.get('how').attrs['startepochs']
-            radar_data.time_start = datetime.utcfromtimestamp(
-                time_start
-                ) 
+    def read_volume(self, radar_par, lazy=False):
+        '''Read in all sweeps of a volume file
+        
+        Opens the file only once and reads all sweeps ('dataset1', 
+        'dataset2', ...) to :any:`DwdRadar.sweeps`. All sweeps share the
+        site coordinates, times are those of each sweep. The first sweep
+        is saved to :any:`DwdRadar.data` as well. To process another 
+        sweep with the methods of :any:`Radar`, assign it to 
+        :any:`DwdRadar.data`.
+        
+        Args:
+            radar_par (dict): Radar parameters, e.g. name of file, 
+                factor to increase azimuth resolution.
+            lazy (bool): If True, the reflectivity of each sweep is not
+                read in before it is accessed. The file is kept open 
+                for this, until :any:`DwdRadar.close` is called. 
+                Otherwise, the raw counts of all sweeps are read in 
+                (see :any:`RadarData.refl_raw`) and the file is closed.
+        
+        Raises:
+            ValueError: If the file contains no sweeps.
+        
+        '''
+        # Close previous volume file
+        self.close()
+        
+        # Open file
+        h5py_file = h5py.File(radar_par['file'], 'r')
+        try:
             
-            # Time at which scan ended                       
-            time_end = h5py_file.get('how').attrs['endepochs']                        
-            radar_data.time_end = datetime.utcfromtimestamp(time_end)
+            # Datasets of all sweeps, in numerical order
+            datasets = sorted(
+                (
+                    name for name in h5py_file.keys() 
+                    if re.match(r'dataset\d+$', name)
+                    ), 
+                key=lambda name: int(name[len('dataset'):])
+                )
+            if not datasets:
+                raise ValueError('no sweeps in ' + radar_par['file'])
             
-            # Save RadarData-Object to DwdRadar-Object
-            self.data = radar_data
+            # Read all sweeps
+            lazy_file = h5py_file if lazy else None
+            sweeps = [
+                self.read_sweep(h5py_file, dataset, lazy_file)
+                for dataset in datasets
+                ]
+        
+        # Close file on errors
+        except Exception:
+            h5py_file.close()
+            raise
+        
+        # Keep file open only for lazy reading
+        if lazy:
+            self.h5py_file = h5py_file
+        else:
+            h5py_file.close()
+        
+        # Save sweeps, first sweep as data
+        self.sweeps = sweeps
+        self.data = sweeps[0]
@@ -1,8 +1,15 @@
 '''Class for general plots on cartesian grids'''
 
 # Python modules
+import os
+import shutil
+import subprocess
 import numpy as np
+import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.colors import LinearSegmentedColormap as lsc
+from matplotlib.figure import Figure
 
 # MasterModule
 from .cartesian_grid import CartesianGrid
@@ -13,9 +20,17 @@ class GridPlot(CartesianGrid):
     
     This class is a subclass of the :any:`CartesianGrid` class and the 
     super class of :any:`ReflPlot`, :any:`HeightsPlot` and 
-    :any:`ReflDiffPlot`. This class only saves all general attributes, 
+    :any:`ReflDiffPlot`. This class saves all general attributes,
     which are the same for all kind of plots on a cartesian grid.
     
+    Plots are either shown on the screen or, if an output file is given,
+    rendered to a file with the Agg backend, which doesn't need a
+    display. When rendering to files, the figure of the first plot is
+    kept: Ticks, labels, colorbar and mask are drawn only once, for all
+    further plots only the data of the figure is updated. Many plots
+    can be rendered by a pool of processes with
+    :any:`GridPlot.render_frames`.
+    
     Attributes:
         log_iso (:any:`bool`): If True --> isolines around rain areas will be 
             plotted.
@@ -31,6 +46,9 @@ class GridPlot(CartesianGrid):
         mask (:any:`numpy.ndarray`): Mask array.
         cm_mask (:any:`matplotlib.colors.LinearSegmentedColormap`): 
             Colormap for the mask.
+        frame (:any:`dict`): Figure, axes and artists of the figure,
+            that is reused for rendering to files. None, before the
+            first plot was rendered to a file.
         
     '''
 
@@ -87,6 +105,88 @@ class GridPlot(CartesianGrid):
         # Create colormap for the mask
         colors = ['#00000000', 'grey']
         self.cm_mask = lsc.from_list('cm_mask', colors)
+        
+        # No figure to be reused yet
+        self.frame = None
+    
+    def create_figure(self, figsize, out_file=None):
+        '''Create figure and axes of a plot
+        
+        Creates a pyplot figure, if the plot will be shown on the
+        screen, or a figure with an Agg canvas, if the plot will be
+        rendered to a file. The latter is independent of pyplot and its
+        backend.
+        
+        Args:
+            figsize (tuple): Size of the figure in inches.
+            out_file (str): Name of output file, or None for showing the
+                plot on the screen.
+        
+        Returns:
+            (tuple): Figure and axes.
+        
+        '''
+        # Show plot on the screen
+        if out_file is None:
+            return plt.subplots(figsize=figsize)
+        
+        # Render plot to a file
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        
+        # Return figure and axes
+        return fig, ax
+    
+    def draw_axes(self, ax, fontsize):
+        '''Draw ticks, tick labels, grid and axis labels
+        
+        Args:
+            ax (matplotlib.axes.Axes): Axes of the plot.
+            fontsize (int): Font size of axis labels. Tick labels are
+                2 points smaller.
+        
+        '''
+        # Set ticks
+        ax.set_xticks(self.lon_ticks)
+        ax.set_yticks(self.lat_ticks)
+       
+        # Set labels
+        ax.set_xticklabels(self.lon_label, fontsize=fontsize - 2)
+        ax.set_yticklabels(
+            self.lat_label, fontsize=fontsize - 2, rotation='horizontal'
+            )
+        
+        # Grid
+        ax.grid(color='k')
+        ax.set_axisbelow(False)
+
+        # Label x- and y-axis
+        ax.set_xlabel('r_lon', fontsize=fontsize)
+        ax.set_ylabel('r_lat', fontsize=fontsize)
+    
+    def finish_figure(self, fig, out_file=None):
+        '''Show plot or render it to a file
+        
+        Args:
+            fig (matplotlib.figure.Figure): Figure of the plot.
+            out_file (str): Name of output file, or None for showing the
+                plot on the screen.
+        
+        '''
+        # Show plot on the screen
+        if out_file is None:
+            fig.tight_layout()
+            plt.show()
+            return
+        
+        # Layout is only calculated for the first frame
+        if not self.frame.get('layout'):
+            fig.tight_layout()
+            self.frame['layout'] = True
+        
+        # Render to file
+        fig.savefig(out_file)
        
     def make_plot(self):
         '''Create a plot on a cartesian grid
@@ -101,3 +201,191 @@ class GridPlot(CartesianGrid):
         '''
         # Raise error
         raise NotImplementedError
+    
+    @classmethod
+    def render_chunk(cls, grid_par, plot_par, frames):
+        '''Render a sequence of plots to files, reusing one figure
+        
+        Args:
+            grid_par (dict): Grid parameters.
+            plot_par (dict): Plot parameters.
+            frames (list): Tuples (args, out_file), with the arguments
+                of make_plot and the name of the output file.
+        
+        Returns:
+            (list): Names of the output files.
+        
+        '''
+        # Create plot object of this class
+        grid_plot = cls(grid_par, plot_par)
+        
+        # Render all frames
+        for args, out_file in frames:
+            grid_plot.make_plot(*args, out_file=out_file)
+        
+        # Return names of output files
+        return [out_file for args, out_file in frames]
+    
+    @classmethod
+    def render_frames(cls, grid_par, plot_par, frames, processes=None):
+        '''Render many plots to files using a pool of processes
+        
+        The frames are split into one consecutive chunk per process.
+        Each process creates one plot object and renders its frames
+        with one reused figure (see :any:`GridPlot.render_chunk`).
+        
+        Args:
+            grid_par (dict): Grid parameters.
+            plot_par (dict): Plot parameters.
+            frames (list): Tuples (args, out_file), with the arguments
+                of make_plot and the name of the output file.
+            processes (int): Number of processes. Defaults to the number
+                of CPUs.
+        
+        Returns:
+            (list): Names of the output files.
+        
+        '''
+        # Split frames into one chunk per process
+        processes = processes or os.cpu_count() or 1
+        chunk_nr = max(min(processes, len(frames)), 1)
+        bounds = np.linspace(0, len(frames), chunk_nr + 1).astype(int)
+        
+        # Render chunks in parallel
+        with ProcessPoolExecutor(processes) as executor:
+            futures = [
+                executor.submit(
+                    cls.render_chunk, grid_par, plot_par,
+                    frames[start:end]
+                    )
+                for start, end in zip(bounds[:-1], bounds[1:])
+                ]
+            
+            # Collect names of output files
+            out_files = []
+            for future in futures:
+                out_files.extend(future.result())
+        
+        # Return names of output files
+        return out_files
+    
+    def write_animation(self, fig, update, frame_nr, out_file, fps=10):
+        '''Write an animation, drawing only changing artists
+        
+        The static parts of the figure behind the changing artists
+        (ticks, labels, colorbar) are rendered only once into a
+        background. For each frame, the background is restored and only
+        the artists returned by 'update' are drawn on top of it
+        (blitting), together with all artists in front of them (e.g.
+        mask and grid), in the order of their zorder. The frames are
+        written to a GIF file (using Pillow) or to an MP4 file (using
+        ffmpeg, which must be installed).
+        
+        Args:
+            fig (matplotlib.figure.Figure): Figure with an Agg canvas
+                (see :any:`GridPlot.create_figure`).
+            update (function): Function, which gets the number of a
+                frame, updates the figure to this frame and returns a
+                list of all changed artists. Artists, which only belong
+                to the previous frame, must be removed by it.
+            frame_nr (int): Number of frames.
+            out_file (str): Name of output file, ending with '.gif' or
+                '.mp4'.
+            fps (float): Frames per second.
+        
+        Raises:
+            ValueError: If the file ending is unknown.
+            RuntimeError: If ffmpeg is needed, but not installed.
+        
+        '''
+        # Check file type
+        file_type = os.path.splitext(out_file)[1].lower()
+        if file_type not in ('.gif', '.mp4'):
+            raise ValueError('unknown animation file type ' + file_type)
+        if file_type == '.mp4' and shutil.which('ffmpeg') is None:
+            raise RuntimeError('ffmpeg is needed for writing mp4 files')
+        
+        # Changing artists and all artists in front of them (e.g. mask,
+        # grid) are not part of the background
+        changing = update(0)
+        overlays = []
+        for ax in {artist.axes for artist in changing} - {None}:
+            zorder = min(a.get_zorder() for a in changing if a.axes is ax)
+            overlays.extend(
+                child for child in ax.get_children()
+                if child is not ax.patch and child.get_visible()
+                and child.get_zorder() > zorder and child not in changing
+                )
+        for artist in changing + overlays:
+            artist.set_animated(True)
+        
+        # Render background once
+        canvas = fig.canvas
+        canvas.draw()
+        background = canvas.copy_from_bbox(fig.bbox)
+        width, height = canvas.get_width_height()
+        
+        # Start ffmpeg, reading raw frames from a pipe
+        if file_type == '.mp4':
+            ffmpeg = subprocess.Popen(
+                [
+                    'ffmpeg', '-y', '-loglevel', 'error',
+                    '-f', 'rawvideo', '-pix_fmt', 'rgba',
+                    '-s', str(width) + 'x' + str(height),
+                    '-r', str(fps), '-i', '-',
+                    '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                    '-vcodec', 'libx264', '-pix_fmt', 'yuv420p', out_file
+                    ],
+                stdin=subprocess.PIPE
+                )
+        else:
+            images = []
+        
+        # Draw frames
+        for i in range(frame_nr):
+            
+            # Restore background, draw changing artists and artists in
+            # front of them in the order of their zorder
+            canvas.restore_region(background)
+            changing = update(i)
+            for artist in sorted(
+                    changing + [a for a in overlays if a not in changing],
+                    key=lambda artist: artist.get_zorder()
+                    ):
+                artist.set_animated(True)
+                fig.draw_artist(artist)
+            
+            # Pixels of the frame
+            frame = np.asarray(canvas.buffer_rgba())
+            
+            # Save frame
+            if file_type == '.mp4':
+                ffmpeg.stdin.write(frame.tobytes())
+            else:
+                images.append(frame[:, :, :3].copy())
+        
+        # Finish MP4 file
+        if file_type == '.mp4':
+            ffmpeg.stdin.close()
+            ffmpeg.wait()
+            return
+        
+        # Common palette of up to 8 evenly spaced frames (Pillow is only
+        # needed here)
+        from PIL import Image
+        step = max(1, len(images) // 8)
+        palette = Image.fromarray(
+            np.concatenate(images[::step], axis=0)
+            ).quantize(255, dither=0)
+
+        # Map frames to common palette (much faster than a palette for
+        # each frame) and write GIF file (without Pillow's search for
+        # changed regions of each frame, which is slow)
+        images = [
+            Image.fromarray(image).quantize(palette=palette, dither=0)
+            for image in images
+            ]
+        images[0].save(
+            out_file, save_all=True, append_images=images[1:],
+            duration=int(1000/fps), loop=0, optimize=False
+            )
@@ -1,7 +1,6 @@
 '''Class for plots of heights on cartesian grids'''
 
 # Python modules
-import matplotlib.pyplot as plt
 import numpy.ma as ma
 
 # MasterModule
@@ -40,58 +39,84 @@ class HeightsPlot(GridPlot):
         # Get isolines to be plotted
         self.height_iso = plot_par['height_iso']
        
-    def make_plot(self, heights, title):
+    def make_plot(self, heights, title, out_file=None):
         '''Make plot of beam heights
         
-        Plots heights of beam as isolines on a cartesian grid.
+        Plots heights of beam as isolines on a cartesian grid. If an
+        output file is given, the plot is rendered to this file instead
+        of being shown. For all further output files, only the isolines
+        and the title of the figure are replaced (see :any:`GridPlot`).
         
         Args:
             heights (numpy.ndarray): Heights to be plotted.
             title (str): Title of the plot.
+            out_file (str): Name of output file (e.g. '.png'), or None
+                for showing the plot on the screen.
             
         '''
-
         # Create masked array for plot
         masked_height = ma.masked_array(heights, mask=self.mask)
         
-        # Create subplot
-        fig, ax = plt.subplots(figsize=(8,8)) 
+        # Reuse figure of previous plot, if rendering to files
+        if out_file is not None and self.frame is not None:
+            fig = self.frame['fig']
+            ax = self.frame['ax']
+            self.remove_contours(self.frame['contours'])
+            self.frame['title'].set_text(title)
+        
+        # Create new figure
+        else:
+            
+            # Create subplot
+            fig, ax = self.create_figure((8,8), out_file)
   
+            # Plot the mask
+            ax.imshow(self.mask[::-1], cmap=self.cm_mask, zorder=2)
+            
+            # Ticks, labels and grid
+            self.draw_axes(ax, 20)
+            
+            # Title
+            title_text = ax.set_title(title, fontsize=24)
+            
+            # Save figure for further plots
+            if out_file is not None:
+                self.frame = {'fig': fig, 'ax': ax, 'title': title_text}
+        
         # Plot the contours
-        CS = plt.contour(
+        CS = ax.contour(
             self.lon_plot, self.lat_plot, masked_height[::-1],
             self.height_iso, colors='k', zorder=1
             )
-
-        # Plot the mask
-        plt.imshow(self.mask[::-1], cmap=self.cm_mask, zorder=2)
        
         # Label the contours
-        plt.clabel(CS, fontsize=18, fmt='%1.0f')
-
-        # Set ticks
-        ax.set_xticks(self.lon_ticks)                
-        ax.set_yticks(self.lat_ticks)                
-       
-        # Set labels
-        ax.set_xticklabels(self.lon_label, fontsize=18)
-        ax.set_yticklabels(
-            self.lat_label, fontsize=18, rotation='horizontal'
-            )
+        ax.clabel(CS, fontsize=18, fmt='%1.0f')
         
-        # Grid
-        ax.grid(color='k')
-        ax.set_axisbelow(False) 
-
-        # Label x- and y-axis                                                  
-        plt.xlabel('r_lon', fontsize=20)                                    
-        plt.ylabel('r_lat', fontsize=20)    
-
-        # Title                           
-        plt.title(title, fontsize=24)
+        # Contours need to be replaced for further plots
+        if out_file is not None:
+            self.frame['contours'] = CS
         
-        # Prevent parts of picture to be cut off
-        plt.tight_layout()
+        # Show or render to file
+        self.finish_figure(fig, out_file)
+    
+    def remove_contours(self, contours):
+        '''Remove contours and their labels from a figure
+        
+        Args:
+            contours (matplotlib.contour.ContourSet): Contours to be
+                removed.
+        
+        '''
+        # Contour labels
+        for label in contours.labelTexts:
+            label.remove()
+        contours.labelTexts = []
         
-        # Show plot
-        plt.show()
+        # Contour lines (older matplotlib versions: one per level)
+        if hasattr(contours, 'collections') and not hasattr(
+                contours, 'get_paths'
+                ):
+            for collection in contours.collections:
+                collection.remove()
+        else:
+            contours.remove()
@@ -0,0 +1,295 @@
+'''Class for compact index matrices of cartesian grids'''
+
+# Python modules
+import json
+import os
+import shutil
+import numpy as np
+
+
+class IndexMatrix(object):
+    '''Saves, for each grid box, the indices of input data elements
+
+    The index matrix tells for each grid box of a cartesian grid, which
+    elements of the input data array (e.g. radar bins) fall into this
+    grid box. It is stored in a compact, CSR-like format, consisting
+    of two flat integer arrays: The flat indices of all input elements,
+    sorted by their grid box, and the offsets, where the elements of
+    each grid box start in the sorted array. The elements of the grid
+    box with the flat number ``box_nr`` are thus
+    ``indices[offsets[box_nr]:offsets[box_nr + 1]]``.
+
+    Optionally, each index can have a weight (e.g. the area, the input
+    element and the grid box overlap), which is then used for weighted
+    averages.
+
+    On disk, an index matrix is a directory containing one '.npy'-file
+    per array. These files can be memory-mapped, so that loading an
+    index matrix doesn't copy it into memory.
+
+    '''
+
+    def __init__(self):
+        '''Initialization of object
+
+        Does nothing so far.
+
+        '''
+        pass
+
+    @property
+    def bin_shape(self):
+        '''Shape of input data
+
+        Shape of the input data array, the indices refer to.
+        Must be a :any:`tuple`.
+
+        '''
+        try:
+            return self._bin_shape
+        except AttributeError:
+            return 0
+
+    @bin_shape.setter
+    def bin_shape(self, new_bin_shape):
+        assert(
+            isinstance(new_bin_shape, tuple)
+            ), 'new_bin_shape not a tuple'
+        self._bin_shape = new_bin_shape
+
+    @property
+    def box_shape(self):
+        '''Shape of cartesian grid
+
+        Shape (lat_shape, lon_shape) of the cartesian grid.
+        Must be a :any:`tuple`.
+
+        '''
+        try:
+            return self._box_shape
+        except AttributeError:
+            return 0
+
+    @box_shape.setter
+    def box_shape(self, new_box_shape):
+        assert(
+            isinstance(new_box_shape, tuple)
+            ), 'new_box_shape not a tuple'
+        self._box_shape = new_box_shape
+
+    @property
+    def indices(self):
+        '''Sorted indices
+
+        Flat indices of input data elements, sorted by grid box.
+        Must be a 1D :any:`numpy.ndarray` of integers.
+
+        '''
+        try:
+            return self._indices
+        except AttributeError:
+            return 0
+
+    @indices.setter
+    def indices(self, new_indices):
+        assert(
+            isinstance(new_indices, np.ndarray)
+            and np.issubdtype(new_indices.dtype, np.integer)
+            ), 'new_indices not an integer numpy.ndarray'
+        assert(
+            len(new_indices.shape) == 1
+            ), 'new_indices is not 1-dimensional'
+        self._indices = new_indices
+
+    @property
+    def offsets(self):
+        '''Offsets of grid boxes
+
+        Position in the sorted indices, where each grid box starts. Has
+        one element more than there are grid boxes.
+        Must be a 1D :any:`numpy.ndarray` of integers.
+
+        '''
+        try:
+            return self._offsets
+        except AttributeError:
+            return 0
+
+    @offsets.setter
+    def offsets(self, new_offsets):
+        assert(
+            isinstance(new_offsets, np.ndarray)
+            and np.issubdtype(new_offsets.dtype, np.integer)
+            ), 'new_offsets not an integer numpy.ndarray'
+        assert(
+            len(new_offsets.shape) == 1
+            ), 'new_offsets is not 1-dimensional'
+        self._offsets = new_offsets
+
+    @property
+    def weights(self):
+        '''Weights of sorted indices
+
+        Weight of each input element in the average of its grid box, or
+        None, if all elements have the same weight.
+        Must be a 1D :any:`numpy.ndarray` or None.
+
+        '''
+        try:
+            return self._weights
+        except AttributeError:
+            return None
+
+    @weights.setter
+    def weights(self, new_weights):
+        assert(
+            new_weights is None
+            or isinstance(new_weights, np.ndarray)
+            ), 'new_weights not a numpy.ndarray'
+        assert(
+            new_weights is None
+            or len(new_weights.shape) == 1
+            ), 'new_weights is not 1-dimensional'
+        self._weights = new_weights
+
+    def fold_azi_res(self, res_fac):
+        '''Fold an artificially increased azimuth resolution
+        
+        If the index matrix was created for radar data of artificially 
+        increased azimuth resolution (see :any:`Radar.increase_azi_res`),
+        each line of the original data is repeated 'res_fac'-times. This
+        method maps the indices back to the original data, so that the 
+        data array of increased resolution never needs to be created. 
+        Repeated elements stay repeated in the index matrix, thus grid 
+        box averages are exactly the same.
+        
+        Args:
+            res_fac (int): Factor, by which the azimuth resolution was 
+                increased.
+        
+        Returns:
+            (IndexMatrix): Index matrix referring to the original data.
+        
+        '''
+        # Number of azimuth lines and range bins of increased resolution
+        line_nr, bin_nr = self.bin_shape
+        
+        # Create new IndexMatrix object with same grid boxes
+        folded = IndexMatrix()
+        folded.box_shape = self.box_shape
+        folded.bin_shape = (line_nr//res_fac, bin_nr)
+        folded.offsets = self.offsets
+        folded.weights = self.weights
+        
+        # Map indices to line and bin of original data
+        lines, bins = np.divmod(self.indices, bin_nr)
+        folded.indices = (lines//res_fac)*bin_nr + bins
+        
+        # Return folded index matrix
+        return folded
+    
+    def get_box(self, line_nr, row_nr):
+        '''Get indices of input elements of a single grid box
+
+        Args:
+            line_nr (int): Line (latitude index) of the grid box.
+            row_nr (int): Row (longitude index) of the grid box.
+
+        Returns:
+            (numpy.ndarray): Flat indices of input data elements,
+            falling into this grid box.
+
+        '''
+        # Flat number of grid box
+        box_nr = line_nr*self.box_shape[1] + row_nr
+
+        # Return slice of sorted indices
+        return self.indices[self.offsets[box_nr]:self.offsets[box_nr + 1]]
+
+    def get_box_ids(self):
+        '''Get grid box of each sorted index
+
+        Returns:
+            (numpy.ndarray): Flat number of the grid box, for each 
+            element of the sorted indices.
+
+        '''
+        # Number of input elements per grid box
+        counts = np.diff(self.offsets)
+
+        # Repeat box number as often as elements are in the box
+        box_ids = np.repeat(np.arange(counts.size), counts)
+
+        # Return box numbers
+        return box_ids
+
+    def load(self, index_dir, mmap=True):
+        '''Load index matrix from disk
+
+        Args:
+            index_dir (str): Name of the index matrix directory.
+            mmap (bool): If True, the arrays are memory-mapped instead
+                of being read into memory.
+
+        '''
+        # Memory-map arrays, if wished
+        mmap_mode = 'r' if mmap else None
+
+        # Shape of grid and of input data
+        shape = np.load(os.path.join(index_dir, 'shape.npy'))
+        self.box_shape = tuple(int(x) for x in shape[:2])
+        self.bin_shape = tuple(int(x) for x in shape[2:])
+
+        # Sorted indices and offsets
+        self.indices = np.load(
+            os.path.join(index_dir, 'indices.npy'), mmap_mode=mmap_mode
+            )
+        self.offsets = np.load(
+            os.path.join(index_dir, 'offsets.npy'), mmap_mode=mmap_mode
+            )
+
+        # Weights (only present for weighted index matrices)
+        weight_file = os.path.join(index_dir, 'weights.npy')
+        if os.path.isfile(weight_file):
+            self.weights = np.load(weight_file, mmap_mode=mmap_mode)
+        else:
+            self.weights = None
+
+    def save(self, index_dir, meta=None):
+        '''Save index matrix to disk
+
+        The arrays are written to a temporary directory first, which is
+        then renamed. Thus, an incomplete index matrix is never seen
+        under the final name.
+
+        Args:
+            index_dir (str): Name of the index matrix directory.
+            meta (dict): Parameters, the index matrix was created for
+                (see :any:`IndexRegistry`). Saved to 'meta.json' in 
+                the index matrix directory, if given.
+
+        '''
+        # Create parent directory, if not present yet
+        parent = os.path.dirname(os.path.abspath(index_dir))
+        os.makedirs(parent, exist_ok=True)
+
+        # Temporary directory
+        tmp_dir = index_dir + '.tmp' + str(os.getpid())
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        # Save arrays
+        shape = np.array(self.box_shape + self.bin_shape, dtype=np.int64)
+        np.save(os.path.join(tmp_dir, 'shape.npy'), shape)
+        np.save(os.path.join(tmp_dir, 'indices.npy'), self.indices)
+        np.save(os.path.join(tmp_dir, 'offsets.npy'), self.offsets)
+        if self.weights is not None:
+            np.save(os.path.join(tmp_dir, 'weights.npy'), self.weights)
+        if meta is not None:
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as meta_file:
+                json.dump(meta, meta_file, indent=4, sort_keys=True)
+
+        # Move to final name (another process may have been faster)
+        try:
+            os.rename(tmp_dir, index_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir)
@@ -0,0 +1,170 @@
+'''Class for looking up index matrices of cartesian grids'''
+
+# Python modules
+import json
+import os
+
+# MasterModule
+from .coord_cache import CoordCache
+
+
+class IndexRegistry(object):
+    '''Registry of index matrices, keyed by grid and radar geometry
+
+    An index matrix (or weight table) is only valid for one cartesian
+    grid and one radar geometry. The registry names each index matrix
+    directory after a hash of all parameters it depends on (see
+    :any:`CoordCache.get_key`): The geometry of the grid (see
+    :any:`CartesianGrid.get_geometry`), the geometry of the radar data
+    (see :any:`Radar.get_geometry`) and the interpolation method. Thus,
+    finding an index matrix is a single lookup of a directory name, and
+    tiny floating point differences in the parameters don't cause new
+    index matrices to be created.
+
+    The parameters are saved as 'meta.json' next to the arrays of the
+    index matrix (see :any:`IndexMatrix.save`). On lookup, they are
+    compared to the requested parameters, so an index matrix is never
+    reused for a different geometry.
+
+    Attributes:
+        index_root (:any:`str`): Directory, containing all index
+            matrix directories.
+
+    '''
+
+    # Prefix of directory names for each interpolation method
+    prefixes = {
+        'index': 'index_matrix_',
+        'overlap': 'weight_table_',
+        }
+
+    def __init__(self, index_root):
+        '''Initialization of object
+
+        Args:
+            index_root (str): Directory, containing all index matrix
+                directories.
+
+        '''
+        self.index_root = index_root
+
+        # Index matrix directories, which were checked already
+        self._checked = {}
+
+    def get_index_dir(self, params):
+        '''Get name of the index matrix directory
+
+        Args:
+            params (dict): Parameters of the index matrix (see
+                :any:`IndexRegistry.get_params`).
+
+        Returns:
+            (str): Name of the index matrix directory.
+
+        '''
+        # Name consists of method, radar name and hash of parameters
+        name = (
+            self.prefixes[params['method']]
+            + str(params['radar']['name'])
+            + '_'
+            + CoordCache.get_key(params)
+            )
+
+        # Return full path
+        return os.path.join(self.index_root, name)
+
+    def get_params(self, car_grid, radar, method='index'):
+        '''Get all parameters, an index matrix depends on
+
+        Args:
+            car_grid (CartesianGrid): Cartesian grid.
+            radar (Radar): Radar object, after reading in the data file.
+            method (str): Interpolation method, 'index' for an index
+                matrix, 'overlap' for a weight table.
+
+        Returns:
+            (dict): Parameters of the index matrix.
+
+        Raises:
+            ValueError: If the method is unknown.
+
+        '''
+        # Check method
+        if method not in self.prefixes:
+            raise ValueError('unknown interpolation method ' + str(method))
+
+        # Collect parameters
+        params = {
+            'grid': car_grid.get_geometry(),
+            'radar': radar.get_geometry(self.get_res_fac(radar, method)),
+            'method': method,
+            }
+
+        # Return parameters
+        return params
+
+    @staticmethod
+    def get_res_fac(radar, method='index'):
+        '''Get factor of the azimuth resolution of an index matrix
+
+        A weight table (method 'overlap') contains the exact areas of
+        overlap of the polar grid boxes, so it is always created for the
+        original azimuth resolution. Increasing it would only make the
+        table larger.
+
+        Args:
+            radar (Radar): Radar object, after reading in the data file.
+            method (str): Interpolation method, 'index' for an index
+                matrix, 'overlap' for a weight table.
+
+        Returns:
+            (int): Factor, by which the azimuth resolution is increased
+            for the index matrix (see :any:`Radar.res_fac`).
+
+        '''
+        if method == 'overlap':
+            return 1
+        return radar.res_fac
+
+    def lookup(self, params):
+        '''Look up index matrix
+
+        Args:
+            params (dict): Parameters of the index matrix (see
+                :any:`IndexRegistry.get_params`).
+
+        Returns:
+            (str): Name of the index matrix directory, or None, if there
+            is no index matrix for these parameters yet.
+
+        Raises:
+            ValueError: If the saved parameters of the index matrix
+                don't fit the requested ones.
+
+        '''
+        # Name of the index matrix directory
+        index_dir = self.get_index_dir(params)
+
+        # Directories, that were checked already, are not read again
+        if index_dir in self._checked:
+            return index_dir
+
+        # No index matrix present yet
+        if not os.path.isdir(index_dir):
+            return None
+
+        # Compare saved to requested parameters
+        meta_file = os.path.join(index_dir, 'meta.json')
+        if not os.path.isfile(meta_file):
+            raise ValueError('no meta.json in index matrix ' + index_dir)
+        with open(meta_file) as meta:
+            saved = json.load(meta)
+        if CoordCache.get_key(saved) != CoordCache.get_key(params):
+            raise ValueError(
+                'index matrix ' + index_dir
+                + ' was created for a different geometry'
+                )
+
+        # Remember checked directory and return it
+        self._checked[index_dir] = True
+        return index_dir
@@ -0,0 +1,130 @@
+'''Class for deferred access to data fields in radar data files'''
+
+# Python modules
+import h5py
+import numpy as np
+from netCDF4 import Dataset
+
+
+class LazyField(object):
+    '''Deferred access to a data field in a radar data file
+
+    Instead of reading and decoding a data field (e.g. the reflectivity)
+    while reading in a radar data file, only the location of the field
+    is saved. The data is read from the file not before it is accessed.
+    Sliced access, e.g. ``field[0:90, :200]`` for an azimuth sector and
+    a range window, only reads and decodes the requested part of the
+    field. The whole field can be read with ``field[...]``.
+
+    The file is opened for each access and closed again afterwards. An
+    already open hdf5 file can be given instead of the file name, which
+    is used for all accesses then (e.g. for all sweeps of a volume, see
+    :any:`DwdRadar.read_volume`).
+
+    Attributes:
+        file_name (:any:`str`): Name of the data file, or an open 
+            :any:`h5py.File`.
+        var_name (:any:`str`): Name (path) of the variable in the file.
+        file_type (:any:`str`): Type of the data file, 'hdf5' or
+            'netcdf'.
+        step (:any:`tuple`): Indices of leading dimensions, which are
+            not part of the field, e.g. the time step of a PATTERN file.
+        shape (:any:`tuple`): Shape of the field.
+        gain (:any:`float`): Factor, the raw data is multiplied with.
+        offset (:any:`float`): Offset, which is added to the raw data.
+        dtype (:any:`numpy.dtype`): Data type of the decoded data, or
+            None for the data type resulting from decoding.
+
+    '''
+
+    def __init__(
+            self, file_name, var_name, file_type, shape, step=(),
+            gain=1.0, offset=0.0, dtype=None
+            ):
+        '''Initialization of object
+
+        Saves the location of the field and how to decode it.
+
+        Args:
+            file_name (str or h5py.File): Name of the data file, or an 
+                open hdf5 file.
+            var_name (str): Name (path) of the variable in the file.
+            file_type (str): Type of the data file, 'hdf5' or 'netcdf'.
+            shape (tuple): Shape of the field.
+            step (tuple): Indices of leading dimensions of the variable,
+                which are not part of the field.
+            gain (float): Factor, the raw data is multiplied with.
+            offset (float): Offset, which is added to the raw data.
+            dtype (numpy.dtype): Data type of the decoded data. The raw
+                data is converted to it before decoding, so decoding
+                is done in this data type, too.
+
+        '''
+        assert file_type in ('hdf5', 'netcdf'), 'unknown file_type'
+        self.file_name = file_name
+        self.var_name = var_name
+        self.file_type = file_type
+        self.shape = tuple(shape)
+        self.step = tuple(step)
+        self.gain = gain
+        self.offset = offset
+        self.dtype = None if dtype is None else np.dtype(dtype)
+
+    def __getitem__(self, key):
+        '''Read and decode a part of the field
+
+        Args:
+            key: Any basic numpy index (integers, slices, Ellipsis).
+
+        Returns:
+            (numpy.ndarray): Decoded part of the field.
+
+        '''
+        # Index of the variable in the file
+        if not isinstance(key, tuple):
+            key = (key,)
+        index = self.step + key
+
+        # Read the requested part from the file
+        raw = self.read_raw(index)
+
+        # Convert to data type of decoded data
+        gain = self.gain
+        offset = self.offset
+        if self.dtype is not None:
+            raw = raw.astype(self.dtype, copy=False)
+            gain = self.dtype.type(gain)
+            offset = self.dtype.type(offset)
+
+        # Decode raw data (only, if necessary)
+        if gain == 1.0 and offset == 0.0:
+            return raw
+        return raw*gain + offset
+
+    @property
+    def ndim(self):
+        '''Number of dimensions of the field'''
+        return len(self.shape)
+
+    def read_raw(self, index):
+        '''Read raw data from file
+
+        Args:
+            index (tuple): Index of the variable in the file.
+
+        Returns:
+            (numpy.ndarray): Raw (not decoded) data.
+
+        '''
+        # Open hdf5-file
+        if isinstance(self.file_name, h5py.File):
+            return self.file_name[self.var_name][index]
+
+        # hdf5-file
+        if self.file_type == 'hdf5':
+            with h5py.File(self.file_name, 'r') as h5py_file:
+                return h5py_file[self.var_name][index]
+
+        # netCDF-file
+        with Dataset(self.file_name, mode='r') as nc:
+            return nc.variables[self.var_name][index]
@@ -8,6 +8,7 @@ import numpy as np
 
 # MasterModule
 from .cartesian_coordinates import CartesianCoordinates
+from .corner_coordinates import CornerCoordinates
 from .middle_coordinates import MiddleCoordinates
 
 class Radar(object):
@@ -30,6 +31,15 @@ class Radar(object):
     Attributes:
         res_fac (:any:`int`): Factor, by which the azimuth angle will be 
             increased artificially.
+        dtype (:any:`numpy.dtype`): Floating point data type of the 
+            reflectivity and of the rotated pole coordinates, 
+            radar_par['dtype'] (default 'float64'). With 'float32', 
+            memory is halved. The rotated pole coordinates (near the 
+            equator) are then accurate to about 1e-7 degrees (about 
+            1 cm), so data points closer than that to the edge of a 
+            grid box may be assigned to the neighbouring grid box. 
+            Geographic lon/lat coordinates are always calculated in 
+            double precision.
         
     '''
      
@@ -46,37 +56,58 @@ class Radar(object):
         
         '''
         self.res_fac = radar_par['res_fac']
+        self.dtype = np.dtype(radar_par.get('dtype', 'float64'))
         
-    def increase_azi_res(self):
+    def increase_azi_res(self, view=False):
         '''Increase azimuth resolution of radar data array
         
         Increases azimuth resolution of radar dataset artificially by a 
-        specific factor.
+        specific factor, by repeating each azimuth line 'res_fac'-times.
+        
+        Note:
+            For interpolating data to a cartesian grid, the data array 
+            of increased resolution is not needed at all: Pass the 
+            original data and 'res_fac' to 
+            :any:`CartesianGrid.data2grid` instead, which folds the 
+            repetition into the index matrix.
+        
+        Args:
+            view (bool): If True, a read-only view of shape 
+                (azimuth, res_fac, range) is returned instead of a copy
+                of shape (azimuth*res_fac, range). No data is copied for
+                the view.
         
         Returns: 
             (numpy.ndarray): Data array of increased azimuth resolution.
             
         '''          
-        # Will be filled with reflectivity values of incr. resolution
-        data_inc = []
-          
-        # Append each line (azimuth) 'res_factor'-times to new array      
-        for line in self.data.refl:
-            for i in range(self.res_fac):     
-                data_inc.append(line)
+        # Define shorter names for attributes
+        refl = self.data.refl
+        res_fac = self.res_fac
+        
+        # Zero-copy view, where each line is repeated along a new axis
+        if view:
+            return np.broadcast_to(
+                refl[:, np.newaxis, :], 
+                (refl.shape[0], res_fac, refl.shape[1])
+                )
           
-        # Transform to numpy array
-        data_inc = np.array(data_inc)
+        # Repeat each line (azimuth) 'res_factor'-times
+        data_inc = np.repeat(refl, res_fac, axis=0)
         
         # Return data array of increase resolution
         return data_inc
     
-    def get_azi_coords(self):
+    def get_azi_coords(self, res_fac=None):
         '''Calculate azimuth coordinate array
         
         Calculates a coordinate array containing the azimuth 
         coordinates of all radar data points.
         
+        Args:
+            res_fac (int): Factor, by which the azimuth resolution is
+                increased. Defaults to :any:`Radar.res_fac`.
+        
         Returns:
             (numpy.ndarray): azimuth coordinates of corresponding radar 
             data array.
@@ -86,7 +117,8 @@ class Radar(object):
         start = self.data.azi_start
         steps = self.data.azi_steps
         ray_nr = self.data.azi_rays
-        res_fac = self.res_fac
+        if res_fac is None:
+            res_fac = self.res_fac
         
         # Azimuth coordinates of data points
         azi_coords = np.arange(
@@ -99,6 +131,89 @@ class Radar(object):
         # Return array of azimuth coordinates
         return azi_coords
     
+    def get_corner_coords(self, res_fac=None):
+        '''Get coordinates of the edges of the polar grid boxes
+        
+        Calculates the azimuth and range coordinates of the edges of all
+        polar grid boxes of the radar data array. The grid box with 
+        azimuth index i and range index j is bounded by the azimuth 
+        edges i and i+1 and by the range edges j and j+1, so there is 
+        one edge more than there are grid boxes in each direction.
+        
+        Args:
+            res_fac (int): Factor, by which the azimuth resolution is
+                increased. Defaults to :any:`Radar.res_fac`.
+        
+        Returns:
+            (CornerCoordinates): Object, which saves the polar 
+            coordinates of the grid box edges as attributes.
+        
+        '''
+        # Create CornerCoordinates object
+        corner_coords = CornerCoordinates()
+        
+        # Get azimuth and range coordinates of radar data
+        if res_fac is None:
+            res_fac = self.res_fac
+        azi_coords = self.get_azi_coords(res_fac)
+        range_coords = self.get_range_coords()
+        
+        # Azimuth edges, closing the circle with the last edge
+        corner_coords.azi = np.append(
+            azi_coords, 
+            (azi_coords[-1] + self.data.azi_steps/res_fac) % 360
+            )
+        
+        # Range edges (range coordinates are the outer edges)
+        corner_coords.range_ = np.append(
+            range_coords[0] - self.data.r_steps, range_coords
+            )
+        
+        # Return coordinates of grid box edges
+        return corner_coords
+
+    def get_geometry(self, res_fac=None):
+        '''Get parameters, which define the geometry of the radar data
+
+        Collects all parameters, the coordinates of the radar data
+        depend on: Site, elevation, azimuth and range coordinates,
+        azimuth offset and the factor, the azimuth resolution is
+        increased by. Two scans with equal geometry have the same
+        coordinates, so derived quantities (e.g. lon/lat coordinates or
+        index matrices) can be reused. The data type is only part of 
+        the geometry, if it is not 'float64'.
+
+        Args:
+            res_fac (int): Factor, by which the azimuth resolution is
+                increased. Defaults to :any:`Radar.res_fac`.
+
+        Returns:
+            (dict): Geometry parameters of the radar data.
+
+        '''
+        # Collect geometry parameters
+        geometry = {
+            'name': self.name,
+            'lon_site': float(self.data.lon_site),
+            'lat_site': float(self.data.lat_site),
+            'ele': float(np.mean(self.data.ele)),
+            'azi_start': float(self.data.azi_start),
+            'azi_steps': float(self.data.azi_steps),
+            'azi_rays': int(self.data.azi_rays),
+            'r_start': float(self.data.r_start),
+            'r_steps': float(self.data.r_steps),
+            'r_bins': int(self.data.r_bins),
+            'res_fac': int(
+                self.res_fac if res_fac is None else res_fac
+                ),
+            'offset': float(self.offset),
+            }
+        if self.dtype != np.float64:
+            geometry['dtype'] = self.dtype.name
+
+        # Return geometry parameters
+        return geometry
+
     def get_middle_pixel(self):           
         '''Get coordinates of the center of the grid boxes
      
@@ -151,12 +266,78 @@ class Radar(object):
         
         # Return array of range coordinates
         return range_coords
-   
-    def plot(self):
+
+    def get_sun_azimuth(self, refl=None):
+        '''Find the azimuth angle of the sun in the radar data
+
+        At sunrise and sunset, the sun is seen by the radar as a line of
+        increased reflectivity along one azimuth. The reflectivity is
+        integrated over all ranges (ignoring NaN) and the azimuth of
+        the maximum is found. The position of the maximum is refined
+        below the azimuth resolution by fitting a parabola through the
+        maximum and its two neighbours.
+
+        Note:
+            Only makes sense for scans without rain, since the rain
+            signal otherwise outweighs the signal of the sun.
+
+        Args:
+            refl (numpy.ndarray): Reflectivity of one scan (azimuth,
+                range) or of several scans (time, azimuth, range).
+                Defaults to :any:`RadarData.refl`.
+
+        Returns:
+            (float or numpy.ndarray): Azimuth angle of the sun in
+            degrees (including the offset of the radar), one for each
+            scan, if several scans were given.
+
+        '''
+        # Reflectivity as float array, masked values are NaN
+        if refl is None:
+            refl = self.data.refl
+        refl = np.ma.filled(np.ma.asarray(refl, dtype=float), np.nan)
+
+        # Integrate over all ranges, one line for each scan
+        refl_sum = np.nansum(refl, axis=-1)
+        lines = refl_sum.reshape(-1, refl_sum.shape[-1])
+        rows = np.arange(lines.shape[0])
+        ray_nr = lines.shape[1]
+
+        # Azimuth index of maximum and its neighbours (circular)
+        ind = np.argmax(lines, axis=1)
+        y0 = lines[rows, ind]
+        y_left = lines[rows, (ind - 1) % ray_nr]
+        y_right = lines[rows, (ind + 1) % ray_nr]
+
+        # Vertex of parabola, relative to the maximum (in rays)
+        curve = y_left - 2*y0 + y_right
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shift = np.where(
+                curve < 0, 0.5*(y_left - y_right)/curve, 0
+                )
+        shift = np.clip(shift, -0.5, 0.5)
+
+        # Azimuth angle at the middle of the refined ray
+        azi = (
+            self.data.azi_start
+            + (ind + shift + 0.5)*self.data.azi_steps
+            ) % 360
+
+        # Return azimuth angle(s)
+        if refl.ndim == 2:
+            return float(azi[0])
+        return azi.reshape(refl.shape[:-2])
+
+    def plot(self, out_file=None):
         '''Create plot of radar reflectivity
         
         This method creates a simple plot of original radar reflectivity
         using wradlib. See wradlib.org for more information.
+        
+        Args:
+            out_file (str): Name of output file (e.g. '.png'). If given,
+                the plot is saved to this file and closed instead of 
+                being shown.
 
         '''
         # Reflectivity array
@@ -216,6 +397,12 @@ class Radar(object):
             y=1.05, fontsize=22
             )
         
+        # Save plot to file, if wished
+        if out_file is not None:
+            plt.savefig(out_file)
+            plt.close()
+            return
+        
         # Show plot
         plt.show()
  
@@ -7,8 +7,10 @@ from datetime import datetime
 from netCDF4 import Dataset
 
 # MasterModule
+from .lazy_field import LazyField
 from .main_radar import Radar
 from .radar_data import RadarData    
+from .sun_calibration import SunCalibration
 
     
 class PatternRadar(Radar):
@@ -25,7 +27,10 @@ class PatternRadar(Radar):
         name (:any:`str`): Name of operating institute. 'PaATTERN' in 
             this case.
         offset (:any:`int`): Angle, by which the pattern radar is 
-            rotated.
+            rotated. 'auto' for loading the offset of each data file
+            from the sun calibration (see :any:`SunCalibration`).
+        calib_dir (:any:`str`): Directory of the sun calibration, if the
+            offset is 'auto', otherwise None.
         data (:any:`RadarData`): Used to save all kind of general radar 
             data and meta data.
         
@@ -51,7 +56,14 @@ class PatternRadar(Radar):
         self.name = 'PATTERN'
         self.offset = radar_par['offset']
         
-    def read_file(self, radar_par):
+        # Offset is loaded from the sun calibration, if wished
+        self.calib_dir = None
+        if isinstance(self.offset, str) and self.offset == 'auto':
+            self.calib_dir = radar_par.get(
+                'calib_dir', '../sun_calibration'
+                )
+        
+    def read_file(self, radar_par, lazy=False):
         '''Read in data
         
         Reads pattern radar data and saves data to object. Only 
@@ -66,18 +78,113 @@ class PatternRadar(Radar):
                 minute to be plotted, processing step, factor to 
                 increase azimuth resolution, offset of radars azimuth 
                 angle.
+            lazy (bool): If True, the reflectivity is not read in 
+                before it is accessed (see :any:`LazyField`).
+                
         '''
-    
         # Define shorter names for input parameters
         proc_key = radar_par['proc_key']
         minute = radar_par['minute']
         
+        # Index of the time step
+        step = int(minute*2)
+        
+        # Open data file (closed again after reading)
+        with Dataset(radar_par['file'], mode='r') as nc:
+
+            # Read meta data
+            radar_data = self.read_meta(nc)
+                                         
+            # Array of measured reflectivity (only this time step is read)
+            if lazy:
+                radar_data.refl = LazyField(
+                    radar_par['file'], proc_key, 'netcdf', 
+                    nc.variables[proc_key].shape[1:], step=(step,),
+                    dtype=self.dtype
+                    )
+            else:
+                radar_data.refl = (
+                    nc.variables[proc_key][step].astype(self.dtype)
+                    )
+       
+            # Times at which radar scan started and ended
+            time_bnds = nc.variables['time_bnds'][step]
+            radar_data.time_start = datetime.utcfromtimestamp(
+                time_bnds[0]
+                )
+            radar_data.time_end = datetime.utcfromtimestamp(time_bnds[1])
+
+        # Save the data to Pattern object
+        self.data = radar_data
+        
+    def read_file_all(self, radar_par, steps=None):
+        '''Read in data of all time steps
+        
+        Reads all time steps of a pattern radar data file at once and 
+        saves them to the object as a 3D array (time, azimuth, range) in
+        :any:`RadarData.refl_steps`. The starting and ending times of 
+        the scans are saved as lists to RadarData.times_start and 
+        RadarData.times_end, RadarData.time_start and 
+        RadarData.time_end cover all read time steps.
+        
+        Args:
+            radar_par (dict): Radar parameters, e.g. name of file, 
+                processing step, factor to increase azimuth resolution,
+                offset of radars azimuth angle.
+            steps (list): Indices of the time steps to be read, in 
+                increasing order. Defaults to all time steps.
+        
+        '''
+        # All time steps, if not given
+        if steps is None:
+            steps = slice(None)
+        
+        # Open data file
+        with Dataset(radar_par['file'], mode='r') as nc:
+            
+            # Read meta data
+            radar_data = self.read_meta(nc)
+            
+            # Array of measured reflectivity of all time steps
+            radar_data.refl_steps = (
+                nc.variables[radar_par['proc_key']][steps].astype(
+                    self.dtype
+                    )
+                )
+            
+            # Times at which radar scans started and ended
+            time_bnds = nc.variables['time_bnds'][steps]
+            radar_data.times_start = [
+                datetime.utcfromtimestamp(t) for t in time_bnds[:, 0]
+                ]
+            radar_data.times_end = [
+                datetime.utcfromtimestamp(t) for t in time_bnds[:, 1]
+                ]
+        
+        # Whole time span of the file
+        radar_data.time_start = radar_data.times_start[0]
+        radar_data.time_end = radar_data.times_end[-1]
+        
+        # Save the data to Pattern object
+        self.data = radar_data
+        
+    def read_meta(self, nc):
+        '''Read in meta data
+        
+        Reads the meta data, which is the same for all time steps of a 
+        pattern radar data file, e.g. site coordinates and the polar 
+        geometry of the scans.
+        
+        Args:
+            nc (netCDF4.Dataset): Opened data file.
+        
+        Returns:
+            (RadarData): Object with meta data saved as attributes.
+        
+        '''
         # Create a RadarData object to generalize the radar properties
         radar_data = RadarData()
         
-        # Open data file
-        nc = Dataset(radar_par['file'], mode='r')
-
         # lon/lat coords of site
         radar_data.lon_site = nc.variables['lon'][:]                                        
         radar_data.lat_site = nc.variables['lat'][:]
@@ -91,6 +198,15 @@ class PatternRadar(Radar):
         # Number of range bins                                        
         radar_data.r_bins = nc.dimensions['range'].size 
 
+        # Offset of the day of this file, from the sun calibration
+        if self.calib_dir is not None:
+            day = datetime.utcfromtimestamp(
+                float(nc.variables['time_bnds'][0, 0])
+                ).date()
+            self.offset = SunCalibration(self.calib_dir).load_offset(
+                self.name, radar_data.lon_site, radar_data.lat_site, day
+                )
+
         # Starting value of azimuth angle
         radar_data.azi_start = (
             (nc.variables['azi'][0] + self.offset + 360) % 360  
@@ -109,19 +225,47 @@ class PatternRadar(Radar):
         radar_data.r_steps = (
             nc.variables['range'][1] - nc.variables['range'][0]
             )
-                                         
-        # Array of measured reflectivity                                        
-        radar_data.refl = nc.variables[proc_key][:][int(minute*2)] 
-       
-        # Time at which radar scan started
-        time_start = nc.variables['time_bnds'][int(minute*2)][0]
-        radar_data.time_start = datetime.utcfromtimestamp(time_start)
-
-        # Time at which radar scan ended
-        time_end = nc.variables['time_bnds'][int(minute*2)][1]            
-        radar_data.time_end = datetime.utcfromtimestamp(time_end)
-
+        
+        # Return meta data
+        return radar_data
+        
+        
+    def read_times(self, radar_par):
+        '''Read in times of all time steps
+        
+        Reads the meta data and the starting and ending times of all 
+        scans of a pattern radar data file, but no reflectivity. The 
+        times are saved like by :any:`PatternRadar.read_file_all`.
+        
+        Args:
+            radar_par (dict): Radar parameters, e.g. name of file, 
+                offset of radars azimuth angle.
+        
+        Returns:
+            (list): Starting times of all scans.
+        
+        '''
+        # Open data file
+        with Dataset(radar_par['file'], mode='r') as nc:
+            
+            # Read meta data
+            radar_data = self.read_meta(nc)
+            
+            # Times at which radar scans started and ended
+            time_bnds = nc.variables['time_bnds'][:]
+            radar_data.times_start = [
+                datetime.utcfromtimestamp(t) for t in time_bnds[:, 0]
+                ]
+            radar_data.times_end = [
+                datetime.utcfromtimestamp(t) for t in time_bnds[:, 1]
+                ]
+        
+        # Whole time span of the file
+        radar_data.time_start = radar_data.times_start[0]
+        radar_data.time_end = radar_data.times_end[-1]
+        
         # Save the data to Pattern object
         self.data = radar_data
         
-
+        # Return starting times
+        return radar_data.times_start
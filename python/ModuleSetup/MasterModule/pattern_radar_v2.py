@@ -7,8 +7,10 @@ from datetime import datetime
 from netCDF4 import Dataset
 
 # MasterModule
+from .lazy_field import LazyField
 from .main_radar import Radar
 from .radar_data import RadarData    
+from .sun_calibration import SunCalibration
 
     
 class PatternRadarV2(Radar):
@@ -29,7 +31,10 @@ class PatternRadarV2(Radar):
         name (:any:`str`): Name of operating institute. 'PATTERN' in 
             this case.
         offset (:any:`int`): Angle, by which the pattern radar is 
-            rotated.
+            rotated. 'auto' for loading the offset of each data file
+            from the sun calibration (see :any:`SunCalibration`).
+        calib_dir (:any:`str`): Directory of the sun calibration, if the
+            offset is 'auto', otherwise None.
         data (:any:`RadarData`): Used to save all kind of general radar 
             data and meta data.
         
@@ -55,7 +60,14 @@ class PatternRadarV2(Radar):
         self.name = 'PATTERN'
         self.offset = radar_par['offset']
         
-    def read_file(self, radar_par):
+        # Offset is loaded from the sun calibration, if wished
+        self.calib_dir = None
+        if isinstance(self.offset, str) and self.offset == 'auto':
+            self.calib_dir = radar_par.get(
+                'calib_dir', '../sun_calibration'
+                )
+        
+    def read_file(self, radar_par, lazy=False):
         '''Read in data
         
         Reads pattern radar data and saves data to object. Only 
@@ -70,16 +82,109 @@ class PatternRadarV2(Radar):
                 minute to be plotted, processing step, factor to 
                 increase azimuth resolution, offset of radars azimuth 
                 angle.
+            lazy (bool): If True, the reflectivity is not read in 
+                before it is accessed (see :any:`LazyField`).
                 
         '''
         minute = radar_par['minute']
         
+        # Index of the time step
+        step = int(minute*2)
+        
+        # Open data file (closed again after reading)
+        with Dataset(radar_par['file'], mode='r') as nc:
+
+            # Read meta data
+            radar_data = self.read_meta(nc)
+                                         
+            # Array of measured reflectivity (only this time step is read)
+            var_name = 'Att_Corr_Xband_Reflectivity'
+            if lazy:
+                radar_data.refl = LazyField(
+                    radar_par['file'], var_name, 'netcdf', 
+                    nc.variables[var_name].shape[1:], step=(step,),
+                    dtype=self.dtype
+                    )
+            else:
+                radar_data.refl = (
+                    nc.variables[var_name][step].astype(self.dtype)
+                    )
+       
+            # Time of radar scan (no distinction between start and end)
+            time = float(nc.variables['Time'][step])
+            radar_data.time_start = datetime.utcfromtimestamp(time)
+            radar_data.time_end = datetime.utcfromtimestamp(time)
+
+        # Save the data to Pattern object
+        self.data = radar_data
+        
+    def read_file_all(self, radar_par, steps=None):
+        '''Read in data of all time steps
+        
+        Reads all time steps of a pattern radar data file at once and 
+        saves them to the object as a 3D array (time, azimuth, range) in
+        :any:`RadarData.refl_steps`. The times of the scans are saved as
+        lists to RadarData.times_start and RadarData.times_end, 
+        RadarData.time_start and RadarData.time_end cover all read 
+        time steps.
+        
+        Args:
+            radar_par (dict): Radar parameters, e.g. name of file, 
+                factor to increase azimuth resolution, offset of radars
+                azimuth angle.
+            steps (list): Indices of the time steps to be read, in 
+                increasing order. Defaults to all time steps.
+        
+        '''
+        # All time steps, if not given
+        if steps is None:
+            steps = slice(None)
+        
+        # Open data file
+        with Dataset(radar_par['file'], mode='r') as nc:
+            
+            # Read meta data
+            radar_data = self.read_meta(nc)
+            
+            # Array of measured reflectivity of all time steps
+            radar_data.refl_steps = (
+                nc.variables['Att_Corr_Xband_Reflectivity'][steps].astype(
+                    self.dtype
+                    )
+                )
+            
+            # Times of radar scans (no distinction between start and end)
+            times = [
+                datetime.utcfromtimestamp(t) 
+                for t in nc.variables['Time'][steps]
+                ]
+            radar_data.times_start = times
+            radar_data.times_end = times
+        
+        # Whole time span of the file
+        radar_data.time_start = radar_data.times_start[0]
+        radar_data.time_end = radar_data.times_end[-1]
+        
+        # Save the data to Pattern object
+        self.data = radar_data
+        
+    def read_meta(self, nc):
+        '''Read in meta data
+        
+        Reads the meta data, which is the same for all time steps of a 
+        pattern radar data file, e.g. site coordinates and the polar 
+        geometry of the scans.
+        
+        Args:
+            nc (netCDF4.Dataset): Opened data file.
+        
+        Returns:
+            (RadarData): Object with meta data saved as attributes.
+        
+        '''
         # Create a RadarData object to generalize the radar properties
         radar_data = RadarData()
         
-        # Open data file
-        nc = Dataset(radar_par['file'], mode='r')
-
         # lon/lat coords of site
         if nc.longitude[-1] == 'E':
             radar_data.lon_site = float(nc.longitude[:-1])
@@ -99,6 +204,15 @@ class PatternRadarV2(Radar):
         # Number of range bins                                        
         radar_data.r_bins = nc.dimensions['dist'].size 
 
+        # Offset of the day of this file, from the sun calibration
+        if self.calib_dir is not None:
+            day = datetime.utcfromtimestamp(
+                float(nc.variables['Time'][0])
+                ).date()
+            self.offset = SunCalibration(self.calib_dir).load_offset(
+                self.name, radar_data.lon_site, radar_data.lat_site, day
+                )
+
         # Starting value of azimuth angle
         radar_data.azi_start = (
             (nc.variables['Azimuth'][0] + self.offset + 360) % 360  
@@ -119,21 +233,45 @@ class PatternRadarV2(Radar):
         radar_data.r_steps = (
             nc.variables['Distance'][1] - nc.variables['Distance'][0]
             )
-                                         
-        # Array of measured reflectivity                                        
-        radar_data.refl = nc.variables[
-            'Att_Corr_Xband_Reflectivity'][:][int(minute*2)
-            ] 
-       
-        # Time at which radar scan started
-        time_start = nc.variables['Time'][int(minute*2)]
-        radar_data.time_start = datetime.utcfromtimestamp(time_start)
-
-        # Time at which radar scan ended
-        time_end = nc.variables['Time'][int(minute*2)]           
-        radar_data.time_end = datetime.utcfromtimestamp(time_end)
-
+        
+        # Return meta data
+        return radar_data
+        
+    def read_times(self, radar_par):
+        '''Read in times of all time steps
+        
+        Reads the meta data and the times of all scans of a pattern 
+        radar data file, but no reflectivity. The times are saved like 
+        by :any:`PatternRadarV2.read_file_all`.
+        
+        Args:
+            radar_par (dict): Radar parameters, e.g. name of file, 
+                offset of radars azimuth angle.
+        
+        Returns:
+            (list): Times of all scans.
+        
+        '''
+        # Open data file
+        with Dataset(radar_par['file'], mode='r') as nc:
+            
+            # Read meta data
+            radar_data = self.read_meta(nc)
+            
+            # Times of radar scans (no distinction between start and end)
+            times = [
+                datetime.utcfromtimestamp(t) 
+                for t in nc.variables['Time'][:]
+                ]
+            radar_data.times_start = times
+            radar_data.times_end = times
+        
+        # Whole time span of the file
+        radar_data.time_start = radar_data.times_start[0]
+        radar_data.time_end = radar_data.times_end[-1]
+        
         # Save the data to Pattern object
         self.data = radar_data
         
-
+        # Return times
+        return times
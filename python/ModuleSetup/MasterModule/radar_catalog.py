@@ -0,0 +1,341 @@
+'''Class for a catalog of the scans in radar data files'''
+
+# Python modules
+import glob
+import os
+import sqlite3
+import numpy as np
+from datetime import datetime
+
+# MasterModule
+from .reader_registry import ReaderRegistry
+from .sun_calibration import SunCalibration
+
+
+class RadarCatalog(object):
+    '''Catalog of all scans in directories of radar data files
+
+    Finding the data file and the minute of a scan usually means opening
+    all files. The catalog opens each file only once (see
+    :any:`RadarCatalog.update`) and saves the times of all its scans to
+    an `SQLite <https://www.sqlite.org>`_ database: For PATTERN files
+    the times of all time steps, for DWD files the time of the scan.
+    Only times and meta data (site coordinates, elevation) are read, no
+    reflectivity. The format of each file is detected with
+    :any:`ReaderRegistry`, files of unknown format are skipped.
+
+    Scans within a time window are then found with a single indexed
+    query (see :any:`RadarCatalog.query`). As no scan is longer than
+    the longest scan in the catalog, the starting times of all scans
+    overlapping the window lie within a range bounded at both ends, so
+    only the index entries of this range are searched. Each file is
+    read again only if its modification time or size changed.
+
+    The database has three tables: 'files' (file, mtime_ns, size,
+    format), 'scans' (file, step, name, radar_id, lon_site, lat_site,
+    ele, time_start, time_end), with times in seconds since 1970 (UTC),
+    and 'meta' (key, value), holding the longest scan duration.
+
+    Attributes:
+        db_file (:any:`str`): Name of the database file.
+        connection (:any:`sqlite3.Connection`): Connection to the
+            database.
+        max_duration (:any:`float`): Longest duration of a scan in the
+            catalog in seconds.
+
+    '''
+
+    def __init__(self, db_file):
+        '''Initialization of object
+
+        Opens the database and creates its tables, if not present yet.
+
+        Args:
+            db_file (str): Name of the database file. Is created, if
+                not present yet.
+
+        '''
+        self.db_file = db_file
+        self.connection = sqlite3.connect(db_file)
+
+        # Create tables and indices
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS files ('
+                'file TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, '
+                'format TEXT)'
+                )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS scans ('
+                'file TEXT, step INTEGER, name TEXT, radar_id TEXT, '
+                'lon_site REAL, lat_site REAL, ele REAL, '
+                'time_start REAL, time_end REAL, '
+                'PRIMARY KEY (file, step))'
+                )
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS scans_time '
+                'ON scans (time_start)'
+                )
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS scans_radar '
+                'ON scans (radar_id, time_start)'
+                )
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS scans_name '
+                'ON scans (name, time_start)'
+                )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS meta ('
+                'key TEXT PRIMARY KEY, value REAL)'
+                )
+
+        # Longest scan duration (calculated, if not present yet)
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'max_duration'"
+            ).fetchone()
+        if row is None:
+            self.update_max_duration()
+        else:
+            self.max_duration = row[0]
+
+    def close(self):
+        '''Close the database'''
+        self.connection.close()
+
+    @staticmethod
+    def get_radar_par(radar_par, scan):
+        '''Get radar parameters of a scan
+
+        Args:
+            radar_par (dict): Radar parameters, serving as template.
+            scan (dict): Scan, as returned by :any:`RadarCatalog.query`.
+
+        Returns:
+            (dict): Radar parameters with file name and minute of the
+            scan.
+
+        '''
+        return dict(radar_par, file=scan['file'], minute=scan['minute'])
+
+    def query(self, start, end, radar=None):
+        '''Find all scans within a time window
+
+        Args:
+            start (datetime.datetime): Start of time window (UTC).
+            end (datetime.datetime): End of time window (UTC).
+            radar (str): Name (e.g. 'DWD') or identifier (see
+                :any:`SunCalibration.get_radar_id`) of a radar. Defaults
+                to all radars.
+
+        Returns:
+            (list): Scans overlapping the time window, sorted by
+            starting time. Each scan is a dict with the keys 'file',
+            'step' (time step in the file), 'minute' (step as
+            radar_par['minute']), 'name', 'radar_id', 'lon_site',
+            'lat_site', 'ele', 'time_start' and 'time_end' (datetime).
+
+        '''
+        # Scans overlapping the time window (starting at most the
+        # longest scan duration before the window, so the index range
+        # is bounded at both ends)
+        sql = (
+            'SELECT file, step, name, radar_id, lon_site, lat_site, ele, '
+            'time_start, time_end FROM scans '
+            'WHERE time_start >= ? AND time_start <= ? AND time_end >= ?'
+            )
+        args = [
+            self.to_seconds(start) - self.max_duration,
+            self.to_seconds(end), self.to_seconds(start)
+            ]
+
+        # Only scans of one radar (a single indexed column, either
+        # identifier or name)
+        if radar is not None:
+            is_id = self.connection.execute(
+                'SELECT 1 FROM scans WHERE radar_id = ? LIMIT 1', (radar,)
+                ).fetchone()
+            sql += ' AND radar_id = ?' if is_id else ' AND name = ?'
+            args.append(radar)
+
+        # Query database
+        rows = self.connection.execute(
+            sql + ' ORDER BY time_start, file, step', args
+            ).fetchall()
+
+        # Return scans
+        keys = (
+            'file', 'step', 'name', 'radar_id', 'lon_site', 'lat_site',
+            'ele', 'time_start', 'time_end'
+            )
+        scans = []
+        for row in rows:
+            scan = dict(zip(keys, row))
+            scan['minute'] = scan['step']/2
+            scan['time_start'] = datetime.utcfromtimestamp(
+                scan['time_start']
+                )
+            scan['time_end'] = datetime.utcfromtimestamp(scan['time_end'])
+            scans.append(scan)
+        return scans
+
+    def read_scans(self, file_name):
+        '''Read times and meta data of all scans of a data file
+
+        Args:
+            file_name (str): Name of the data file.
+
+        Returns:
+            (list): Rows of the table 'scans' for this file.
+
+        Raises:
+            ValueError: If the format of the file is unknown.
+
+        '''
+        # Radar object of the format of the file (offset doesn't matter)
+        radar_par = {'file': file_name, 'res_fac': 1, 'offset': 0}
+        radar = ReaderRegistry.create_radar(radar_par)
+
+        # Times of all time steps (PATTERN), or of the only scan (DWD)
+        if hasattr(radar, 'read_times'):
+            radar.read_times(radar_par)
+            times_start = radar.data.times_start
+            times_end = radar.data.times_end
+        else:
+            radar.read_file(radar_par, lazy=True)
+            times_start = [radar.data.time_start]
+            times_end = [radar.data.time_end]
+
+        # Site and elevation
+        lon_site = float(radar.data.lon_site)
+        lat_site = float(radar.data.lat_site)
+        radar_id = SunCalibration.get_radar_id(
+            radar.name, lon_site, lat_site
+            )
+        ele = float(np.mean(radar.data.ele))
+
+        # Return one row per scan
+        return [
+            (
+                file_name, step, radar.name, radar_id, lon_site,
+                lat_site, ele, self.to_seconds(time_start),
+                self.to_seconds(time_end)
+                )
+            for step, (time_start, time_end)
+            in enumerate(zip(times_start, times_end))
+            ]
+
+    @staticmethod
+    def to_seconds(time):
+        '''Convert a time (UTC) to seconds since 1970'''
+        return (time - datetime(1970, 1, 1)).total_seconds()
+
+    def update(self, paths, batch_size=100):
+        '''Add new and changed data files to the catalog
+
+        Files, which are in the catalog already and didn't change, are
+        not opened again. Files, which don't exist anymore (e.g.
+        dangling links), are removed from the catalog. Files, which
+        can't be read, are added without scans, so they are only read
+        again after they changed. Changes are committed in batches, so
+        the progress of long updates is kept.
+
+        Args:
+            paths (list): Directories (searched recursively), glob
+                patterns or names of data files.
+            batch_size (int): Number of files per commit.
+
+        Returns:
+            (tuple): Number of files read and number of files skipped
+            (unknown format, not readable or not existing).
+
+        '''
+        # All files of all paths (absolute names)
+        files = set()
+        for path in paths:
+            if os.path.isdir(path):
+                for directory, dirs, names in os.walk(path):
+                    files.update(
+                        os.path.abspath(os.path.join(directory, name))
+                        for name in names
+                        )
+            else:
+                files.update(
+                    os.path.abspath(name) for name in glob.glob(path)
+                    )
+
+        # Modification time and size of files in the catalog
+        known = {
+            row[0]: (row[1], row[2]) for row in self.connection.execute(
+                'SELECT file, mtime_ns, size FROM files'
+                )
+            }
+
+        # Read new and changed files
+        read_nr = 0
+        skipped_nr = 0
+        with self.connection:
+            for file_nr, file_name in enumerate(sorted(files)):
+
+                # Commit previous batch
+                if file_nr and file_nr % batch_size == 0:
+                    self.connection.commit()
+
+                # Skip files, which disappeared, and unchanged files
+                try:
+                    stat = os.stat(file_name)
+                except OSError:
+                    skipped_nr += 1
+                    continue
+                if known.get(file_name) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+
+                # Read scans (files of unknown format or unreadable files
+                # have no scans, any error only concerns this file)
+                try:
+                    file_format = ReaderRegistry.detect(file_name)
+                    rows = self.read_scans(file_name)
+                    read_nr += 1
+                except Exception:
+                    file_format = None
+                    rows = []
+                    skipped_nr += 1
+
+                # Replace entries of this file
+                self.connection.execute(
+                    'DELETE FROM scans WHERE file = ?', (file_name,)
+                    )
+                self.connection.executemany(
+                    'INSERT INTO scans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                    )
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                    (file_name, stat.st_mtime_ns, stat.st_size, file_format)
+                    )
+
+            # Remove files, which don't exist anymore
+            for file_name in known:
+                if not os.path.exists(file_name):
+                    self.connection.execute(
+                        'DELETE FROM scans WHERE file = ?', (file_name,)
+                        )
+                    self.connection.execute(
+                        'DELETE FROM files WHERE file = ?', (file_name,)
+                        )
+
+        # Longest scan duration
+        self.update_max_duration()
+
+        # Return number of read and skipped files
+        return read_nr, skipped_nr
+
+    def update_max_duration(self):
+        '''Save the longest scan duration of the catalog'''
+        self.max_duration = self.connection.execute(
+            'SELECT COALESCE(MAX(time_end - time_start), 0) FROM scans'
+            ).fetchone()[0]
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('max_duration', ?)",
+                (self.max_duration,)
+                )
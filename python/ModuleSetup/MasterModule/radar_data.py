@@ -4,6 +4,9 @@
 import numpy as np
 from datetime import datetime
 
+# MasterModule
+from .lazy_field import LazyField
+
 
 class RadarData(object):
     '''Class to save radar data properties
@@ -11,6 +14,12 @@ class RadarData(object):
     This class is used to define general, for different radars identical 
     radar data properties. 
     
+    The reflectivity can either be saved decoded (see 
+    :any:`RadarData.refl`) or as raw integer counts together with gain
+    and offset (see :any:`RadarData.refl_raw`). Raw counts need 4-8 
+    times less memory. They are decoded on demand, or the decoding is 
+    applied after regridding (see :any:`RadarData.get_refl_raw`).
+    
     '''
     
     def __init__(self):
@@ -21,6 +30,28 @@ class RadarData(object):
         '''
         pass
     
+    def get_refl_raw(self):
+        '''Get reflectivity data for regridding with decoding afterwards
+        
+        Averaging over grid boxes is linear with weights summing up to 
+        one. Thus, the raw counts can be averaged and gain and offset be 
+        applied to the averages afterwards (see 
+        :any:`CartesianGrid.data2grid` and :any:`RegridOperator.apply`),
+        which gives the same result as averaging decoded data.
+        
+        Returns:
+            (tuple): Raw counts, gain and offset, if the reflectivity is
+            saved as raw counts. Otherwise the decoded reflectivity, 1.0 
+            and 0.0.
+        
+        '''
+        # Raw counts
+        if hasattr(self, '_refl_raw'):
+            return self._refl_raw, self.gain, self.offset
+        
+        # Decoded reflectivity
+        return self.refl, 1.0, 0.0
+    
     @property
     def azi_rays(self):
         '''Number of azimuth rays
@@ -100,6 +131,26 @@ class RadarData(object):
             ), 'new_ele not a float'
         self._ele = new_ele
         
+    @property
+    def gain(self):
+        '''Gain of raw counts
+        
+        Factor, the raw counts (see :any:`RadarData.refl_raw`) are 
+        multiplied with for decoding. The decoded reflectivity has the 
+        data type of gain and offset. 
+        Must be a :any:`float`.
+        
+        '''
+        try:
+            return self._gain
+        except AttributeError:
+            return 1.0
+    
+    @gain.setter
+    def gain(self, new_gain):
+        assert isinstance(new_gain, (float, np.floating)), 'gain not a float'
+        self._gain = new_gain
+        
     @property
     def lat_site(self):
         '''Latitude coordinate
@@ -144,6 +195,27 @@ class RadarData(object):
             ), 'new_lon_site not a float'
         self._lon_site = new_lon_site
         
+    @property
+    def offset(self):
+        '''Offset of raw counts
+        
+        Offset, which is added to the raw counts (see 
+        :any:`RadarData.refl_raw`) multiplied with the gain. 
+        Must be a :any:`float`.
+        
+        '''
+        try:
+            return self._offset
+        except AttributeError:
+            return 0.0
+    
+    @offset.setter
+    def offset(self, new_offset):
+        assert(
+            isinstance(new_offset, (float, np.floating))
+            ), 'offset not a float'
+        self._offset = new_offset
+        
     @property
     def r_bins(self):
         '''Number of range bins
@@ -213,20 +285,117 @@ class RadarData(object):
         '''Reflectivity
         
         Reflectivity measured by the radar. 
-        Must be a 2D :any:`numpy.ndarray`.
+        Must be a 2D :any:`numpy.ndarray` or a 2D :any:`LazyField`. A 
+        :any:`LazyField` is read and decoded completely, when this 
+        attribute is accessed for the first time. For sliced access 
+        without decoding the whole field, use :any:`RadarData.refl_field`.
+        If only raw counts are saved (see :any:`RadarData.refl_raw`), 
+        they are decoded with a lookup table on each access, without 
+        keeping the decoded array.
         
         '''
         try:
+            if isinstance(self._refl, LazyField):
+                self._refl = self._refl[...]
             return self._refl
+        except AttributeError:
+            pass
+        try:
+            raw = self._refl_raw
         except AttributeError:
             return 0
         
+        # Decode with lookup table of all possible counts (8, 16 bit)
+        if raw.dtype.kind == 'u' and raw.dtype.itemsize <= 2:
+            lut = (
+                np.arange(2**(8*raw.dtype.itemsize), dtype=raw.dtype)
+                * self.gain + self.offset
+                )
+            return lut[raw]
+        
+        # Decode other data types directly
+        return raw*self.gain + self.offset
+        
     @refl.setter
     def refl(self, new_refl):
         assert(
             isinstance(new_refl, np.ndarray)
+            or isinstance(new_refl, LazyField)
             ), 'new refl is no numpy array'
         assert(
             len(new_refl.shape) == 2
             ), 'new refl is not 2-dimensional'
+        if hasattr(self, '_refl_raw'):
+            del self._refl_raw
         self._refl = new_refl
+
+    @property
+    def refl_field(self):
+        '''Reflectivity field for sliced access
+        
+        Reflectivity measured by the radar, without decoding it. This is
+        either the :any:`LazyField` (if not decoded yet), or the decoded 
+        :any:`numpy.ndarray`. Both can be sliced, e.g. 
+        ``refl_field[0:90, :200]``, but only the :any:`LazyField` reads 
+        just the requested part from the file. If only raw counts are 
+        saved, this is the decoded reflectivity. Read only.
+        
+        '''
+        try:
+            return self._refl
+        except AttributeError:
+            return self.refl
+
+    @property
+    def refl_raw(self):
+        '''Raw counts of reflectivity
+        
+        Reflectivity measured by the radar as raw integer counts, as 
+        saved in the data file. Decoded reflectivity is 
+        ``refl_raw*gain + offset`` (see :any:`RadarData.gain`, 
+        :any:`RadarData.offset`). Setting raw counts replaces a decoded 
+        reflectivity. 
+        Must be a 2D integer :any:`numpy.ndarray`.
+        
+        '''
+        try:
+            return self._refl_raw
+        except AttributeError:
+            return 0
+    
+    @refl_raw.setter
+    def refl_raw(self, new_refl_raw):
+        assert(
+            isinstance(new_refl_raw, np.ndarray)
+            and new_refl_raw.dtype.kind in 'iu'
+            ), 'new refl_raw is no integer numpy array'
+        assert(
+            len(new_refl_raw.shape) == 2
+            ), 'new refl_raw is not 2-dimensional'
+        if hasattr(self, '_refl'):
+            del self._refl
+        self._refl_raw = new_refl_raw
+
+    @property
+    def refl_steps(self):
+        '''Reflectivity of all time steps
+        
+        Reflectivity measured by the radar for all time steps of a data
+        file, with shape (time, azimuth, range). 
+        Must be a 3D :any:`numpy.ndarray`.
+        
+        '''
+        try:
+            return self._refl_steps
+        except AttributeError:
+            return 0
+        
+    @refl_steps.setter
+    def refl_steps(self, new_refl_steps):
+        assert(
+            isinstance(new_refl_steps, np.ndarray)
+            ), 'new refl_steps is no numpy array'
+        assert(
+            len(new_refl_steps.shape) == 3
+            ), 'new refl_steps is not 3-dimensional'
+        self._refl_steps = new_refl_steps
@@ -0,0 +1,187 @@
+'''Class for detecting the format of radar data files'''
+
+# Python modules
+import os
+import h5py
+from collections import OrderedDict
+from netCDF4 import Dataset
+
+# MasterModule
+from .dwd_radar import DwdRadar
+from .pattern_radar import PatternRadar
+from .pattern_radar_v2 import PatternRadarV2
+
+
+class ReaderRegistry(object):
+    '''Registry of radar classes, detecting the format of data files
+
+    The format of a data file is detected from its content instead of
+    its name: The signature (magic bytes) at the beginning of the file
+    tells, whether it is an hdf5-file (including netCDF4) or a classic
+    netCDF-file. Then only the names of the top level variables (or
+    groups) and of the global attributes are read, no data. Each format
+    is identified by variables and attributes, which must be present
+    (see :any:`ReaderRegistry.register`).
+
+    Detected formats are cached for each file, as long as its
+    modification time and size don't change. Thus, batch jobs over
+    directories with thousands of files open each file at most once
+    for dispatching.
+
+    All attributes and methods belong to the class, so the registry is
+    shared by all modules of a process.
+
+    Attributes:
+        readers (:any:`collections.OrderedDict`): Radar class, required
+            variables and required attributes of each format, checked
+            in this order.
+        formats (:any:`dict`): Cache of detected formats, with path,
+            modification time and size of the files as keys.
+
+    '''
+
+    # Signatures of hdf5-files (at 0, 512, 1024, ... bytes, if the file
+    # has a user block) and of classic netCDF-files
+    hdf5_signature = b'\x89HDF\r\n\x1a\n'
+    hdf5_offsets = (0, 512, 1024, 2048)
+    netcdf_signatures = (b'CDF\x01', b'CDF\x02', b'CDF\x05')
+
+    # Registered formats
+    readers = OrderedDict()
+
+    # Cache of detected formats
+    formats = {}
+
+    @classmethod
+    def create_radar(cls, radar_par, formats=None):
+        '''Create radar object for a data file
+
+        Args:
+            radar_par (dict): Radar parameters, including the name of
+                the data file.
+            formats (list): Names of the formats, which are accepted.
+                Defaults to all registered formats.
+
+        Returns:
+            (Radar): Radar object of the class of the detected format,
+            e.g. :any:`DwdRadar`.
+
+        Raises:
+            ValueError: If the format is unknown or not accepted.
+
+        '''
+        # Detect format
+        file_format = cls.detect(radar_par['file'])
+
+        # Check, if format is accepted
+        if formats is not None and file_format not in formats:
+            raise ValueError(
+                'wrong input file ' + radar_par['file'] + ' (format '
+                + file_format + '), only ' + ', '.join(formats)
+                + ' data works'
+                )
+
+        # Create radar object
+        return cls.readers[file_format][0](radar_par)
+
+    @classmethod
+    def detect(cls, file_name):
+        '''Detect format of a data file
+
+        Args:
+            file_name (str): Name of the data file.
+
+        Returns:
+            (str): Name of the format, e.g. 'dwd'.
+
+        Raises:
+            ValueError: If the format is unknown.
+
+        '''
+        # Cached format, if file wasn't changed
+        stat = os.stat(file_name)
+        key = (os.path.abspath(file_name), stat.st_mtime_ns, stat.st_size)
+        if key in cls.formats:
+            return cls.formats[key]
+
+        # Names of variables and attributes
+        variables, attributes = cls.read_header(file_name)
+
+        # First format, whose variables and attributes are present
+        for file_format, reader in cls.readers.items():
+            if reader[1] <= variables and reader[2] <= attributes:
+                cls.formats[key] = file_format
+                return file_format
+
+        # No format found
+        raise ValueError('unknown radar data file ' + file_name)
+
+    @classmethod
+    def read_header(cls, file_name):
+        '''Read names of variables and global attributes of a file
+
+        Args:
+            file_name (str): Name of the data file.
+
+        Returns:
+            (tuple): Names of the top level variables (or groups) and
+            of the global attributes (both set). Empty, if the file is
+            neither an hdf5- nor a netCDF-file.
+
+        '''
+        # Read magic bytes
+        with open(file_name, 'rb') as data_file:
+            head = data_file.read(
+                cls.hdf5_offsets[-1] + len(cls.hdf5_signature)
+                )
+
+        # hdf5-file (including netCDF4)
+        if any(
+                head[offset:offset + len(cls.hdf5_signature)]
+                == cls.hdf5_signature
+                for offset in cls.hdf5_offsets
+                ):
+            with h5py.File(file_name, 'r') as h5py_file:
+                return set(h5py_file.keys()), set(h5py_file.attrs.keys())
+
+        # Classic netCDF-file
+        if head[:4] in cls.netcdf_signatures:
+            with Dataset(file_name, mode='r') as nc:
+                return set(nc.variables), set(nc.ncattrs())
+
+        # Unknown file
+        return set(), set()
+
+    @classmethod
+    def register(cls, name, radar_class, variables=(), attributes=()):
+        '''Register a format
+
+        Args:
+            name (str): Name of the format.
+            radar_class (type): Subclass of :any:`Radar`, which reads
+                files of this format.
+            variables (list): Names of top level variables (or groups),
+                which identify the format.
+            attributes (list): Names of global attributes, which
+                identify the format.
+
+        '''
+        cls.readers[name] = (radar_class, set(variables), set(attributes))
+
+        # Cached formats could change
+        cls.formats.clear()
+
+
+# Formats of this package
+ReaderRegistry.register(
+    'dwd', DwdRadar, variables=('dataset1', 'where', 'how')
+    )
+ReaderRegistry.register(
+    'pattern_v1', PatternRadar,
+    variables=('lon', 'lat', 'ele', 'azi', 'range', 'time_bnds')
+    )
+ReaderRegistry.register(
+    'pattern_v2', PatternRadarV2,
+    variables=('Azimuth', 'Distance', 'Time'),
+    attributes=('longitude', 'latitude', 'elevation')
+    )
@@ -1,7 +1,7 @@
 '''Class for plots of reflectivity differences on cartesian grids'''
 
 # Python modules
-import matplotlib.pyplot as plt
+import numpy as np
 from skimage import measure
 
 # MasterModule
@@ -34,11 +34,139 @@ class ReflDiffPlot(GridPlot):
         # Call init method of super class
         super().__init__(grid_par, plot_par)
 
-    def make_plot(self, data1, data2, name1, name2, title):
+    def draw_figure(self, refl_diff, title, out_file=None):
+        '''Draw a new figure of reflectivity differences
+        
+        Args:
+            refl_diff (numpy.ndarray): Reflectivity differences.
+            title (str): Title of the plot.
+            out_file (str): Name of output file, or None for showing the
+                plot on the screen (see :any:`GridPlot.create_figure`).
+        
+        Returns:
+            (dict): Figure, axes, image and title of the plot.
+        
+        '''
+        # Create subplot
+        fig, ax = self.create_figure((10,10), out_file)
+    
+        # Create heatmap
+        image = ax.imshow(
+            refl_diff[::-1], vmin=-70, vmax=70, cmap='bwr', zorder=1
+            )
+        
+        # Colorbar
+        cb = fig.colorbar(image, ax=ax)
+        cb.set_label('reflectivity [dbz]', fontsize=20)
+        cb.ax.tick_params(labelsize=18)
+        
+        # Put mask in front of data
+        ax.imshow(self.mask[::-1], cmap=self.cm_mask, zorder=2)
+        
+        # Ticks, labels and grid
+        self.draw_axes(ax, 20)
+        
+        # Title
+        title_text = ax.set_title(title, fontsize=20)
+        
+        # Return figure and its artists
+        return {'fig': fig, 'ax': ax, 'image': image, 'title': title_text}
+    
+    def draw_isolines(self, ax, data1, data2, name1, name2):
+        '''Draw isolines around rain areas of both radars
+        
+        Isolines are only drawn, if log_iso is True.
+        
+        Args:
+            ax (matplotlib.axes.Axes): Axes of the plot.
+            data1 (numpy.ndarray): Data of first radar.
+            data2 (numpy.ndarray): Data of second radar.
+            name1 (str): Name of first radar.
+            name2 (str): Name of second radar.
+        
+        Returns:
+            (list): Isolines, one line for each radar.
+        
+        '''
+        # No isolines wished
+        lines = []
+        if not self.log_iso:
+            return lines
+        
+        # Plot contours of both radars around rain areas (between data
+        # and mask). All contours of one radar are joined to a single
+        # line, separated by NaN, which is much faster to draw.
+        for data, name, color in ((data1, name1, 'b'), (data2, name2, 'r')):
+            contours = measure.find_contours(data[::-1], self.rain_th)
+            if not contours:
+                continue
+            gap = np.full((1, 2), np.nan)
+            joined = np.concatenate(
+                [part for contour in contours for part in (contour, gap)]
+                )
+            lines.extend(ax.plot(
+                joined[:,1], joined[:,0], linewidth=1, color=color,
+                label=name, zorder=1.5,
+                ))
+        
+        # Return isolines
+        return lines
+    
+    def make_animation(
+            self, data1, data2, name1, name2, titles, out_file, fps=10
+            ):
+        '''Create an animation of reflectivity differences
+        
+        Animates a time series of reflectivity differences between two
+        radars. Only the image, the isolines and the title are drawn for
+        each frame (see :any:`GridPlot.write_animation`).
+        
+        Args:
+            data1 (numpy.ndarray): Data of first radar, with shape
+                (time, lat, lon).
+            data2 (numpy.ndarray): Data of second radar, with shape
+                (time, lat, lon).
+            name1 (str): Name of first radar.
+            name2 (str): Name of second radar.
+            titles (list): Title of each frame.
+            out_file (str): Name of output file, ending with '.gif' or
+                '.mp4'.
+            fps (float): Frames per second.
+        
+        '''
+        # Draw figure of first frame, with legend
+        frame = self.draw_figure(data2[0] - data1[0], titles[0], out_file)
+        frame['lines'] = self.draw_isolines(
+            frame['ax'], data1[0], data2[0], name1, name2
+            )
+        legend = []
+        if self.log_iso:
+            legend.append(frame['ax'].legend(fontsize=18, loc='upper right'))
+        frame['fig'].tight_layout()
+
+        # Update image, isolines and title for each frame (legend is
+        # drawn again on top of the isolines)
+        def update(i):
+            frame['image'].set_data((data2[i] - data1[i])[::-1])
+            frame['title'].set_text(titles[i])
+            for line in frame['lines']:
+                line.remove()
+            frame['lines'] = self.draw_isolines(
+                frame['ax'], data1[i], data2[i], name1, name2
+                )
+            return [frame['image'], frame['title']] + frame['lines'] + legend
+        
+        # Write animation
+        self.write_animation(frame['fig'], update, len(data1), out_file, fps)
+    
+    def make_plot(self, data1, data2, name1, name2, title, out_file=None):
         '''Make plot of reflectivity differences
         
         Plots the differences in reflectivity between two radars on a 
-        cartesian grid.
+        cartesian grid. If an output file is given, the plot is rendered
+        to this file instead of being shown. For all further output
+        files, only the data, the isolines and the title of the figure
+        are updated (see :any:`GridPlot`).
        
         Args:
             data1 (numpy.ndarray): Data of first radar.
@@ -46,85 +174,37 @@ class ReflDiffPlot(GridPlot):
             name1 (str): Name of first radar.
             name2 (str): Name of second radar.
             title (str): Title of the plot.
+            out_file (str): Name of output file (e.g. '.png'), or None
+                for showing the plot on the screen.
             
         '''
         # Get reflectiviy differences        
         refl_diff = data2 - data1
 
-        # Create subplot
-        fig, ax = plt.subplots(figsize=(10,10)) 
+        # Reuse figure of previous plot, if rendering to files
+        if out_file is not None and self.frame is not None:
+            frame = self.frame
+            frame['image'].set_data(refl_diff[::-1])
+            frame['title'].set_text(title)
+            for line in frame['lines']:
+                line.remove()
         
-        # Create heatmap                                                                                                              
-        plt.imshow(
-            refl_diff[::-1], vmin=-70, vmax=70, cmap='bwr', zorder=1
-            )      
-        
-        # Colorbar
-        cb = plt.colorbar()
-        cb.set_label('reflectivity [dbz]', fontsize=20)
-        cb.ax.tick_params(labelsize=18)
+        # Draw new figure
+        else:
+            frame = self.draw_figure(refl_diff, title, out_file)
         
         # Plot isolines around rain areas, if wished
-        if self.log_iso:
-            
-            # Find contours of first radar around rain areas
-            contour1 = measure.find_contours(
-                data1[::-1], self.rain_th
-                )
-            
-            # Find contours of second radar around rain areas
-            contour2 = measure.find_contours(
-                data2[::-1], self.rain_th
-                )
-        
-            # Plot contours of radar1
-            for n, contour in enumerate(contour1):
-               plt.plot(
-                    contour[:,1], contour[:,0], linewidth=1, color='b',
-                    label=name1,
-                    )
-            
-            # Plot contours of radar2
-            for n, contour in enumerate(contour2):
-                plt.plot(
-                    contour[:,1], contour[:,0], linewidth=1, color='r',
-                    label=name2,
-                    )
-            
-            # Remove all labels except one of each radar
-            lines = ax.get_lines()
-            for line in lines[1:-1]:
-                line.set_label('')
+        frame['lines'] = self.draw_isolines(
+            frame['ax'], data1, data2, name1, name2
+            )
         
-            # Legend
-            plt.legend(fontsize=18)
-        
-        # Put mask in front of data
-        plt.imshow(self.mask[::-1], cmap=self.cm_mask, zorder=2)
-           
-        # Grid
-        ax.grid(color='k')
-        ax.set_axisbelow(False)
-       
-        # x- and y-tick positions
-        ax.set_xticks(self.lon_ticks)                
-        ax.set_yticks(self.lat_ticks)                
-        
-        # x- and y-tick labels
-        ax.set_xticklabels(self.lon_label, fontsize=18)                                        
-        ax.set_yticklabels(
-            self.lat_label, fontsize=18, rotation='horizontal'
-            )                                        
+        # Legend (fixed location, 'best' is slow for many lines)
+        if self.log_iso:
+            frame['ax'].legend(fontsize=18, loc='upper right')
         
-        # Label x- and y-axis                                                  
-        plt.xlabel('r_lon', fontsize=20)                                    
-        plt.ylabel('r_lat', fontsize=20)    
+        # Save figure for further plots
+        if out_file is not None:
+            self.frame = frame
         
-        # Title
-        plt.title(title, fontsize=20)
-
-        # Take care of layout
-        plt.tight_layout()
-
-        # Show  
-        plt.show()                                                                
+        # Show or render to file
+        self.finish_figure(frame['fig'], out_file)
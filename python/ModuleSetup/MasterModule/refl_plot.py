@@ -1,7 +1,7 @@
 '''Class for plots of reflectivity on cartesian grids'''
 
 # Python modules
-import matplotlib.pyplot as plt
+import numpy as np
 from matplotlib.colors import LinearSegmentedColormap as lsc
 
 # MasterModule
@@ -32,59 +32,121 @@ class ReflPlot(GridPlot):
         '''
         super().__init__(grid_par, plot_par)
 
-    def make_plot(self, refl_array, title):
-        '''Create a plot of radar reflectivity on a cartesian grid
+    def draw_figure(
+            self, refl_array, title, out_file=None, vmin=None, vmax=None
+            ):
+        '''Draw a new figure of radar reflectivity
         
-        Plots interpolated reflectivity data on a cartesian grid 
-        using imshow.
-
         Args:
             refl_array (numpy.ndarray): Reflectivity data to be plotted.
             title (str): Title of plot.
+            out_file (str): Name of output file, or None for showing the
+                plot on the screen (see :any:`GridPlot.create_figure`).
+            vmin (float): Lower limit of colorbar. Defaults to the
+                minimum of the data.
+            vmax (float): Upper limit of colorbar. Defaults to the
+                maximum of the data.
+        
+        Returns:
+            (dict): Figure, axes, image and title of the plot.
         
         '''
-        # Create colormap for plot (continously changing colormap)                                                                    
+        # Create colormap for plot (continously changing colormap)
         cmap = lsc.from_list(
             'my colormap', ['white', 'blue', 'red', 'magenta']
             )
 
         # Create subplot
-        fig, ax = plt.subplots(figsize=(8,8))
+        fig, ax = self.create_figure((8,8), out_file)
 
         # Create imshow plot
-        plt.imshow(refl_array[::-1], cmap=cmap, zorder=1)                  
+        image = ax.imshow(
+            refl_array[::-1], cmap=cmap, vmin=vmin, vmax=vmax, zorder=1
+            )
         
         # Colorbar
-        cb = plt.colorbar()
+        cb = fig.colorbar(image, ax=ax)
         cb.set_label('reflectivity [dbz]', fontsize=18)
         cb.ax.tick_params(labelsize=16)
         
         # Plot the mask
-        plt.imshow(self.mask[::-1], cmap =self.cm_mask, zorder=2)
-        
-        # Set ticks
-        ax.set_xticks(self.lon_ticks)                
-        ax.set_yticks(self.lat_ticks)                
-       
-        # Set labels
-        ax.set_xticklabels(self.lon_label, fontsize=16)
-        ax.set_yticklabels(
-            self.lat_label, fontsize=16, rotation='horizontal'
-            )
-
-        # Grid
-        ax.grid(color='k')
-        ax.set_axisbelow(False)
-
-        # Label x- and y-axis                                                  
-        plt.xlabel('r_lon', fontsize=18)                                    
-        plt.ylabel('r_lat', fontsize=18)    
+        ax.imshow(self.mask[::-1], cmap=self.cm_mask, zorder=2)
+        
+        # Ticks, labels and grid
+        self.draw_axes(ax, 18)
         
         # Title 
-        plt.title(title, fontsize=20)   
+        title_text = ax.set_title(title, fontsize=20)
+        
+        # Return figure and its artists
+        return {'fig': fig, 'ax': ax, 'image': image, 'title': title_text}
+    
+    def make_animation(self, refl_cube, titles, out_file, fps=10):
+        '''Create an animation of radar reflectivity
+        
+        Animates a time series of interpolated reflectivity data, e.g.
+        all scans of a PATTERN file (see regrid_file.py). The colorbar
+        covers the range of the whole time series. Only the image and
+        the title are drawn for each frame (see
+        :any:`GridPlot.write_animation`).
         
-        # Prevent parts of the image to be cut off
-        plt.tight_layout()
+        Args:
+            refl_cube (numpy.ndarray): Reflectivity data to be plotted,
+                with shape (time, lat, lon).
+            titles (list): Title of each frame.
+            out_file (str): Name of output file, ending with '.gif' or
+                '.mp4'.
+            fps (float): Frames per second.
+        
+        '''
+        # Draw figure of first frame
+        frame = self.draw_figure(
+            refl_cube[0], titles[0], out_file,
+            vmin=np.nanmin(refl_cube), vmax=np.nanmax(refl_cube)
+            )
+        frame['fig'].tight_layout()
+        
+        # Update image and title for each frame
+        def update(i):
+            frame['image'].set_data(refl_cube[i][::-1])
+            frame['title'].set_text(titles[i])
+            return [frame['image'], frame['title']]
+        
+        # Write animation
+        self.write_animation(
+            frame['fig'], update, len(refl_cube), out_file, fps
+            )
+    
+    def make_plot(self, refl_array, title, out_file=None):
+        '''Create a plot of radar reflectivity on a cartesian grid
+        
+        Plots interpolated reflectivity data on a cartesian grid 
+        using imshow. If an output file is given, the plot is rendered
+        to this file instead of being shown. For all further output
+        files, only the data, color limits and title of the figure are
+        updated (see :any:`GridPlot`).
 
-        # Show  
-        plt.show()  
+        Args:
+            refl_array (numpy.ndarray): Reflectivity data to be plotted.
+            title (str): Title of plot.
+            out_file (str): Name of output file (e.g. '.png'), or None
+                for showing the plot on the screen.
+        
+        '''
+        # Reuse figure of previous plot, if rendering to files
+        if out_file is not None and self.frame is not None:
+            self.frame['image'].set_data(refl_array[::-1])
+            self.frame['image'].autoscale()
+            self.frame['title'].set_text(title)
+            self.finish_figure(self.frame['fig'], out_file)
+            return
+        
+        # Draw new figure
+        frame = self.draw_figure(refl_array, title, out_file)
+        
+        # Save figure for further plots
+        if out_file is not None:
+            self.frame = frame
+        
+        # Show or render to file
+        self.finish_figure(frame['fig'], out_file)
@@ -0,0 +1,149 @@
+'''Class for sparse regridding operators of cartesian grids'''
+
+# Python modules
+import numpy as np
+import scipy.sparse
+
+
+class RegridOperator(object):
+    '''Sparse linear operator interpolating radar data to a grid
+
+    For a fixed radar geometry and a fixed cartesian grid, averaging
+    all data points falling into the same grid box (see
+    :any:`CartesianGrid.data2grid`) is a constant linear operation.
+    This class builds it once out of an :any:`IndexMatrix` (or a weight
+    table, see :any:`CartesianGrid.create_weight_table`) as a
+    `scipy.sparse <https://docs.scipy.org/doc/scipy/reference/sparse.html>`_
+    CSR matrix with row-normalised weights. Applying it to a scan is a
+    single sparse matrix-vector product, applying it to a stack of
+    scans a single sparse matrix-matrix product.
+
+    Attributes:
+        box_shape (:any:`tuple`): Shape (lat_shape, lon_shape) of the
+            cartesian grid.
+        bin_shape (:any:`tuple`): Shape of a single input data array.
+        matrix (:any:`scipy.sparse.csr_matrix`): Regridding matrix with
+            one row per grid box and one column per input element.
+        empty (:any:`numpy.ndarray`): True for grid boxes without any
+            input element.
+        dtype (:any:`numpy.dtype`): Floating point data type of the
+            matrix and of the interpolated data.
+
+    '''
+
+    def __init__(self, index_matrix, dtype=np.float64):
+        '''Initialization of object
+
+        Builds the sparse regridding matrix out of an index matrix. The
+        weights are normalised in double precision and then converted
+        to the data type of the operator.
+
+        Args:
+            index_matrix (IndexMatrix): Index matrix of the cartesian
+                grid and the radar geometry.
+            dtype (numpy.dtype): Floating point data type of the matrix
+                and of the interpolated data.
+
+        '''
+        # Data type of matrix and interpolated data
+        self.dtype = np.dtype(dtype)
+
+        # Save shapes
+        self.box_shape = index_matrix.box_shape
+        self.bin_shape = index_matrix.bin_shape
+
+        # Number of grid boxes and of input elements
+        box_nr = int(np.prod(self.box_shape))
+        bin_nr = int(np.prod(self.bin_shape))
+
+        # Number of input elements per grid box
+        counts = np.diff(index_matrix.offsets)
+        self.empty = (counts == 0).reshape(self.box_shape)
+
+        # Weights of elements (all equal, if index matrix isn't weighted)
+        if index_matrix.weights is None:
+            weights = np.ones(index_matrix.indices.size)
+        else:
+            weights = np.array(index_matrix.weights, dtype=float)
+        
+        # Normalise weights, so that they sum up to 1 for each grid box
+        box_ids = index_matrix.get_box_ids()
+        sums = np.bincount(box_ids, weights=weights, minlength=box_nr)
+        weights = weights/sums[box_ids]
+
+        # Build sparse matrix (copy, in case index matrix is mem-mapped)
+        self.matrix = scipy.sparse.csr_matrix(
+            (weights.astype(self.dtype), np.array(index_matrix.indices),
+            np.array(index_matrix.offsets)),
+            shape=(box_nr, bin_nr)
+            )
+
+    def apply(self, refl_data, gain=1.0, offset=0.0):
+        '''Interpolate radar data to cartesian grid
+
+        Works for a single scan as well as for a stack of scans, whose
+        first dimension is time. Grid boxes without any data points are
+        set to NaN. Masked input values are not taken into account.
+        Raw counts can be interpolated directly, gain and offset are
+        applied to the averages then (see :any:`RadarData.get_refl_raw`).
+
+        Args:
+            refl_data (numpy.ndarray): Input reflectivity data, either
+                of shape bin_shape or of shape (time,) + bin_shape.
+            gain (float): Factor, the averaged data is multiplied with.
+            offset (float): Offset, which is added to the averaged data.
+
+        Returns:
+            (numpy.ndarray): To cartesian grid interpolated reflectivity
+            data of shape (lat_shape, lon_shape) or (time, lat_shape,
+            lon_shape) respectively.
+
+        Raises:
+            ValueError: If the shape of the input data doesn't fit.
+
+        '''
+        # Number of scans (None for a single scan)
+        if tuple(refl_data.shape) == self.bin_shape:
+            scan_nr = None
+        elif tuple(refl_data.shape[1:]) == self.bin_shape:
+            scan_nr = refl_data.shape[0]
+        else:
+            raise ValueError(
+                'input shape ' + str(refl_data.shape)
+                + ' does not fit operator input shape '
+                + str(self.bin_shape)
+                )
+
+        # One column per scan (also for an empty stack of scans)
+        column_nr = 1 if scan_nr is None else scan_nr
+        columns = np.reshape(
+            refl_data, (column_nr, int(np.prod(self.bin_shape)))
+            ).T
+
+        # Masked values: Average only over valid elements
+        if np.ma.isMaskedArray(columns):
+            valid = (~np.ma.getmaskarray(columns)).astype(self.dtype)
+            sums = self.matrix.dot(
+                np.ma.filled(columns, 0).astype(self.dtype, copy=False)
+                )
+            weights = self.matrix.dot(valid)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                refl = sums/weights
+            refl[weights == 0] = np.nan
+        else:
+            refl = self.matrix.dot(np.asarray(columns, dtype=self.dtype))
+
+        # Decode averaged raw counts
+        if gain != 1.0 or offset != 0.0:
+            refl = refl*self.dtype.type(gain) + self.dtype.type(offset)
+
+        # Empty grid boxes are NaN
+        refl[self.empty.ravel()] = np.nan
+
+        # Reshape to shape of the cartesian grid
+        refl = refl.T.reshape((column_nr,) + self.box_shape)
+        if scan_nr is None:
+            refl = refl[0]
+
+        # Return interpolated reflectivity
+        return refl
@@ -0,0 +1,222 @@
+'''Class for matching scans of two radars in time'''
+
+# Python modules
+import numpy as np
+
+# MasterModule
+from .radar_catalog import RadarCatalog
+
+
+class ScanMatcher(object):
+    '''Temporal co-location of scans of one radar with another radar
+
+    For a scan of one radar (e.g. a DWD scan), the scans of another
+    radar (e.g. PATTERN time steps) overlapping it in time are found by
+    binary search in the sorted starting and ending times, without
+    looping over all scans. The scans to search are usually taken from
+    a catalog (see :any:`RadarCatalog.query`).
+
+    The scan with the longest overlap is the best match (see
+    :any:`ScanMatcher.match`). Alternatively, all overlapping scans can
+    be averaged, weighted by their overlap (see
+    :any:`ScanMatcher.average`).
+
+    Attributes:
+        scans (:any:`list`): Scans to search, sorted by starting time.
+            Dicts with at least the keys 'time_start' and 'time_end'
+            (datetime), like the result of :any:`RadarCatalog.query`.
+        starts (:any:`numpy.ndarray`): Starting times of the scans in
+            seconds since 1970.
+        ends (:any:`numpy.ndarray`): Ending times of the scans in
+            seconds since 1970.
+        max_ends (:any:`numpy.ndarray`): Latest ending time of all
+            scans up to each scan. Is sorted, even if scans overlap.
+        max_gap (:any:`float`): Maximum gap in seconds between two
+            scans, which don't overlap, but still match.
+
+    '''
+
+    def __init__(self, scans, max_gap=0):
+        '''Initialization of object
+
+        Sorts the scans by their starting time.
+
+        Args:
+            scans (list): Scans to search, e.g. the result of
+                :any:`RadarCatalog.query` for one radar.
+            max_gap (float): Maximum gap in seconds between two scans,
+                which don't overlap, but still match.
+
+        '''
+        self.max_gap = max_gap
+
+        # Sort scans by starting time
+        self.scans = sorted(scans, key=lambda scan: scan['time_start'])
+
+        # Starting and ending times in seconds
+        self.starts = np.array(
+            [RadarCatalog.to_seconds(s['time_start']) for s in self.scans],
+            dtype=float
+            )
+        self.ends = np.array(
+            [RadarCatalog.to_seconds(s['time_end']) for s in self.scans],
+            dtype=float
+            )
+
+        # Latest ending time up to each scan (sorted)
+        self.max_ends = np.maximum.accumulate(self.ends)
+
+    @staticmethod
+    def average(refl_steps, weights):
+        '''Weighted time average of scans
+
+        NaN and masked values are not taken into account. Grid boxes or
+        data points without any valid value are masked, like in a
+        single scan, so interpolation (see :any:`RegridOperator.apply`)
+        only averages over valid data points.
+
+        Args:
+            refl_steps (numpy.ndarray): Reflectivity of several scans,
+                with time as first dimension.
+            weights (numpy.ndarray): Weight of each scan, e.g. the
+                overlap returned by :any:`ScanMatcher.find`.
+
+        Returns:
+            (numpy.ma.MaskedArray): Averaged reflectivity, with the
+            shape of a single scan.
+
+        '''
+        # Valid values, invalid values set to 0
+        data = np.ma.masked_invalid(refl_steps)
+        valid = ~np.ma.getmaskarray(data)
+        values = np.ma.filled(data, 0)
+
+        # Weighted sum and sum of weights over time (in one pass each)
+        weights = np.asarray(weights, dtype=values.dtype)
+        sums = np.tensordot(weights, values, axes=1)
+        norms = np.tensordot(weights, valid, axes=1)
+
+        # Weighted mean, masked without valid values
+        refl = np.full(sums.shape, np.nan, dtype=values.dtype)
+        np.divide(sums, norms, out=refl, where=norms > 0)
+
+        # Return average
+        return np.ma.masked_invalid(refl)
+
+    def find(self, time_start, time_end):
+        '''Find all scans overlapping a time window
+
+        Args:
+            time_start (datetime.datetime): Start of the time window,
+                e.g. :any:`RadarData.time_start` of a scan.
+            time_end (datetime.datetime): End of the time window.
+
+        Returns:
+            (tuple): Indices of the overlapping scans in
+            :any:`ScanMatcher.scans` and their overlap in seconds (both
+            numpy.ndarray). Scans within max_gap have a negative
+            overlap (the gap).
+
+        '''
+        # Window in seconds
+        start = RadarCatalog.to_seconds(time_start)
+        end = RadarCatalog.to_seconds(time_end)
+
+        # Candidates by binary search: starting before end of window,
+        # ending after start of window
+        first = np.searchsorted(self.max_ends, start - self.max_gap)
+        last = np.searchsorted(
+            self.starts, end + self.max_gap, side='right'
+            )
+        indices = np.arange(first, last)
+
+        # Overlap of candidates (negative for gaps)
+        overlaps = (
+            np.minimum(self.ends[indices], end)
+            - np.maximum(self.starts[indices], start)
+            )
+        keep = overlaps >= -self.max_gap
+
+        # Return indices and overlaps
+        return indices[keep], overlaps[keep]
+
+    def match(self, time_start, time_end):
+        '''Find the scan with the longest overlap
+
+        If several scans overlap equally long (e.g. scans without
+        duration), the one with the nearest middle is taken.
+
+        Args:
+            time_start (datetime.datetime): Start of the time window,
+                e.g. :any:`RadarData.time_start` of a scan.
+            time_end (datetime.datetime): End of the time window.
+
+        Returns:
+            (dict): Best matching scan, or None, if no scan overlaps
+            the window (or lies within max_gap).
+
+        '''
+        # Overlapping scans
+        indices, overlaps = self.find(time_start, time_end)
+        if indices.size == 0:
+            return None
+
+        # Distance between middles of scans and window
+        middle = (
+            RadarCatalog.to_seconds(time_start)
+            + RadarCatalog.to_seconds(time_end)
+            )/2
+        distances = np.abs(
+            (self.starts[indices] + self.ends[indices])/2 - middle
+            )
+
+        # Longest overlap, then nearest middle
+        best = np.lexsort((distances, -overlaps))[0]
+
+        # Return best matching scan
+        return self.scans[indices[best]]
+
+    def match_all(self, time_start, time_end):
+        '''Find all scans to be averaged over a time window
+
+        Only scans of the data file of the best match (see
+        :any:`ScanMatcher.match`) are taken, as scans can only be read
+        together from one file.
+
+        Args:
+            time_start (datetime.datetime): Start of the time window,
+                e.g. :any:`RadarData.time_start` of a scan.
+            time_end (datetime.datetime): End of the time window.
+
+        Returns:
+            (tuple): Overlapping scans (list, sorted by time) and their
+            weights for :any:`ScanMatcher.average` (numpy.ndarray), the
+            overlap in seconds. Equal weights, if no scan overlaps for
+            a positive duration. Empty, if no scan matches.
+
+        '''
+        # Best match
+        best = self.match(time_start, time_end)
+        if best is None:
+            return [], np.array([])
+
+        # Overlapping scans of the same file
+        indices, overlaps = self.find(time_start, time_end)
+        keep = [
+            i for i, index in enumerate(indices)
+            if self.scans[index]['file'] == best['file']
+            ]
+        scans = [self.scans[indices[i]] for i in keep]
+
+        # Weights: Overlap (scans only touching the window or within
+        # max_gap are left out), or equal weights for scans without
+        # duration
+        weights = np.maximum(overlaps[keep], 0)
+        if np.any(weights > 0):
+            scans = [scan for scan, w in zip(scans, weights) if w > 0]
+            weights = weights[weights > 0]
+        else:
+            weights = np.ones(len(scans))
+
+        # Return scans and weights
+        return scans, weights
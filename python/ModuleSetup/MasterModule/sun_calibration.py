@@ -0,0 +1,332 @@
+'''Class for calibrating the azimuth offset of radars with the sun'''
+
+# Python modules
+import json
+import os
+import numpy as np
+from datetime import datetime
+
+
+class SunCalibration(object):
+    '''Calibration of the azimuth offset of a radar with sun hits
+
+    At sunrise and sunset, the sun is seen by the radar as a line of
+    increased reflectivity along one azimuth (see
+    :any:`Radar.get_sun_azimuth`). Comparing this azimuth to the
+    calculated azimuth of the sun at the time of the scan gives the
+    offset, by which the azimuth angles of the radar are rotated.
+
+    Sun hits are detected file by file (see
+    :any:`SunCalibration.detect`), only scans with the sun at the
+    elevation of the radar beam are read. The offset is fitted for each
+    day (see :any:`SunCalibration.fit_offset`) and saved to a file
+    '<calib_dir>/<radar id>/<YYYY-mm-dd>.json' (see
+    :any:`SunCalibration.get_radar_id`). Radars with the offset 'auto'
+    load the offset of the nearest calibrated day (see
+    :any:`SunCalibration.load_offset`).
+
+    Attributes:
+        calib_dir (:any:`str`): Directory of the calibration files.
+        max_ele_diff (:any:`float`): Maximum difference between the
+            elevation of the sun and of the radar beam in degrees, for
+            which a scan is searched for the sun.
+        max_dev (:any:`float`): Maximum deviation of a single sun hit
+            from the median offset of the day in degrees. Sun hits
+            deviating more (e.g. due to rain) are not used for the fit.
+        min_hits (:any:`int`): Minimum number of sun hits of a day, for
+            which an offset is fitted.
+
+    '''
+
+    def __init__(
+            self, calib_dir, max_ele_diff=2.0, max_dev=2.0, min_hits=3
+            ):
+        '''Initialization of object
+
+        Args:
+            calib_dir (str): Directory of the calibration files. Is
+                created, when the first offset is saved.
+            max_ele_diff (float): Maximum difference between the
+                elevation of the sun and of the radar beam in degrees.
+            max_dev (float): Maximum deviation of a single sun hit from
+                the median offset of the day in degrees.
+            min_hits (int): Minimum number of sun hits of a day.
+
+        '''
+        self.calib_dir = calib_dir
+        self.max_ele_diff = max_ele_diff
+        self.max_dev = max_dev
+        self.min_hits = min_hits
+
+    def detect(self, radar, radar_par):
+        '''Detect sun hits in all scans of one data file
+
+        Reads the times of all scans first. Only the scans, at which the
+        sun is at the elevation of the radar beam, are read in and
+        searched for the sun. Thus, most files are not read at all.
+
+        Args:
+            radar (Radar): Radar object with the offset 0 and the
+                methods read_times and read_file_all (e.g.
+                :any:`PatternRadar`).
+            radar_par (dict): Radar parameters, including the name of
+                the data file.
+
+        Returns:
+            (tuple): Times of scans with sun hits (list of datetime),
+            azimuth angles of the sun hits as seen by the radar and
+            calculated azimuth angles of the sun (both numpy.ndarray).
+
+        '''
+        # Times of all scans and position of the sun at these times
+        times = radar.read_times(radar_par)
+        sun_azi, sun_ele = self.get_sun_position(
+            times, radar.data.lon_site, radar.data.lat_site
+            )
+
+        # Scans with the sun at the elevation of the radar beam
+        ele_diff = np.abs(sun_ele - np.mean(radar.data.ele))
+        steps = np.flatnonzero(ele_diff <= self.max_ele_diff)
+        if steps.size == 0:
+            return [], np.array([]), np.array([])
+
+        # Read in only these scans and find the sun
+        radar.read_file_all(radar_par, steps=steps.tolist())
+        radar_azi = radar.get_sun_azimuth(radar.data.refl_steps)
+
+        # Return times, azimuth angles of radar and sun
+        return [times[i] for i in steps], radar_azi, sun_azi[steps]
+
+    def fit_offset(self, radar_azi, sun_azi):
+        '''Fit the azimuth offset to sun hits
+
+        The offset of each sun hit is the calculated azimuth of the sun
+        minus the azimuth seen by the radar (wrapped to -180° to 180°).
+        Sun hits deviating more than max_dev from the median are
+        rejected, the offset is the mean of the remaining ones.
+
+        Args:
+            radar_azi (numpy.ndarray): Azimuth angles of the sun hits as
+                seen by the radar (with the offset 0).
+            sun_azi (numpy.ndarray): Calculated azimuth angles of the
+                sun.
+
+        Returns:
+            (dict): Fitted offset 'offset', its standard error
+            'offset_err' (None for a single sun hit), standard deviation
+            'offset_std' of the single sun hits (None for a single sun
+            hit) and the number 'hits' of sun hits used. None, if less
+            than min_hits sun hits are left.
+
+        '''
+        # Offsets of single sun hits
+        diff = (np.asarray(sun_azi) - np.asarray(radar_azi) + 180) % 360
+        diff = diff - 180
+        if diff.size == 0:
+            return None
+
+        # Reject outliers (relative to the median, across 180°)
+        median = np.median(diff)
+        dev = (diff - median + 180) % 360 - 180
+        dev = dev[np.abs(dev) <= self.max_dev]
+        if dev.size < max(self.min_hits, 1):
+            return None
+
+        # Mean offset and its uncertainty
+        offset = (median + np.mean(dev) + 180) % 360 - 180
+        if dev.size > 1:
+            offset_std = float(np.std(dev, ddof=1))
+            offset_err = float(offset_std/np.sqrt(dev.size))
+        else:
+            offset_std = None
+            offset_err = None
+
+        # Return result of fit
+        return {
+            'offset': float(offset),
+            'offset_err': offset_err,
+            'offset_std': offset_std,
+            'hits': int(dev.size),
+            }
+
+    @staticmethod
+    def get_radar_id(name, lon, lat):
+        '''Get name of the calibration directory of a radar
+
+        Radars are identified by their name and the coordinates of
+        their site, rounded to 4 decimal places.
+
+        Args:
+            name (str): Name of the radar.
+            lon (float): Longitude of the radar site.
+            lat (float): Latitude of the radar site.
+
+        Returns:
+            (str): Identifier of the radar.
+
+        '''
+        return '{}_{:.4f}_{:.4f}'.format(name, float(lon), float(lat))
+
+    @staticmethod
+    def get_sun_position(times, lon, lat):
+        '''Calculate the position of the sun
+
+        Uses the equations of the NOAA solar calculator (accurate to
+        about 0.01° for the azimuth). Refraction is neglected.
+
+        Args:
+            times (list): Times (UTC) as datetime objects.
+            lon (float): Longitude of the observer.
+            lat (float): Latitude of the observer.
+
+        Returns:
+            (tuple): Azimuth angles (from north, clockwise) and
+            elevation angles of the sun in degrees (numpy.ndarray).
+
+        '''
+        # Seconds since 1970 and julian century
+        seconds = (
+            np.array(times, dtype='datetime64[ms]').astype(float)/1000
+            )
+        jc = (seconds/86400 + 2440587.5 - 2451545)/36525
+
+        # Geometric mean longitude and anomaly of the sun, eccentricity
+        # of the earth's orbit
+        mean_long = (280.46646 + jc*(36000.76983 + jc*0.0003032)) % 360
+        mean_anom = np.radians(357.52911 + jc*(35999.05029 - 0.0001537*jc))
+        ecc = 0.016708634 - jc*(0.000042037 + 0.0000001267*jc)
+
+        # Apparent longitude of the sun
+        center = (
+            np.sin(mean_anom)*(1.914602 - jc*(0.004817 + 0.000014*jc))
+            + np.sin(2*mean_anom)*(0.019993 - 0.000101*jc)
+            + np.sin(3*mean_anom)*0.000289
+            )
+        omega = np.radians(125.04 - 1934.136*jc)
+        app_long = np.radians(
+            mean_long + center - 0.00569 - 0.00478*np.sin(omega)
+            )
+
+        # Obliquity of the ecliptic and declination of the sun
+        obliq = np.radians(
+            23 + (26 + (21.448 - jc*(
+                46.815 + jc*(0.00059 - jc*0.001813)
+                ))/60)/60
+            + 0.00256*np.cos(omega)
+            )
+        decl = np.arcsin(np.sin(obliq)*np.sin(app_long))
+
+        # Equation of time in minutes
+        mean_long = np.radians(mean_long)
+        var_y = np.tan(obliq/2)**2
+        eq_time = 4*np.degrees(
+            var_y*np.sin(2*mean_long)
+            - 2*ecc*np.sin(mean_anom)
+            + 4*ecc*var_y*np.sin(mean_anom)*np.cos(2*mean_long)
+            - 0.5*var_y**2*np.sin(4*mean_long)
+            - 1.25*ecc**2*np.sin(2*mean_anom)
+            )
+
+        # Hour angle from true solar time
+        solar_time = ((seconds % 86400)/60 + eq_time + 4*lon) % 1440
+        hour_angle = np.radians(solar_time/4 - 180)
+
+        # Elevation of the sun
+        lat = np.radians(lat)
+        cos_zenith = (
+            np.sin(lat)*np.sin(decl)
+            + np.cos(lat)*np.cos(decl)*np.cos(hour_angle)
+            )
+        zenith = np.arccos(np.clip(cos_zenith, -1, 1))
+
+        # Azimuth of the sun (from north, clockwise)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cos_azi = (
+                (np.sin(lat)*np.cos(zenith) - np.sin(decl))
+                / (np.cos(lat)*np.sin(zenith))
+                )
+        azi = np.degrees(np.arccos(np.clip(cos_azi, -1, 1)))
+        azi = np.where(hour_angle > 0, azi + 180, 540 - azi) % 360
+
+        # Return azimuth and elevation
+        return azi, 90 - np.degrees(zenith)
+
+    def load_offset(self, name, lon, lat, day):
+        '''Load the fitted offset of the nearest calibrated day
+
+        Args:
+            name (str): Name of the radar.
+            lon (float): Longitude of the radar site.
+            lat (float): Latitude of the radar site.
+            day (datetime.date): Day, the offset is needed for.
+
+        Returns:
+            (float): Fitted offset in degrees.
+
+        Raises:
+            ValueError: If the radar was never calibrated.
+
+        '''
+        # Calibrated days of this radar
+        radar_dir = os.path.join(
+            self.calib_dir, self.get_radar_id(name, lon, lat)
+            )
+        if os.path.isdir(radar_dir):
+            days = [
+                datetime.strptime(calib_file[:-len('.json')], '%Y-%m-%d')
+                for calib_file in os.listdir(radar_dir)
+                if calib_file.endswith('.json')
+                ]
+        else:
+            days = []
+        if not days:
+            raise ValueError('no sun calibration in ' + radar_dir)
+
+        # Nearest calibrated day (the earlier one, if two are nearest)
+        nearest = min(
+            days,
+            key=lambda calib_day: (
+                abs((calib_day.date() - day).days), calib_day
+                )
+            )
+
+        # Read offset
+        calib_file = os.path.join(
+            radar_dir, nearest.strftime('%Y-%m-%d') + '.json'
+            )
+        with open(calib_file) as calib:
+            return json.load(calib)['offset']
+
+    def save_offset(self, name, lon, lat, day, result):
+        '''Save the fitted offset of one day
+
+        Args:
+            name (str): Name of the radar.
+            lon (float): Longitude of the radar site.
+            lat (float): Latitude of the radar site.
+            day (datetime.date): Day of the sun hits.
+            result (dict): Result of :any:`SunCalibration.fit_offset`.
+
+        Returns:
+            (str): Name of the calibration file.
+
+        '''
+        # Directory of this radar
+        radar_dir = os.path.join(
+            self.calib_dir, self.get_radar_id(name, lon, lat)
+            )
+        os.makedirs(radar_dir, exist_ok=True)
+
+        # Save result together with radar and day
+        calib_file = os.path.join(radar_dir, str(day) + '.json')
+        with open(calib_file, 'w') as calib:
+            json.dump(
+                dict(
+                    result, radar=name, lon_site=float(lon),
+                    lat_site=float(lat), day=str(day)
+                    ),
+                calib, indent=4, sort_keys=True
+                )
+
+        # Return name of file
+        return calib_file
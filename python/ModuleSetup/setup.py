@@ -22,6 +22,7 @@ packages = find_packages(),
 install_requires = 
 	['numpy',
 	'h5py',
-	'netCDF4']
+	'netCDF4',
+	'scipy']
 
 )
@@ -0,0 +1,150 @@
+'''
+This program creates an animation (GIF or MP4) of interpolated
+reflectivity or of reflectivity differences over a time window.
+
+'''
+
+
+
+
+
+########################################################################
+### modules and functions ###
+########################################################################
+
+'''
+Imports modules and functions needed for this program.
+
+'''
+# Python modules
+import glob
+import numpy as np
+from datetime import datetime
+from netCDF4 import Dataset
+
+# MasterModule
+from MasterModule.refl_diff_plot import ReflDiffPlot
+from MasterModule.refl_plot import ReflPlot
+
+# Parameter
+import parameters as par
+
+
+
+
+
+########################################################################
+### parameters ###
+########################################################################
+
+'''
+Some parameters, that can be set in parameters.py.
+
+'''
+grid_par = par.grid_par
+plot_par = par.plot_par
+anim_par = par.anim_par
+
+# Time window (whole input, if not given)
+if anim_par.get('start'):
+    start = datetime.strptime(anim_par['start'], '%Y-%m-%d %H:%M:%S')
+else:
+    start = datetime.min
+if anim_par.get('end'):
+    end = datetime.strptime(anim_par['end'], '%Y-%m-%d %H:%M:%S')
+else:
+    end = datetime.max
+
+
+
+
+
+########################################################################
+### Read in data ###
+########################################################################
+
+'''
+For reflectivity (anim_par['mode'] = 'refl'), the time steps are read
+from a cube file written by regrid_file.py. For differences
+(anim_par['mode'] = 'diff'), they are read from the '.npz'-files
+written by difference_batch.py. Only time steps inside of the time
+window are read.
+
+'''
+# Reflectivity of a cube file
+if anim_par['mode'] == 'refl':
+    with Dataset(anim_par['file'], mode='r') as nc:
+        times = [
+            datetime.utcfromtimestamp(float(t))
+            for t in nc.variables['time_start'][:]
+            ]
+        steps = [i for i, t in enumerate(times) if start <= t <= end]
+        if steps:
+            refl = np.ma.filled(nc.variables['refl'][steps], np.nan)
+    times = [times[i] for i in steps]
+
+# Reflectivity of both radars of difference files
+elif anim_par['mode'] == 'diff':
+    l_refl1 = []
+    l_refl2 = []
+    times = []
+    for diff_file in sorted(glob.glob(anim_par['file'])):
+        with np.load(diff_file) as results:
+            time = results['time1'].item()
+            if not start <= time <= end:
+                continue
+            l_refl1.append(results['refl1'])
+            l_refl2.append(results['refl2'])
+            names = (str(results['name1']), str(results['name2']))
+            times.append(time)
+
+    # Sort by time
+    order = np.argsort(times)
+    times = [times[i] for i in order]
+    refl1 = np.array(l_refl1)[order]
+    refl2 = np.array(l_refl2)[order]
+
+else:
+    raise ValueError('unknown mode ' + str(anim_par['mode']))
+
+# Check, if there is data in the time window
+if not times:
+    raise ValueError(
+        'no time step between ' + str(start) + ' and ' + str(end)
+        + ' in ' + anim_par['file']
+        )
+
+# Title of each frame
+titles = [
+    str(t.time()) + ' UTC\n' + str(t.date()) for t in times
+    ]
+
+
+
+
+
+########################################################################
+### Create animation ###
+########################################################################
+
+'''
+Labels and colorbar are drawn only once, for each frame only the
+changing parts and the parts in front of them (mask, grid lines) are
+drawn (see GridPlot.write_animation).
+
+'''
+# Animation of reflectivity
+if anim_par['mode'] == 'refl':
+    refl_plot = ReflPlot(grid_par, plot_par)
+    refl_plot.make_animation(
+        refl, titles, anim_par['out_file'], anim_par.get('fps', 10)
+        )
+
+# Animation of differences (2nd minus 1st radar)
+else:
+    refl_diff_plot = ReflDiffPlot(grid_par, plot_par)
+    titles = [names[1] + ' minus ' + names[0] + ': ' + t for t in titles]
+    refl_diff_plot.make_animation(
+        refl1, refl2, names[0], names[1], titles, anim_par['out_file'],
+        anim_par.get('fps', 10)
+        )
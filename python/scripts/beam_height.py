@@ -16,15 +16,12 @@ Imports modules and functions needed for this program.
 
 '''
 # Python modules 
-import re                                    
 import numpy as np 
 
 # MasterModule
 from MasterModule.cartesian_grid import CartesianGrid                           
-from MasterModule.dwd_radar import DwdRadar 
 from MasterModule.heights_plot import HeightsPlot  
-from MasterModule.pattern_radar import PatternRadar
-from MasterModule.pattern_radar_v2 import PatternRadarV2
+from MasterModule.reader_registry import ReaderRegistry
 
 # Parameters
 import parameters as par 
@@ -63,20 +60,12 @@ Creates following objects:
 - CartesianGrid for interpolating data to Cartesian Grid
 - HeightsPlot for plotting heights
 
-Creates the correct radar object after scanning (using regular 
-expressions) the file_name, which contains information about the radar
-and processing step.
+Creates the correct radar object after detecting the format of the 
+data file from its content (see ReaderRegistry), not from its name.
 
 '''
-# dwd radars
-if re.search('dwd', radar_par['file']):
-    radar = DwdRadar(radar_par)
-# pattern with version1 processing
-elif re.search('version1', radar_par['file']):
-    radar = PatternRadar(radar_par)
-# pattern with version2 processing
-elif re.search('version2', radar_par['file']):
-    radar = PatternRadarV2(radar_par)
+# Radar object of the format of the data file
+radar = ReaderRegistry.create_radar(radar_par)
 
 # Cartesian Grid object
 car_grid = CartesianGrid(grid_par)
@@ -93,10 +82,12 @@ heights_plot = HeightsPlot(grid_par, plot_par)
 ########################################################################
 
 '''
-Reads in data, by calling the read_file method.
+Reads in data, by calling the read_file method. Only meta data is 
+needed for the beam heights, so the reflectivity is read lazily (never
+read from the file at all).
 
 '''
-radar.read_file(radar_par)
+radar.read_file(radar_par, lazy=True)
 
 
 
@@ -17,15 +17,12 @@ Imports modules and functions needed for this program.
 
 '''
 # Python modules
-import re                    
 import numpy as np  
 
 # MasterModule 
 from MasterModule.cartesian_grid import CartesianGrid                          
-from MasterModule.dwd_radar import DwdRadar  
 from MasterModule.heights_plot import HeightsPlot
-from MasterModule.pattern_radar import PatternRadar
-from MasterModule.pattern_radar_v2 import PatternRadarV2
+from MasterModule.reader_registry import ReaderRegistry
 
 # Functions
 from functions import rotate_pole
@@ -68,32 +65,15 @@ Creates all objects needed:
 - CartesianGrid for interpolating data to Cartesian Grid.
 - HeightsPlot for plotting height differences.
 
-Creates the correct radar object after scanning (using regular 
-expressions) the file_name, which contains information about the radar
-and processing step.
+Creates the correct radar object after detecting the format of the 
+data file from its content (see ReaderRegistry), not from its name.
 
 '''
 # First radar
-# For dwd radars
-if re.search('dwd', radar1_par['file']):
-    radar1 = DwdRadar(radar1_par)
-# pattern with version1 processing
-elif re.search('version1', radar1_par['file']):
-    radar1 = PatternRadar(radar1_par)
-# pattern with version2 processing
-elif re.search('version2', radar1_par['file']):
-    radar1 = PatternRadarV2(radar1_par)
+radar1 = ReaderRegistry.create_radar(radar1_par)
 
 # Second radar
-# For dwd radars
-if re.search('dwd', radar2_par['file']):
-    radar2 = DwdRadar(radar2_par)
-# pattern with version1 processing
-elif re.search('version1', radar2_par['file']):
-    radar2 = PatternRadar(radar2_par)
-# pattern with version2 processing
-elif re.search('version2', radar2_par['file']):
-    radar2 = PatternRadarV2(radar2_par)
+radar2 = ReaderRegistry.create_radar(radar2_par)
 
 # Create list of both radar objectives, for easy looping
 radars = [radar1, radar2]
@@ -113,11 +93,13 @@ heights_plot = HeightsPlot(grid_par, plot_par)
 ########################################################################
 
 '''
-Read in data of the two radar data files.
+Read in data of the two radar data files. Only meta data is needed for
+the beam heights, so the reflectivity is read lazily (never read from 
+the files at all).
 
 '''
-radar1.read_file(radar1_par)
-radar2.read_file(radar2_par)
+radar1.read_file(radar1_par, lazy=True)
+radar2.read_file(radar2_par, lazy=True)
 
 
 
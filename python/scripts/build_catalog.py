@@ -0,0 +1,95 @@
+'''
+This program builds (or updates) a catalog of all scans in directories
+of radar data files. Afterwards, the scans of a time window can be
+listed without opening any data file.
+
+'''
+
+
+
+
+
+########################################################################
+### modules ###
+########################################################################
+
+'''
+Import modules needed for this program.
+
+'''
+# Python modules
+from datetime import datetime
+
+# MasterModule
+from MasterModule.radar_catalog import RadarCatalog
+
+# Parameters
+import parameters as par
+
+
+
+
+
+########################################################################
+### parameters ###
+########################################################################
+
+'''
+Get parameters. Parameters can be set in parameters.py.
+
+'''
+catalog_par = par.catalog_par
+
+# Catalog object (database is created, if not present yet)
+catalog = RadarCatalog(catalog_par.get('db_file', '../radar_catalog.db'))
+
+
+
+
+
+########################################################################
+### Update catalog ###
+########################################################################
+
+'''
+All data files in the given paths are added to the catalog. Only new
+and changed files are opened, only their times and meta data are read.
+
+'''
+read_nr, skipped_nr = catalog.update(catalog_par['paths'])
+print(
+    str(read_nr) + ' files read, ' + str(skipped_nr)
+    + ' files of unknown format skipped'
+    )
+
+
+
+
+
+########################################################################
+### List scans ###
+########################################################################
+
+'''
+If a time window is given, all scans of this window are listed, with
+file name and minute (as needed for radar_par in parameters.py).
+
+'''
+if 'start' in catalog_par:
+
+    # Scans of the time window
+    scans = catalog.query(
+        datetime.strptime(catalog_par['start'], '%Y-%m-%d %H:%M:%S'),
+        datetime.strptime(catalog_par['end'], '%Y-%m-%d %H:%M:%S'),
+        catalog_par.get('radar')
+        )
+
+    # Print scans
+    for scan in scans:
+        print(
+            str(scan['time_start']) + '  ' + scan['radar_id'] + '  '
+            + scan['file'] + '  minute ' + str(scan['minute'])
+            )
+
+# Close catalog
+catalog.close()
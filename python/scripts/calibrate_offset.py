@@ -0,0 +1,140 @@
+'''
+This program calibrates the azimuth offset of PATTERN radars, using the
+signal of the sun at sunrise and sunset. The offset is fitted for each
+radar and day and saved, so that radars with the offset 'auto' can load
+it.
+
+'''
+
+
+
+
+
+########################################################################
+### modules ###
+########################################################################
+
+'''
+Import modules needed for this program.
+
+'''
+# Python modules
+import glob
+import os
+import numpy as np
+
+# MasterModule
+from MasterModule.reader_registry import ReaderRegistry
+from MasterModule.sun_calibration import SunCalibration
+
+# Parameters
+import parameters as par
+
+
+
+
+
+########################################################################
+### parameters, data files ###
+########################################################################
+
+'''
+Get parameters. Parameters can be set in parameters.py. radar1_par
+serves as template, only the file name is replaced for each data file.
+
+'''
+# Parameter
+radar_par = par.radar1_par
+calib_par = par.calib_par
+
+# Data files: a directory, a glob pattern or a single file
+if os.path.isdir(calib_par['files']):
+    files = sorted(glob.glob(os.path.join(calib_par['files'], '*.nc')))
+else:
+    files = sorted(glob.glob(calib_par['files']))
+
+# Calibration object
+calibration = SunCalibration(
+    calib_par.get('calib_dir', '../sun_calibration'),
+    max_ele_diff=calib_par.get('max_ele_diff', 2.0),
+    max_dev=calib_par.get('max_dev', 2.0),
+    min_hits=calib_par.get('min_hits', 3)
+    )
+
+# Sun hits for each radar and day (azimuth of radar and of sun)
+hits = {}
+
+
+
+
+
+########################################################################
+### Detect sun hits ###
+########################################################################
+
+'''
+Data files are processed one after another. Of each file, only the
+scans with the sun at the elevation of the radar beam are read in, so
+months of data files can be processed. Azimuth angles are calculated
+with the offset 0.
+
+'''
+for data_file in files:
+
+    # Parameters of this file (without offset)
+    file_par = dict(radar_par, file=data_file, offset=0)
+
+    # Radar object of the format of the data file (only PATTERN)
+    radar = ReaderRegistry.create_radar(
+        file_par, formats=('pattern_v1', 'pattern_v2')
+        )
+
+    # Sun hits of this file
+    times, radar_azi, sun_azi = calibration.detect(radar, file_par)
+
+    # Sort sun hits by radar and day
+    for time, azi1, azi2 in zip(times, radar_azi, sun_azi):
+        key = (
+            radar.name, float(radar.data.lon_site),
+            float(radar.data.lat_site), time.date()
+            )
+        hits.setdefault(key, ([], []))
+        hits[key][0].append(azi1)
+        hits[key][1].append(azi2)
+
+
+
+
+
+########################################################################
+### Fit offsets ###
+########################################################################
+
+'''
+Fits and saves the offset for each radar and day with enough sun hits.
+
+'''
+for key in sorted(hits):
+
+    # Fit offset
+    result = calibration.fit_offset(
+        np.array(hits[key][0]), np.array(hits[key][1])
+        )
+
+    # Too few sun hits
+    if result is None:
+        print(str(key[3]) + ': too few sun hits')
+        continue
+
+    # Save offset
+    calibration.save_offset(*key, result)
+
+    # Print offset
+    if result['offset_err'] is None:
+        error = ''
+    else:
+        error = ' +- ' + '{:.2f}'.format(result['offset_err'])
+    print(
+        str(key[3]) + ': offset ' + '{:.2f}'.format(result['offset'])
+        + error + ' (' + str(result['hits']) + ' sun hits)'
+        )
@@ -0,0 +1,402 @@
+'''
+This program calculates the reflectivity differences of two radars on a
+cartesian grid (like difference_plot.py) for a whole list of data file
+pairs and minutes. The time steps are distributed over a pool of
+processes and the results are saved to one '.npz'-file per time step.
+Statistics of all differences (count, mean, variance, histogram per
+grid box) are accumulated over all time steps.
+
+'''
+
+
+
+
+
+########################################################################
+### modules and functions ###
+########################################################################
+
+'''
+Imports modules and functions needed for this program.
+
+'''
+# Python modules
+import glob
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# MasterModule
+from MasterModule.cartesian_grid import CartesianGrid
+from MasterModule.coord_cache import CoordCache
+from MasterModule.diff_accumulator import DiffAccumulator
+from MasterModule.index_registry import IndexRegistry
+from MasterModule.radar_catalog import RadarCatalog
+from MasterModule.reader_registry import ReaderRegistry
+from MasterModule.refl_diff_plot import ReflDiffPlot
+from MasterModule.scan_matcher import ScanMatcher
+
+# Parameter
+import parameters as par
+
+# Functions
+from functions import get_index_dir, get_rot_coords
+
+
+
+
+
+########################################################################
+### parameters ###
+########################################################################
+
+'''
+Some parameters, that can be set in parameters.py. radar1_par and
+radar2_par serve as templates, only the file name and the minute are
+replaced for each time step.
+
+'''
+grid_par = par.grid_par
+radar1_par = par.radar1_par
+radar2_par = par.radar2_par
+plot_par = par.plot_par
+batch_par = par.batch_par
+method = grid_par.get('method', 'index')
+
+# CartesianGrid object
+car_grid = CartesianGrid(grid_par)
+
+# Mask of grid boxes exceeding the maximum range
+mask = car_grid.get_mask(plot_par['max_range'])
+
+# Regridding operators, for each radar geometry (per process)
+operators = {}
+
+
+
+
+
+########################################################################
+### functions ###
+########################################################################
+
+'''
+Functions run by the worker processes. Each worker keeps the regridding
+operators it loaded, so each index matrix is loaded only once per
+process.
+
+'''
+def get_operator(radar):
+    '''Get regridding operator of radar geometry (loaded only once)'''
+    # Operators are saved for each geometry
+    key = CoordCache.get_key(radar.get_geometry())
+    if key not in operators:
+        lon, lat = get_rot_coords(radar, method)
+        index_dir = get_index_dir(car_grid, radar, lon, lat, method)
+        operators[key] = car_grid.get_regrid_operator(
+            index_dir, radar.data.refl_field.shape,
+            IndexRegistry.get_res_fac(radar, method)
+            )
+    return operators[key]
+
+
+def diff_step(job):
+    '''Interpolate both radars of one time step and save differences'''
+    # Interpolate both radars to the cartesian grid
+    l_refl = []
+    l_time = []
+    l_name = []
+    for radar_par in job:
+        radar = ReaderRegistry.create_radar(radar_par)
+
+        # Weighted time average of several time steps (of a PATTERN file)
+        if 'steps' in radar_par:
+            radar.read_file_all(radar_par, steps=radar_par['steps'])
+            radar.data.refl = ScanMatcher.average(
+                radar.data.refl_steps, radar_par['weights']
+                )
+        else:
+            radar.read_file(radar_par)
+
+        refl = get_operator(radar).apply(*radar.data.get_refl_raw())
+        refl[refl < plot_par['rain_th']] = plot_par['rain_th']
+        l_refl.append(refl)
+        l_time.append(np.datetime64(radar.data.time_start))
+        l_name.append(radar.name)
+
+    # Differences (2nd minus 1st radar), masked boxes are NaN
+    refl_diff = l_refl[1] - l_refl[0]
+    refl_diff[mask] = np.nan
+
+    # Name of output file
+    out_file = os.path.join(
+        batch_par['out_dir'],
+        Path(job[0]['file']).stem
+        + '_' + Path(job[1]['file']).stem
+        + '_' + '{:05.1f}'.format(job[0]['minute'])
+        + '.npz'
+        )
+
+    # Save results
+    np.savez_compressed(
+        out_file, refl1=l_refl[0], refl2=l_refl[1], refl_diff=refl_diff,
+        time1=l_time[0], time2=l_time[1], name1=l_name[0],
+        name2=l_name[1], mask=mask
+        )
+
+    # Return name of output file and differences
+    return out_file, refl_diff
+
+
+def diff_chunk(chunk):
+    '''Process a chunk of time steps and accumulate their differences'''
+    accumulator = DiffAccumulator(mask.shape, batch_par.get('stats_bins'))
+    out_files = []
+    for job in chunk:
+        out_file, refl_diff = diff_step(job)
+        accumulator.add(refl_diff)
+        out_files.append(out_file)
+    return out_files, accumulator
+
+
+
+
+
+########################################################################
+### Main Program ###
+########################################################################
+
+# Guard, so that worker processes don't run the main program again
+if __name__ == '__main__':
+
+    ####################################################################
+    ### List of jobs ###
+    ####################################################################
+
+    '''
+    With batch_par['match'], the scans of both radars are matched in
+    time, using a catalog (see build_catalog.py): For each scan of the
+    2nd radar (e.g. DWD) within the time window, the scan of the 1st
+    radar (e.g. PATTERN) with the longest overlap is found (see
+    ScanMatcher). With batch_par['average'], all overlapping time steps
+    of the 1st radar are averaged instead, weighted by their overlap.
+
+    Otherwise, file pairs are either given as list of tuples in
+    batch_par['pairs'] or as two glob patterns batch_par['glob1'] and
+    batch_par['glob2']. The (sorted) files of both radars are paired.
+    Each pair is combined with each minute of batch_par['minutes'].
+    Files of a catalog are not paired by position, as the files of
+    both radars don't correspond (e.g. one DWD file per scan, many time
+    steps per PATTERN file).
+
+    '''
+    # Check parameters needed for matching scans in time
+    if batch_par.get('match', False):
+        missing = [
+            key for key in ('catalog', 'start', 'end', 'radar1', 'radar2')
+            if key not in batch_par
+            ]
+        if missing:
+            raise ValueError(
+                "batch_par['match'] needs batch_par['"
+                + "'], batch_par['".join(missing) + "']"
+                )
+
+    # Time window of catalog
+    if 'catalog' in batch_par:
+        catalog = RadarCatalog(batch_par['catalog'])
+        start = datetime.strptime(batch_par['start'], '%Y-%m-%d %H:%M:%S')
+        end = datetime.strptime(batch_par['end'], '%Y-%m-%d %H:%M:%S')
+
+    # Match scans in time
+    if batch_par.get('match', False):
+
+        # Scans of 2nd radar and of 1st radar around them
+        scans2 = catalog.query(start, end, batch_par['radar2'])
+        gap = timedelta(seconds=batch_par.get('max_gap', 0))
+        matcher = ScanMatcher(
+            catalog.query(
+                min([scan['time_start'] for scan in scans2] + [start])
+                - gap,
+                max([scan['time_end'] for scan in scans2] + [end]) + gap,
+                batch_par['radar1']
+                ),
+            max_gap=batch_par.get('max_gap', 0)
+            )
+
+        # Radar parameters of both radars for each matched scan
+        jobs = []
+        for scan2 in scans2:
+            if batch_par.get('average', False):
+                scans1, weights = matcher.match_all(
+                    scan2['time_start'], scan2['time_end']
+                    )
+            else:
+                scans1 = [matcher.match(
+                    scan2['time_start'], scan2['time_end']
+                    )]
+                weights = [1.0]
+            if not scans1 or scans1[0] is None:
+                print('No match: ' + scan2['file'])
+                continue
+            job1 = RadarCatalog.get_radar_par(radar1_par, scans1[0])
+            if len(scans1) > 1:
+                job1['steps'] = [scan['step'] for scan in scans1]
+                job1['weights'] = [float(weight) for weight in weights]
+            jobs.append(
+                (job1, RadarCatalog.get_radar_par(radar2_par, scan2))
+                )
+
+    # Pairs of files
+    else:
+        if 'pairs' in batch_par:
+            pairs = batch_par['pairs']
+        elif 'catalog' in batch_par:
+            raise ValueError(
+                "scans of batch_par['catalog'] are only paired by time, "
+                "batch_par['match'] must be True"
+                )
+        else:
+            pairs = list(zip(
+                sorted(glob.glob(batch_par['glob1'])),
+                sorted(glob.glob(batch_par['glob2']))
+                ))
+
+        # Radar parameters of both radars for each time step
+        jobs = [
+            (
+                dict(radar1_par, file=file1, minute=minute),
+                dict(radar2_par, file=file2, minute=minute)
+                )
+            for file1, file2 in pairs
+            for minute in batch_par.get('minutes', [radar1_par['minute']])
+            ]
+
+    # Close catalog
+    if 'catalog' in batch_par:
+        catalog.close()
+
+
+
+
+
+    ####################################################################
+    ### Check/Create index matrices ###
+    ####################################################################
+
+    '''
+    Index matrices are created in advance, for all radar geometries of
+    the input files (only the geometry is read, not the reflectivity).
+    Thus, the worker processes only need to load them.
+
+    '''
+    # Radar parameters of each input file
+    files = {}
+    for job in jobs:
+        for radar_par in job:
+            files[radar_par['file']] = radar_par
+
+    # Create index matrices, which are not present yet
+    for radar_par in files.values():
+        radar = ReaderRegistry.create_radar(radar_par)
+        radar.read_file(radar_par, lazy=True)
+        lon, lat = get_rot_coords(radar, method)
+        get_index_dir(
+            car_grid, radar, lon, lat, method,
+            processes=batch_par.get('processes')
+            )
+
+
+
+
+
+    ####################################################################
+    ### Process time steps ###
+    ####################################################################
+
+    '''
+    Distributes the time steps over a pool of processes, in one chunk of
+    consecutive time steps per process. Each process accumulates the
+    statistics of the differences of its chunk (see DiffAccumulator),
+    which are merged afterwards. If batch_par['stats_file'] is given,
+    the statistics are added to this file (created, if not present
+    yet), so long periods can be processed batch by batch.
+
+    '''
+    # Create output directory, if not present yet
+    os.makedirs(batch_par['out_dir'], exist_ok=True)
+
+    # Statistics of previous batches
+    stats_file = batch_par.get('stats_file')
+    if stats_file is not None and os.path.exists(stats_file):
+        accumulator = DiffAccumulator.load(stats_file)
+    else:
+        accumulator = DiffAccumulator(
+            mask.shape, batch_par.get('stats_bins')
+            )
+
+    # Split time steps into one chunk per process
+    processes = batch_par.get('processes') or os.cpu_count() or 1
+    bounds = np.linspace(
+        0, len(jobs), max(min(processes, len(jobs)), 1) + 1
+        ).astype(int)
+    chunks = [jobs[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    # Process all time steps, merge statistics of all chunks
+    out_files = []
+    with ProcessPoolExecutor(processes) as executor:
+        for chunk_files, chunk_stats in executor.map(diff_chunk, chunks):
+            for out_file in chunk_files:
+                print('Saved: ' + out_file)
+            out_files.extend(chunk_files)
+            accumulator.merge(chunk_stats)
+
+    # Save statistics
+    if stats_file is not None:
+        accumulator.save(stats_file)
+        print('Statistics: ' + stats_file)
+
+
+
+
+
+    ####################################################################
+    ### Plot differences ###
+    ####################################################################
+
+    '''
+    If batch_par['plot'] is True, the differences of each time step are
+    plotted to a '.png'-file next to the '.npz'-file. The plots are
+    rendered without display by a pool of processes, each reusing one
+    figure for all its plots.
+
+    '''
+    if batch_par.get('plot', False):
+
+        # Arguments of the plot and name of output file for each plot
+        frames = []
+        for out_file in out_files:
+            with np.load(out_file) as results:
+                time1 = results['time1'].item()
+                time2 = results['time2'].item()
+                title = (
+                    str(results['name2']) + '(' + str(time2.time())
+                    + ') minus '
+                    + str(results['name1']) + '(' + str(time1.time())
+                    + ')\n' + str(time1.date())
+                    )
+                frames.append((
+                    (
+                        results['refl1'], results['refl2'],
+                        str(results['name1']), str(results['name2']), title
+                        ),
+                    out_file[:-len('.npz')] + '.png'
+                    ))
+
+        # Render all plots
+        for png_file in ReflDiffPlot.render_frames(
+                grid_par, plot_par, frames, batch_par.get('processes')
+                ):
+            print('Plotted: ' + png_file)
@@ -16,23 +16,17 @@ interpolating the radar data to the same cartesian grid.
 Import all modules and functions needed for this program.
 
 '''
-# Python modules
-import re
-import numpy as np
-from pathlib import Path
-
 # MasterModule
 from MasterModule.cartesian_grid import CartesianGrid
-from MasterModule.dwd_radar import DwdRadar
-from MasterModule.pattern_radar import PatternRadar
-from MasterModule.pattern_radar_v2 import PatternRadarV2
+from MasterModule.index_registry import IndexRegistry
+from MasterModule.reader_registry import ReaderRegistry
 from MasterModule.refl_diff_plot import ReflDiffPlot
 
 # Parameter
 import parameters as par
 
 # Functions
-from functions import rotate_pole
+from functions import get_index_dir, get_rot_coords
 
 
 
@@ -69,32 +63,15 @@ Creates all objects needed:
 - CartesianGrid for interpolating data to Cartesian Grid
 - ReflDiffPlot for plotting differences in reflectivity
 
-Creates the correct radar object after scanning (using regular 
-expressions) the file_name, which contains information about the radar
-and processing step.
+Creates the correct radar object after detecting the format of the 
+data file from its content (see ReaderRegistry), not from its name.
 
 '''
 # 1st radar
-# dwd radars
-if re.search('dwd_rad_boo', radar1_par['file']):
-    radar1 = DwdRadar(radar1_par)
-# pattern with version1 processing
-elif re.search('version1', radar1_par['file']):
-    radar1 = PatternRadar(radar1_par)
-# pattern with version2 processing
-elif re.search('version2', radar1_par['file']):
-    radar1 = PatternRadarV2(radar1_par)
+radar1 = ReaderRegistry.create_radar(radar1_par)
 
 # 2nd radar
-# dwd radars
-if re.search('dwd_rad_boo', radar2_par['file']):
-    radar2 = DwdRadar(radar2_par)
-# pattern with version1 processing
-elif re.search('version1', radar2_par['file']):
-    radar2 = PatternRadar(radar2_par)
-# pattern with version2 processing
-elif re.search('version2', radar2_par['file']):
-    radar2 = PatternRadarV2(radar2_par)
+radar2 = ReaderRegistry.create_radar(radar2_par)
 
 # Create list of both radar objectives, for easy looping
 radars = [radar1, radar2]
@@ -131,7 +108,6 @@ radar2.read_file(radar2_par)
 '''
 A lot of calculations are the same for both radars. These common
 calculations are done in this main loop:
- - increase azimuth resolution
  - calculate middle pixel polar coordinates
  - calculate cartesian coordinates out of polar coords
  - calculate rotated pole coordinates out of cartesian coords
@@ -147,71 +123,26 @@ for radar in radars:
 
     
     ####################################################################
-    ### artificially increase azimuth resolution ###
-    ####################################################################
-    
-    '''
-    The azimuth resolution of the radar usually is 1°. To avoid 
-    empty grid boxes in the new cartesian grid, the azimuth 
-    resolution is increased artificially. 
-    
-    '''
-    data_inc_res = radar.increase_azi_res()
-    
-    
-    
-    
-    
+    ### rotated pole coordinates of radar data ###
     ####################################################################
-    ### calculate coordinates of middle pixel for each box ###
-    ####################################################################
-    
+
     '''
     Coordinates of data are given at specific points, but are
-    valid for a box. 
-    This method calculates for each grid box the polar coordinates 
-    of the middle pixel out of the given coordinates at the edge of
-    the box.
-   
-    '''
-    mid_coords = radar.get_middle_pixel() 
-    
-    
-    
-    
-    
-    ####################################################################
-    ### transform polar coordinates to lon/lat ###
-    ####################################################################
-    
-    '''
-    Transformation of polar coordinates of grid boxes (middle pixel) to 
-    cartesian coordinates, using a wradlib function.
-    
-    '''
-    # Create numpy meshgrid, to obtain all combinations
-    r, az = np.meshgrid(mid_coords.range_, mid_coords.azi)
-    
-    # Get cartesian coordinates of radar data
-    cart_coords = radar.polar_to_cartesian(r, az)
-    
-    
-    
-    
-    
-    ####################################################################
-    ### rotated pole transformation ###
-    ####################################################################
-    
-    '''
-    Transform the cartesian coords to rotated pole coordinates using
-    a function from Claire Merker.
-    
+    valid for a box. The polar coordinates of the middle pixel of each
+    box are transformed to lon/lat (wradlib) and further to rotated
+    pole coordinates, using a function from Claire Merker.
+    The azimuth resolution of the radar usually is 1°. To avoid empty
+    grid boxes in the new cartesian grid, the coordinates are calculated
+    for an artificially increased azimuth resolution. The data array
+    itself is not increased, the index matrix is mapped back to the
+    original resolution instead.
+    If grid_par['method'] is 'overlap', the coordinates of the corners of
+    each box are used instead (see weight table below).
+    The coordinates only depend on the geometry of the radar data and
+    are cached on disk, so they are calculated only once.
+
     '''
-    # coords_rot.shape=(360,600,3), (azi,range,[lon,lat,height])
-    coords_rot = rotate_pole(cart_coords.lon, cart_coords.lat) 
-    lon = coords_rot[:,:,0]
-    lat = coords_rot[:,:,1]
+    lon, lat = get_rot_coords(radar, grid_par.get('method', 'index'))
     
     
     
@@ -227,38 +158,15 @@ for radar in radars:
     points falling into the same grid box. For a given cartesian grid
     and a given radar, always the same data points fall into the same
     grid boxes. --> This information doesn't need to be calculated each 
-    time, but can be saved to a dat.file. 
-    --> Check, if such a file is present already for the current radar
-    and cartesian grid. If not, call method to create it.
+    time, but can be saved to an index matrix directory. 
+    --> Check, if such an index matrix is present already for the current 
+    radar and cartesian grid. If not, call method to create it. Index 
+    matrices are looked up by a hash of the grid and radar geometry.
     
     '''
-    # Name of the index file
-    index_file = (
-        '../index_matrix/index_matrix_'
-        + str(radar.name)
-        + '_'
-        + str(car_grid.corners.lon_start)
-        + '_'
-        + str(car_grid.corners.lon_end)
-        + '_'
-        + str(car_grid.corners.lat_start)
-        + '_'
-        + str(car_grid.corners.lat_end)
-        + '_'
-        + str(car_grid.res_m)
-        + '_'
-        + str(radar.res_fac)
-        + '_'
-        + str(radar.offset)
-        + '.dat'
+    index_dir = get_index_dir(
+        car_grid, radar, lon, lat, grid_par.get('method', 'index')
         )
-    
-    # Path is used to check, if the file exists
-    index_matrix = Path(index_file)
-    
-    # If file doesn't exist, create it
-    if not index_matrix.is_file():
-        car_grid.create_index_matrix(index_file, lon, lat)
 
 
 
@@ -278,8 +186,14 @@ for radar in radars:
     reflectivity.
     
     '''
-    # Interpolate reflectivity to the new grid
-    refl = car_grid.data2grid(index_file, data_inc_res)
+    # Interpolate reflectivity to the new grid (raw counts of DWD data
+    # are decoded after averaging)
+    refl_data, gain, offset = radar.data.get_refl_raw()
+    refl = car_grid.data2grid(
+        index_dir, refl_data,
+        IndexRegistry.get_res_fac(radar, grid_par.get('method', 'index')),
+        gain, offset
+        )
     
     # Set reflectivities smaller than 5 to 5
     refl[refl < plot_par['rain_th']] = plot_par['rain_th']
@@ -2,6 +2,123 @@
 
 # Python modules
 import cartopy.crs as ccrs
+import numpy as np
+
+# MasterModule
+from MasterModule.coord_cache import CoordCache
+from MasterModule.index_registry import IndexRegistry
+
+# Coordinates of rotated pole
+ROTATED_POLE = [-170.415, 36.0625]
+
+
+def get_index_dir(
+        car_grid, radar, lon, lat, method='index', 
+        index_root='../index_matrix', processes=1
+        ):
+    '''Get index matrix directory, create index matrix if necessary
+    
+    Looks up the index matrix (or, for method 'overlap', the weight 
+    table) of the cartesian grid and the radar geometry in an 
+    :any:`IndexRegistry`. If there is none yet, it is created out of the
+    rotated pole coordinates of the radar data.
+    
+    Args:
+        car_grid (CartesianGrid): Cartesian grid.
+        radar (Radar): Radar object, after reading in the data file.
+        lon (numpy.ndarray): Rotated longitudes of radar data (see 
+            :any:`get_rot_coords`).
+        lat (numpy.ndarray): Rotated latitudes of radar data.
+        method (str): Interpolation method, 'index' or 'overlap'.
+        index_root (str): Directory, containing all index matrices.
+        processes (int): Number of processes used to create the index 
+            matrix (see :any:`CartesianGrid.create_index_matrix_parallel`).
+            None for the number of CPUs.
+    
+    Returns:
+        (str): Name of the index matrix directory.
+    
+    '''
+    # Look up index matrix
+    registry = IndexRegistry(index_root)
+    params = registry.get_params(car_grid, radar, method)
+    index_dir = registry.lookup(params)
+    
+    # If index matrix doesn't exist, create it
+    if index_dir is None:
+        index_dir = registry.get_index_dir(params)
+        if processes != 1:
+            car_grid.create_index_matrix_parallel(
+                index_dir, lon, lat, method, processes, params
+                )
+        elif method == 'overlap':
+            car_grid.create_weight_table(index_dir, lon, lat, params)
+        else:
+            car_grid.create_index_matrix(index_dir, lon, lat, params)
+    
+    # Return name of index matrix directory
+    return index_dir
+
+
+def get_rot_coords(radar, method='index', cache_dir='../coord_cache'):
+    '''Get rotated pole coordinates of radar data
+    
+    Calculates the rotated pole coordinates of the middle pixels (or, 
+    for method 'overlap', of the corners) of all polar grid boxes of the
+    radar data: Polar coordinates are transformed to lon/lat (wradlib) 
+    and further to rotated pole coordinates (cartopy). The coordinates 
+    only depend on the geometry of the radar data, so they are saved in
+    a :any:`CoordCache` and loaded from there for all further scans of 
+    the same geometry, skipping both transformations.
+    
+    Args:
+        radar (Radar): Radar object, after reading in the data file.
+        method (str): Interpolation method, 'index' for middle pixels, 
+            'overlap' for corners of the polar grid boxes.
+        cache_dir (str): Directory of the coordinate cache.
+    
+    Returns:
+        (tuple): Rotated longitude and latitude coordinates, with shape
+        (azimuth, range), or (azimuth + 1, range + 1) for corners.
+    
+    '''
+    # Parameters, the coordinates depend on (weight tables always in
+    # original azimuth resolution)
+    res_fac = IndexRegistry.get_res_fac(radar, method)
+    params = radar.get_geometry(res_fac)
+    params['pixel'] = 'corner' if method == 'overlap' else 'middle'
+    params['rotated_pole'] = ROTATED_POLE
+    
+    # Try to load coordinates from cache
+    cache = CoordCache(cache_dir)
+    key = cache.get_key(params)
+    coords = cache.load(key)
+    if coords is not None:
+        return coords
+    
+    # Polar coordinates of middle pixels or corners
+    if method == 'overlap':
+        pix_coords = radar.get_corner_coords(res_fac)
+    else:
+        pix_coords = radar.get_middle_pixel()
+    
+    # Create numpy meshgrid, to obtain all combinations
+    r, az = np.meshgrid(pix_coords.range_, pix_coords.azi)
+    
+    # Transform polar to cartesian coordinates
+    cart_coords = radar.polar_to_cartesian(r, az)
+    
+    # Transform to rotated pole coordinates (in data type of radar)
+    coords_rot = rotate_pole(cart_coords.lon, cart_coords.lat)
+    lon = coords_rot[:,:,0].astype(radar.dtype)
+    lat = coords_rot[:,:,1].astype(radar.dtype)
+    
+    # Save coordinates to cache
+    cache.save(key, lon, lat, params)
+    
+    # Return rotated coordinates
+    return lon, lat
+
 
 def rotate_pole(lon, lat):
     '''Transform cartesian to rotated pole coordinates
@@ -19,11 +136,8 @@ def rotate_pole(lon, lat):
         (numpy.ndarray): Rotated pole coordinates.
 
     '''          
-    # Coordinates of rotated pole
-    rotated_pole = [-170.415, 36.0625]
-    
     # Get projection
-    proj = ccrs.RotatedPole(rotated_pole[0], rotated_pole[1])
+    proj = ccrs.RotatedPole(ROTATED_POLE[0], ROTATED_POLE[1])
     
     # Calculate coordinates in rotated pole coordinate system
     coords_rot = proj.transform_points(ccrs.Geodetic(), lon, lat)
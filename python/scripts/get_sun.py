@@ -1,6 +1,6 @@
 '''
 This program calculates the angle of the sun, as seen by the PATTERN 
-radar.
+radar, for all time steps of one data file or of many data files.
 
 Program only works, if sun can be seen in radar image, and no rain is 
 present at that time.
@@ -20,11 +20,11 @@ Import modules needed for this program.
 
 '''
 # Python modules
-import re
+import glob
+import os
 
 # MasterModule
-from MasterModule.pattern_radar import PatternRadar
-from MasterModule.pattern_radar_v2 import PatternRadarV2
+from MasterModule.reader_registry import ReaderRegistry
 
 # Parameters
 import parameters as par
@@ -34,7 +34,7 @@ import parameters as par
 
 
 ########################################################################
-### parameters, lists ###
+### parameters, data files ###
 ########################################################################
 
 '''
@@ -44,8 +44,11 @@ Get parameters. Parameters can be set in parameters.py
 # Parameter
 radar_par = par.radar1_par  
 
-# Lists
-l_refl = [] #list with entry for each azimuth with integr. refl. 
+# Data files: a directory, a glob pattern or a single file
+if os.path.isdir(radar_par['file']):
+    files = sorted(glob.glob(os.path.join(radar_par['file'], '*.nc')))
+else:
+    files = sorted(glob.glob(radar_par['file']))
 
 
 
@@ -56,80 +59,46 @@ l_refl = [] #list with entry for each azimuth with integr. refl.
 ########################################################################
 
 '''
-This program only works for PATTERN radars. Check, if input file is
+This program only works for PATTERN radars. Check, if input files are
 PATTERN data.
 
 '''
-assert(
-    re.search('level2', radar_par['file'])
-    ), 'wrong input file, only pattern level2 data works'
+assert(files), 'no input file found for ' + radar_par['file']
+for data_file in files:
+    assert(
+        ReaderRegistry.detect(data_file) in ('pattern_v1', 'pattern_v2')
+        ), 'wrong input file, only pattern data works'
 
 
 
 
 
 ########################################################################
-### Create objects ###
-########################################################################
-
-'''
-Creates objects needed for this program:
- - PATTERN object to read in data.
-
-'''
-# pattern with version1 processing
-if re.search('version1', radar_par['file']):
-    radar = PatternRadar(radar_par)
-# pattern with version2 processing
-elif re.search('version2', radar_par['file']):
-    radar = PatternRadarV2(radar_par)
-
-
-
-
-
-########################################################################
-### read in data ###
+### get sun angle ###
 ########################################################################
 
 '''
-Reads in data.
+For each data file, all time steps are read in at once. For each time
+step, the azimuth angle, at which the reflectivity (integrated over all
+ranges) reaches its maximum, is found (see Radar.get_sun_azimuth). This
+is the angle to the sun (assuming the sun gives the only echo in this
+image).
 
 '''
-radar.read_file(radar_par)
+for data_file in files:
 
+    # Parameters of this file
+    file_par = dict(radar_par, file=data_file)
 
+    # Radar object of the format of the data file
+    radar = ReaderRegistry.create_radar(file_par)
 
+    # Read in all time steps
+    radar.read_file_all(file_par)
 
+    # Angle to the sun for each time step
+    angles = radar.get_sun_azimuth(radar.data.refl_steps)
 
-########################################################################
-### get sun angle ###
-########################################################################
-
-'''
-Get the angle of the sun, by looping through all ranges and azimuths
-and find the azimuth angle, at wich the reflectivity reaches its maximum
-(integrated over all ranges). This is the angle to the sun. (Assuming
-the sun gives the only echo in this image)
-
-'''
-# Loop through azimuth angles
-for line in radar.data.refl:
-    
-    # Set sum to zero for each azimuth angle
-    refl_sum = 0
-    
-    # Loop through ranges
-    for col in line:
-        
-            # Add reflectivity to sum variable
-            refl_sum += col
-    
-    # Append list of integrated reflectivites 
-    l_refl.append(refl_sum)
-        
-# Find angle with maximum integrated reflectivity
-angle = l_refl.index(max(l_refl))
-
-# Print angle
-print(angle)
+    # Print time and angle
+    for time, angle in zip(radar.data.times_start, angles):
+        print(str(time) + '  ' + '{:6.2f}'.format(angle))
@@ -0,0 +1,92 @@
+'''
+This program creates the index matrices (or weight tables) of a list of
+combinations of cartesian grids and radar data files in advance, so
+that later runs of the other scripts find them ready. Each index matrix
+is created in parallel by a pool of processes.
+
+'''
+
+
+
+
+
+########################################################################
+### modules and functions ###
+########################################################################
+
+'''
+Imports modules and functions needed for this program.
+
+'''
+# MasterModule
+from MasterModule.cartesian_grid import CartesianGrid
+from MasterModule.reader_registry import ReaderRegistry
+
+# Parameter
+import parameters as par
+
+# Functions
+from functions import get_index_dir, get_rot_coords
+
+
+
+
+
+########################################################################
+### parameters ###
+########################################################################
+
+'''
+Some parameters, that can be set in parameters.py. Each element of
+prewarm_par['configs'] is a dict with the keys 'grid_par', 'radar_par'
+and (optional) 'method'.
+
+'''
+configs = par.prewarm_par['configs']
+processes = par.prewarm_par.get('processes')
+
+
+
+
+
+########################################################################
+### Main Loop ###
+########################################################################
+
+'''
+For each combination of grid and radar data file:
+ - read in the geometry of the radar data (the reflectivity itself is
+   not needed and thus not decoded)
+ - get rotated pole coordinates (cached on disk)
+ - look up index matrix, create it in parallel if not present yet
+
+'''
+# Guard, so that worker processes don't run the main loop again
+if __name__ == '__main__':
+    
+    for config in configs:
+    
+        # Parameters of this combination
+        grid_par = config['grid_par']
+        radar_par = config['radar_par']
+        method = config.get('method', 'index')
+    
+        # Create the correct radar object, depending on the file format
+        radar = ReaderRegistry.create_radar(radar_par)
+    
+        # Create cartesian grid object
+        car_grid = CartesianGrid(grid_par)
+    
+        # Read in geometry of radar data
+        radar.read_file(radar_par, lazy=True)
+    
+        # Rotated pole coordinates of radar data
+        lon, lat = get_rot_coords(radar, method)
+    
+        # Look up index matrix, create it if necessary
+        index_dir = get_index_dir(
+            car_grid, radar, lon, lat, method, processes=processes
+            )
+    
+        # Tell user, which index matrix is ready
+        print('Ready: ' + index_dir)
@@ -15,13 +15,8 @@ This program plots radar data (dwd or pattern).
 Import all modules needed for this program.
 
 '''
-# Python modules
-import re
-
 # MasterModule
-from MasterModule.dwd_radar import DwdRadar
-from MasterModule.pattern_radar import PatternRadar
-from MasterModule.pattern_radar_v2 import PatternRadarV2
+from MasterModule.reader_registry import ReaderRegistry
 
 # Parameter
 import parameters as par
@@ -55,20 +50,12 @@ plot_par = par.plot_par
 Creates following objects:
 - Dwd or Pattern (depending on input file) to read in data
 
-Creates the correct radar object after scanning (using regular 
-expressions) the file_name, which contains information about the radar
-and processing step.
+Creates the correct radar object after detecting the format of the 
+data file from its content (see ReaderRegistry), not from its name.
 
 '''
-# dwd radars
-if re.search('dwd', radar_par['file']):
-    radar = DwdRadar(radar_par)
-# pattern with version1 processing
-elif re.search('version1', radar_par['file']):
-    radar = PatternRadar(radar_par)
-# pattern with version2 processing
-elif re.search('version2', radar_par['file']):
-    radar = PatternRadarV2(radar_par)
+# Radar object of the format of the data file
+radar = ReaderRegistry.create_radar(radar_par)
 
 
 
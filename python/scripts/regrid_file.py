@@ -0,0 +1,190 @@
+'''
+This program interpolates all time steps of a PATTERN data file to a
+cartesian grid at once and saves the resulting cube (time, lat, lon) to
+a single netCDF file.
+
+'''
+
+
+
+
+
+########################################################################
+### modules and functions ###
+########################################################################
+
+'''
+Imports modules and functions needed for this program.
+
+'''
+# Python modules
+import os
+from pathlib import Path
+
+# MasterModule
+from MasterModule.cartesian_grid import CartesianGrid
+from MasterModule.reader_registry import ReaderRegistry
+
+# Parameter
+import parameters as par
+
+# Functions
+from functions import get_index_dir, get_rot_coords
+
+
+
+
+
+########################################################################
+### parameters ###
+########################################################################
+
+'''
+Some parameters, that can be set in parameters.py.
+
+'''
+grid_par = par.grid_par
+radar_par = par.radar1_par
+batch_par = par.batch_par
+
+
+
+
+
+########################################################################
+### Intercept wrong input files ###
+########################################################################
+
+'''
+Only PATTERN files contain more than one time step. Check, if input file
+is PATTERN data.
+
+'''
+assert(
+    ReaderRegistry.detect(radar_par['file']) in ('pattern_v1', 'pattern_v2')
+    ), 'wrong input file, only pattern data works'
+
+
+
+
+
+########################################################################
+### Create objects ###
+########################################################################
+
+'''
+Creates following objects:
+- PatternRadar or PatternRadarV2 (depending on input file) to read in
+    data.
+- CartesianGrid for interpolating data to cartesian grid.
+
+'''
+# Radar object of the format of the data file
+radar = ReaderRegistry.create_radar(radar_par)
+
+# Create cartesian grid object
+car_grid = CartesianGrid(grid_par)
+
+
+
+
+
+########################################################################
+### Read in data ###
+########################################################################
+
+'''
+Reads in all time steps of the file at once.
+
+'''
+radar.read_file_all(radar_par)
+
+
+
+
+
+########################################################################
+### rotated pole coordinates of radar data ###
+########################################################################
+
+'''
+Coordinates of data are given at specific points, but are
+valid for a box. The polar coordinates of the middle pixel of each
+box are transformed to lon/lat (wradlib) and further to rotated
+pole coordinates, using a function from Claire Merker.
+The azimuth resolution of the radar usually is 1°. To avoid empty
+grid boxes in the new cartesian grid, the coordinates are calculated
+for an artificially increased azimuth resolution. The data array
+itself is not increased, the index matrix is mapped back to the
+original resolution instead.
+The coordinates only depend on the geometry of the radar data and
+are cached on disk, so they are calculated only once.
+
+'''
+lon, lat = get_rot_coords(radar)
+
+
+
+
+
+########################################################################
+### Check/Create index-matrix ###
+########################################################################
+
+'''
+The index matrix is the same for all time steps of the file.
+--> Check, if such an index matrix is present already for the current
+radar and cartesian grid (looked up by a hash of the grid and radar
+geometry). If not, call method to create it.
+
+'''
+index_dir = get_index_dir(car_grid, radar, lon, lat)
+
+
+
+
+
+########################################################################
+### Interpolate radar data to cartesian grid ###
+########################################################################
+
+'''
+Interpolates all time steps at once, using a sparse regridding operator
+built out of the index matrix. Reflectivity smaller than the rain
+threshold is set to the rain threshold, as in cartesian_plot.py.
+
+'''
+# Sparse regridding operator
+operator = car_grid.get_regrid_operator(
+    index_dir, radar.data.refl_steps.shape[1:], radar.res_fac
+    )
+
+# Interpolate all time steps to cartesian grid
+refl_cube = operator.apply(radar.data.refl_steps)
+
+# Set reflectivities smaller than threshold to threshold
+refl_cube[refl_cube < par.plot_par['rain_th']] = par.plot_par['rain_th']
+
+
+
+
+
+########################################################################
+### save data ###
+########################################################################
+
+'''
+Saves the cube of interpolated reflectivity to a netCDF file, named
+after the input file.
+
+'''
+# Name of output file
+out_file = os.path.join(
+    batch_par['out_dir'],
+    Path(radar_par['file']).stem + '_cartesian.nc'
+    )
+
+# Save cube
+car_grid.save_cube(
+    out_file, refl_cube, radar.data.times_start, radar.data.times_end
+    )